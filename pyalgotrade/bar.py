@@ -56,6 +56,9 @@ class Bar(object):
 
     __metaclass__ = abc.ABCMeta
 
+    # No per-instance __dict__. Subclasses should define __slots__ as well to keep the memory footprint low.
+    __slots__ = ()
+
     @abc.abstractmethod
     def setUseAdjustedValue(self, useAdjusted):
         raise NotImplementedError()
@@ -132,7 +135,7 @@ class BasicBar(Bar):
         '__extra',
     )
 
-    def __init__(self, dateTime, open_, high, low, close, volume, adjClose, frequency, extra={}):
+    def __init__(self, dateTime, open_, high, low, close, volume, adjClose, frequency, extra=None):
         if high < low:
             raise Exception("high < low on %s" % (dateTime))
         elif high < open_:
@@ -153,7 +156,8 @@ class BasicBar(Bar):
         self.__adjClose = adjClose
         self.__frequency = frequency
         self.__useAdjustedValue = False
-        self.__extra = extra
+        # Extra columns are optional and most bars don't have them, so an empty dict is not allocated for each bar.
+        self.__extra = extra or None
 
     def __setstate__(self, state):
         (self.__dateTime,
@@ -267,8 +271,11 @@ class BasicBar(Bar):
             return self.__close
 
     def getExtraColumns(self):
+        if self.__extra is None:
+            return {}
         return self.__extra
 
+
 class Bars(object):
 
     """A group of :class:`Bar` objects.
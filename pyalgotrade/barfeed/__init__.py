@@ -47,6 +47,7 @@ class BaseBarFeed(feed.BaseFeed):
         super(BaseBarFeed, self).__init__(maxLen)
         self.__frequency = frequency
         self.__useAdjustedValues = False
+        self.__useColumnarDataSeries = False
         self.__defaultInstrument = None
         self.__currentBars = None
         self.__lastBars = {}
@@ -65,6 +66,17 @@ class BaseBarFeed(feed.BaseFeed):
         for instrument in self.getRegisteredInstruments():
             self[instrument].setUseAdjustedValues(useAdjusted)
 
+    def setUseColumnarDataSeries(self, useColumnar):
+        """Sets the type of :class:`pyalgotrade.dataseries.bards.BarDataSeries` to create for each instrument.
+
+        :param useColumnar: True to use :class:`pyalgotrade.dataseries.bards.ColumnarBarDataSeries`.
+        :type useColumnar: boolean.
+
+        .. note::
+            This only affects dataseries that get created afterwards, so it should be called before loading bars.
+        """
+        self.__useColumnarDataSeries = useColumnar
+
     # Return the datetime for the current bars.
     @abc.abstractmethod
     def getCurrentDateTime(self):
@@ -86,7 +98,10 @@ class BaseBarFeed(feed.BaseFeed):
         raise NotImplementedError()
 
     def createDataSeries(self, key, maxLen):
-        ret = bards.BarDataSeries(maxLen)
+        if self.__useColumnarDataSeries:
+            ret = bards.ColumnarBarDataSeries(maxLen)
+        else:
+            ret = bards.BarDataSeries(maxLen)
         ret.setUseAdjustedValues(self.__useAdjustedValues)
         return ret
 
@@ -0,0 +1,456 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2015 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import datetime
+
+import numpy as np
+import pytz
+
+from pyalgotrade import bar
+from pyalgotrade.utils import dt
+
+
+MICROSECONDS_PER_SECOND = 1000000
+MICROSECONDS_PER_DAY = 86400 * MICROSECONDS_PER_SECOND
+
+# strptime directives supported by the fixed format datetime parser, along with their width.
+_fixedWidthDirectives = {
+    "%Y": 4,
+    "%m": 2,
+    "%d": 2,
+    "%H": 2,
+    "%M": 2,
+    "%S": 2,
+}
+
+
+def naive_to_microseconds(dateTime):
+    # Wall clock time, as microseconds since 1970-01-01 00:00:00. Timezone information is ignored.
+    diff = dt.unlocalize(dateTime) - dt.epoch_naive
+    return (diff.days * 86400 + diff.seconds) * MICROSECONDS_PER_SECOND + diff.microseconds
+
+
+def microseconds_to_naive(microseconds):
+    return dt.epoch_naive + datetime.timedelta(microseconds=int(microseconds))
+
+
+# Returns a list of (directive, offset, width) tuples, a list of (offset, char) literals and the length of the
+# strings, or None if the format can't be parsed by position.
+def _compile_fixed_format(dateTimeFormat):
+    fields = []
+    literals = []
+    pos = 0
+    i = 0
+    while i < len(dateTimeFormat):
+        if dateTimeFormat[i] == "%":
+            directive = dateTimeFormat[i:i+2]
+            width = _fixedWidthDirectives.get(directive)
+            if width is None:
+                return None
+            fields.append((directive, pos, width))
+            pos += width
+            i += 2
+        else:
+            literals.append((pos, dateTimeFormat[i]))
+            pos += 1
+            i += 1
+    return fields, literals, pos
+
+
+def _parse_fixed_format(values, fields, literals, width):
+    strings = np.array(values, dtype=str)
+    if strings.dtype.itemsize != width or np.char.str_len(strings).min() != width:
+        return None
+    chars = strings.view(np.uint8).reshape(len(strings), width)
+
+    for offset, literal in literals:
+        if not (chars[:, offset] == ord(literal)).all():
+            return None
+
+    parsed = {}
+    for directive, offset, fieldWidth in fields:
+        digits = chars[:, offset:offset+fieldWidth].astype(np.int64) - ord("0")
+        if digits.min() < 0 or digits.max() > 9:
+            return None
+        value = np.zeros(len(strings), dtype=np.int64)
+        for i in xrange(fieldWidth):
+            value = value * 10 + digits[:, i]
+        parsed[directive] = value
+
+    # Same defaults as datetime.datetime.strptime.
+    default = lambda directive, value: parsed.get(directive, np.repeat(np.int64(value), len(strings)))
+    years = default("%Y", 1900)
+    months = default("%m", 1)
+    days = default("%d", 1)
+    hours = default("%H", 0)
+    minutes = default("%M", 0)
+    seconds = default("%S", 0)
+
+    if months.min() < 1 or months.max() > 12 or days.min() < 1:
+        return None
+    if hours.max() > 23 or minutes.max() > 59 or seconds.max() > 59:
+        return None
+    firstDayOfMonth = ((years - 1970) * 12 + months - 1).astype("datetime64[M]")
+    dates = firstDayOfMonth.astype("datetime64[D]") + (days - 1).astype("timedelta64[D]")
+    # Days past the end of the month.
+    if not (dates.astype("datetime64[M]") == firstDayOfMonth).all():
+        return None
+
+    ret = dates.astype(np.int64) * MICROSECONDS_PER_DAY
+    ret += ((hours * 60 + minutes) * 60 + seconds) * MICROSECONDS_PER_SECOND
+    return ret
+
+
+def parse_datetimes(values, dateTimeFormat):
+    """Parses a sequence of datetime strings into an array with the number of microseconds since 1970-01-01 (wall clock
+    time, no timezone conversion is applied).
+
+    Formats made only of zero padded numeric fields (%Y, %m, %d, %H, %M and %S) and literals, like "%Y-%m-%d %H:%M:%S",
+    are parsed by position for the whole sequence at once. Any other format, or values that don't follow the format
+    strictly, fall back to datetime.datetime.strptime.
+    """
+
+    if len(values) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    ret = None
+    fixedFormat = _compile_fixed_format(dateTimeFormat)
+    if fixedFormat is not None:
+        fields, literals, width = fixedFormat
+        ret = _parse_fixed_format(values, fields, literals, width)
+    if ret is None:
+        ret = np.array(
+            [naive_to_microseconds(datetime.datetime.strptime(value, dateTimeFormat)) for value in values],
+            dtype=np.int64
+        )
+    return ret
+
+
+def set_time(dateTimes, time):
+    """Replaces the time in an array of datetimes, as returned by :func:`parse_datetimes`.
+
+    :param time: The time to set.
+    :type time: datetime.time.
+    """
+    timeOffset = ((time.hour * 60 + time.minute) * 60 + time.second) * MICROSECONDS_PER_SECOND + time.microsecond
+    return dateTimes - dateTimes % MICROSECONDS_PER_DAY + timeOffset
+
+
+def parse_floats(values):
+    return np.array(values, dtype=np.float64)
+
+
+def parse_optional_floats(values):
+    """Like :func:`parse_floats` but empty strings are parsed as NaN. Returns None if all the values are empty."""
+
+    strings = np.array(values, dtype=str)
+    empty = strings == ""
+    if len(strings) == 0 or empty.all():
+        return None
+    return np.where(empty, "nan", strings).astype(np.float64)
+
+
+def sanitize_ohlc(open_, high, low, close):
+    """Vectorized version of :func:`pyalgotrade.barfeed.common.sanitize_ohlc`."""
+
+    low = np.minimum(np.minimum(low, open_), close)
+    high = np.maximum(np.maximum(high, open_), close)
+    return open_, high, low, close
+
+
+class BarColumns(object):
+    """A sequence of bars for a single instrument, stored column by column in NumPy arrays.
+    :class:`pyalgotrade.bar.BasicBar` instances are only built when accessed, so holding years of intraday bars
+    doesn't require a Python object per bar.
+
+    :param dateTimes: The wall clock datetimes, as returned by :func:`parse_datetimes`.
+    :type dateTimes: numpy.array.
+    :param open_: The opening prices.
+    :type open_: numpy.array.
+    :param high: The highest prices.
+    :type high: numpy.array.
+    :param low: The lowest prices.
+    :type low: numpy.array.
+    :param close: The closing prices.
+    :type close: numpy.array.
+    :param volume: The volumes.
+    :type volume: numpy.array.
+    :param adjClose: The adjusted closing prices, with NaN for missing values, or None.
+    :type adjClose: numpy.array.
+    :param frequency: The bars frequency. Check :class:`pyalgotrade.bar.Frequency`.
+    :param timezone: The timezone used to localize the datetimes, or None for naive datetimes.
+    :type timezone: A pytz timezone.
+    :param extra: A dictionary that maps extra column names to arrays of values.
+    :type extra: dict.
+    :param utc: True if dateTimes are UTC times that have to be converted to timezone, instead of wall clock times that
+        have to be localized. Wall clock times are ambiguous when daylight saving time ends.
+    :type utc: boolean.
+    """
+
+    def __init__(self, dateTimes, open_, high, low, close, volume, adjClose, frequency, timezone=None, extra=None, utc=False):
+        self.__dateTimes = np.asarray(dateTimes, dtype=np.int64)
+        self.__open = np.asarray(open_, dtype=np.float64)
+        self.__high = np.asarray(high, dtype=np.float64)
+        self.__low = np.asarray(low, dtype=np.float64)
+        self.__close = np.asarray(close, dtype=np.float64)
+        self.__volume = np.asarray(volume, dtype=np.float64)
+        self.__adjClose = None
+        if adjClose is not None:
+            self.__adjClose = np.asarray(adjClose, dtype=np.float64)
+        self.__frequency = frequency
+        self.__timezone = timezone
+        self.__utc = utc
+        self.__extra = {}
+        for name, values in (extra or {}).iteritems():
+            self.__extra[name] = np.asarray(values, dtype=object)
+
+        for values in [self.__open, self.__high, self.__low, self.__close, self.__volume, self.__adjClose] + self.__extra.values():
+            if values is not None and len(values) != len(self.__dateTimes):
+                raise Exception("All columns must have the same length")
+
+        # The last bar built. Feeds usually peek at a bar before dispatching it.
+        self.__lastPos = None
+        self.__lastBar = None
+
+    def __len__(self):
+        return len(self.__dateTimes)
+
+    def __getitem__(self, pos):
+        if pos < 0:
+            pos += len(self)
+        if pos < 0 or pos >= len(self):
+            raise IndexError("Index out of range")
+        if pos != self.__lastPos:
+            self.__lastBar = self.__buildBar(pos)
+            self.__lastPos = pos
+        return self.__lastBar
+
+    def __iter__(self):
+        for pos in xrange(len(self)):
+            yield self[pos]
+
+    def __buildBar(self, pos):
+        adjClose = None
+        if self.__adjClose is not None:
+            adjClose = float(self.__adjClose[pos])
+            if np.isnan(adjClose):
+                adjClose = None
+        extra = None
+        if len(self.__extra):
+            extra = dict((name, values[pos]) for name, values in self.__extra.iteritems())
+        return bar.BasicBar(
+            self.getDateTime(pos),
+            float(self.__open[pos]),
+            float(self.__high[pos]),
+            float(self.__low[pos]),
+            float(self.__close[pos]),
+            float(self.__volume[pos]),
+            adjClose,
+            self.__frequency,
+            extra=extra
+        )
+
+    def getFrequency(self):
+        return self.__frequency
+
+    def getTimezone(self):
+        return self.__timezone
+
+    def isUTC(self):
+        return self.__utc
+
+    def haveAdjClose(self):
+        return self.__adjClose is not None and not np.isnan(self.__adjClose).all()
+
+    def getDateTime(self, pos):
+        ret = microseconds_to_naive(self.__dateTimes[pos])
+        if self.__utc:
+            ret = pytz.utc.localize(ret)
+        if self.__timezone is not None:
+            ret = dt.localize(ret, self.__timezone)
+        return ret
+
+    def getDateTimeColumn(self):
+        return self.__dateTimes
+
+    def getOpenColumn(self):
+        return self.__open
+
+    def getHighColumn(self):
+        return self.__high
+
+    def getLowColumn(self):
+        return self.__low
+
+    def getCloseColumn(self):
+        return self.__close
+
+    def getVolumeColumn(self):
+        return self.__volume
+
+    def getAdjCloseColumn(self):
+        return self.__adjClose
+
+    def getExtraColumns(self):
+        return self.__extra
+
+    def toColumnDateTime(self, dateTime):
+        """Converts a datetime.datetime to a value that can be compared with the datetime column.
+        Aware datetimes are converted to the timezone of the bars first."""
+
+        if self.__timezone is not None and not dt.datetime_is_naive(dateTime):
+            if self.__utc:
+                dateTime = dt.as_utc(dateTime)
+            else:
+                dateTime = dt.localize(dateTime, self.__timezone)
+        return naive_to_microseconds(dateTime)
+
+    def take(self, indices):
+        """Returns a new BarColumns with the bars selected by an index array or a boolean mask."""
+
+        adjClose = None
+        if self.__adjClose is not None:
+            adjClose = self.__adjClose[indices]
+        extra = dict((name, values[indices]) for name, values in self.__extra.iteritems())
+        return BarColumns(
+            self.__dateTimes[indices],
+            self.__open[indices],
+            self.__high[indices],
+            self.__low[indices],
+            self.__close[indices],
+            self.__volume[indices],
+            adjClose,
+            self.__frequency,
+            self.__timezone,
+            extra,
+            self.__utc
+        )
+
+    def isSorted(self):
+        return len(self) < 2 or bool((self.__dateTimes[1:] >= self.__dateTimes[:-1]).all())
+
+    def sort(self):
+        """Returns the bars sorted by datetime. Bars with the same datetime keep their relative order."""
+
+        if self.isSorted():
+            return self
+        return self.take(np.argsort(self.__dateTimes, kind="mergesort"))
+
+    def isCompatible(self, other):
+        """Returns True if other can be concatenated to these bars."""
+
+        return (
+            self.__frequency == other.getFrequency() and
+            self.__timezone == other.getTimezone() and
+            self.__utc == other.isUTC() and
+            (self.__adjClose is None) == (other.getAdjCloseColumn() is None) and
+            sorted(self.__extra.keys()) == sorted(other.getExtraColumns().keys())
+        )
+
+    def concatenate(self, other):
+        assert(self.isCompatible(other))
+
+        adjClose = None
+        if self.__adjClose is not None:
+            adjClose = np.concatenate([self.__adjClose, other.getAdjCloseColumn()])
+        extra = {}
+        for name, values in self.__extra.iteritems():
+            extra[name] = np.concatenate([values, other.getExtraColumns()[name]])
+        return BarColumns(
+            np.concatenate([self.__dateTimes, other.getDateTimeColumn()]),
+            np.concatenate([self.__open, other.getOpenColumn()]),
+            np.concatenate([self.__high, other.getHighColumn()]),
+            np.concatenate([self.__low, other.getLowColumn()]),
+            np.concatenate([self.__close, other.getCloseColumn()]),
+            np.concatenate([self.__volume, other.getVolumeColumn()]),
+            adjClose,
+            self.__frequency,
+            self.__timezone,
+            extra,
+            self.__utc
+        )
+
+    def merge(self, other):
+        """Returns the bars from both BarColumns sorted by datetime. Both must be sorted.
+        Bars with the same datetime keep their relative order, with the ones in self coming first."""
+
+        ret = self.concatenate(other)
+        if len(self) == 0 or len(other) == 0 or self.__dateTimes[-1] <= other.getDateTimeColumn()[0]:
+            return ret
+
+        # The position in the result of each bar from other, and of each bar from self in the remaining slots.
+        otherPos = np.searchsorted(self.__dateTimes, other.getDateTimeColumn(), side="right") + np.arange(len(other))
+        isOther = np.zeros(len(ret), dtype=bool)
+        isOther[otherPos] = True
+        indices = np.empty(len(ret), dtype=np.int64)
+        indices[otherPos] = np.arange(len(self), len(ret))
+        indices[~isOther] = np.arange(len(self))
+        return ret.take(indices)
+
+
+def from_bars(bars):
+    """Builds a :class:`BarColumns` from a sequence of :class:`pyalgotrade.bar.Bar`.
+    Returns None if the sequence is empty or if the bars don't share the frequency, the timezone or the extra columns.
+    """
+
+    if len(bars) == 0:
+        return None
+
+    firstBar = bars[0]
+    frequency = firstBar.getFrequency()
+    extraNames = sorted(firstBar.getExtraColumns().keys())
+    timezone = None
+    zone = getattr(firstBar.getDateTime().tzinfo, "zone", None)
+    if zone is not None:
+        timezone = pytz.timezone(zone)
+    elif not dt.datetime_is_naive(firstBar.getDateTime()):
+        return None
+
+    dateTimes = np.empty(len(bars), dtype=np.int64)
+    open_ = np.empty(len(bars))
+    high = np.empty(len(bars))
+    low = np.empty(len(bars))
+    close = np.empty(len(bars))
+    volume = np.empty(len(bars))
+    adjClose = np.empty(len(bars))
+    extra = dict((name, []) for name in extraNames)
+    for i, bar_ in enumerate(bars):
+        dateTime = bar_.getDateTime()
+        if getattr(dateTime.tzinfo, "zone", None) != zone or bar_.getFrequency() != frequency:
+            return None
+        if sorted(bar_.getExtraColumns().keys()) != extraNames:
+            return None
+
+        if timezone is None:
+            dateTimes[i] = naive_to_microseconds(dateTime)
+        else:
+            dateTimes[i] = dt.datetime_to_microseconds(dateTime)
+        open_[i] = bar_.getOpen()
+        high[i] = bar_.getHigh()
+        low[i] = bar_.getLow()
+        close[i] = bar_.getClose()
+        volume[i] = bar_.getVolume()
+        adjClose[i] = np.nan if bar_.getAdjClose() is None else bar_.getAdjClose()
+        for name, value in bar_.getExtraColumns().iteritems():
+            extra[name].append(value)
+
+    if np.isnan(adjClose).all():
+        adjClose = None
+    return BarColumns(dateTimes, open_, high, low, close, volume, adjClose, frequency, timezone, extra, timezone is not None)
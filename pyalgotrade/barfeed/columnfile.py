@@ -0,0 +1,279 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2015 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import os
+import re
+import json
+import struct
+import hashlib
+import tempfile
+import cPickle
+
+import numpy as np
+import pytz
+
+from pyalgotrade.barfeed import columnar
+
+
+######################################################################
+## Binary column files
+# A column file holds the bars for a single instrument:
+#
+# - An 8 byte signature and the metadata length as a little endian uint64.
+# - The metadata, JSON encoded, padded to a multiple of 8 bytes.
+# - The datetime column (little endian int64) followed by the open, high, low, close, volume and, if present, adjusted
+#   close columns (little endian float64).
+# - The extra columns, if any, pickled.
+#
+# Columns are memory-mapped when read, so only the pages that get used are loaded.
+
+SIGNATURE = "PATBARS1"
+
+_header = struct.Struct("<8sQ")
+_columnNames = ["open", "high", "low", "close", "volume", "adj_close"]
+
+
+def _padding(size):
+    return (8 - size % 8) % 8
+
+
+def write(path, barColumns, key=None):
+    """Writes a :class:`pyalgotrade.barfeed.columnar.BarColumns` to a column file.
+
+    :param path: The path to the file.
+    :type path: string.
+    :param barColumns: The bars to write.
+    :type barColumns: :class:`pyalgotrade.barfeed.columnar.BarColumns`.
+    :param key: Any JSON serializable value to store along with the bars. Check :func:`read_key`.
+    """
+
+    timezone = barColumns.getTimezone()
+    zone = None
+    if timezone is not None:
+        zone = getattr(timezone, "zone", None)
+        if zone is None:
+            raise Exception("Only pytz timezones are supported")
+
+    columns = [
+        barColumns.getOpenColumn(),
+        barColumns.getHighColumn(),
+        barColumns.getLowColumn(),
+        barColumns.getCloseColumn(),
+        barColumns.getVolumeColumn(),
+        barColumns.getAdjCloseColumn(),
+    ]
+    extra = barColumns.getExtraColumns()
+    metadata = {
+        "key": key,
+        "rows": len(barColumns),
+        "frequency": barColumns.getFrequency(),
+        "timezone": zone,
+        "utc": barColumns.isUTC(),
+        "columns": [name for name, values in zip(_columnNames, columns) if values is not None],
+        "extra": sorted(extra.keys()),
+    }
+    encodedMetadata = json.dumps(metadata)
+
+    with open(path, "wb") as f:
+        f.write(_header.pack(SIGNATURE, len(encodedMetadata)))
+        f.write(encodedMetadata)
+        f.write("\0" * _padding(len(encodedMetadata)))
+        f.write(np.asarray(barColumns.getDateTimeColumn(), dtype="<i8").tostring())
+        for values in columns:
+            if values is not None:
+                f.write(np.asarray(values, dtype="<f8").tostring())
+        if len(extra):
+            cPickle.dump(dict((name, list(values)) for name, values in extra.iteritems()), f, cPickle.HIGHEST_PROTOCOL)
+
+
+def _read_metadata(f):
+    signature, metadataLength = _header.unpack(f.read(_header.size))
+    if signature != SIGNATURE:
+        raise Exception("%s is not a column file" % (f.name))
+    return json.loads(f.read(metadataLength)), _header.size + metadataLength + _padding(metadataLength)
+
+
+def read_key(path):
+    """Returns the key stored in a column file."""
+
+    return ColumnFile(path).getKey()
+
+
+def read(path):
+    """Reads a column file. The columns are memory-mapped.
+
+    :param path: The path to the file.
+    :type path: string.
+    :rtype: :class:`pyalgotrade.barfeed.columnar.BarColumns`.
+    """
+
+    return ColumnFile(path).read()
+
+
+class ColumnFile(object):
+    """A column file opened for reading. Only the metadata is read when opening the file.
+
+    :param path: The path to the file.
+    :type path: string.
+    """
+
+    def __init__(self, path):
+        self.__path = path
+        with open(path, "rb") as f:
+            self.__metadata, self.__dataOffset = _read_metadata(f)
+        self.__timezone = None
+        if self.__metadata["timezone"] is not None:
+            self.__timezone = pytz.timezone(self.__metadata["timezone"])
+        self.__extra = None
+
+    def __len__(self):
+        return self.__metadata["rows"]
+
+    def __getColumnCount(self):
+        return 1 + len(self.__metadata["columns"])
+
+    def __getExtra(self):
+        # Extra columns are pickled so they are read all at once, the first time they're needed.
+        if self.__extra is None:
+            self.__extra = {}
+            if len(self.__metadata["extra"]):
+                with open(self.__path, "rb") as f:
+                    f.seek(self.__dataOffset + self.__getColumnCount() * len(self) * 8)
+                    self.__extra = cPickle.load(f)
+        return self.__extra
+
+    def getPath(self):
+        return self.__path
+
+    def getKey(self):
+        return self.__metadata["key"]
+
+    def getFrequency(self):
+        return self.__metadata["frequency"]
+
+    def getTimezone(self):
+        return self.__timezone
+
+    def haveAdjClose(self):
+        return "adj_close" in self.__metadata["columns"]
+
+    def read(self, begin=0, end=None, copy=False):
+        """Reads a range of rows.
+
+        :param begin: The first row to read.
+        :type begin: int.
+        :param end: The row where to stop reading, or None to read up to the end of the file.
+        :type end: int.
+        :param copy: False to return memory-mapped columns. True to copy the rows and release the mapping.
+        :type copy: boolean.
+        :rtype: :class:`pyalgotrade.barfeed.columnar.BarColumns`.
+        """
+
+        rows = len(self)
+        if end is None or end > rows:
+            end = rows
+        begin = min(begin, end)
+        columnCount = self.__getColumnCount()
+
+        if begin < end:
+            data = np.memmap(self.__path, dtype="<i8", mode="r", offset=self.__dataOffset, shape=(columnCount, rows))
+            data = data[:, begin:end]
+            if copy:
+                data = np.array(data)
+            dateTimes = data[0]
+            floats = data[1:].view("<f8")
+        else:
+            dateTimes = np.zeros(0, dtype=np.int64)
+            floats = np.zeros((columnCount - 1, 0))
+
+        columns = dict(zip(self.__metadata["columns"], floats))
+        extra = dict((name, values[begin:end]) for name, values in self.__getExtra().iteritems())
+        return columnar.BarColumns(
+            dateTimes,
+            columns["open"],
+            columns["high"],
+            columns["low"],
+            columns["close"],
+            columns["volume"],
+            columns.get("adj_close"),
+            self.__metadata["frequency"],
+            self.__timezone,
+            extra,
+            self.__metadata["utc"]
+        )
+
+
+class Cache(object):
+    """Caches the bars parsed from CSV files in column files.
+
+    :param cacheDir: The directory where column files are stored. It gets created if it doesn't exist.
+    :type cacheDir: string.
+
+    Each CSV file, instrument and set of parser settings gets its own column file. The file is rebuilt if the CSV file
+    modification time or size change. Bars are stored sorted, so column files can also be used with
+    :class:`pyalgotrade.barfeed.mmapfeed.Feed`.
+    """
+
+    def __init__(self, cacheDir):
+        self.__cacheDir = cacheDir
+
+    def getCacheDir(self):
+        return self.__cacheDir
+
+    def __getPaths(self, instrument, csvPath, parserKey):
+        csvPath = os.path.abspath(csvPath)
+        stat = os.stat(csvPath)
+        key = {
+            "path": csvPath,
+            "mtime": stat.st_mtime,
+            "size": stat.st_size,
+            "parser": parserKey,
+        }
+        # Round trip the key so it can be compared against the one read from the file.
+        key = json.loads(json.dumps(key))
+        digest = hashlib.sha1(json.dumps([csvPath, parserKey])).hexdigest()
+        fileName = "%s-%s.bars" % (re.sub(r"[^\w\.-]", "_", instrument), digest)
+        return os.path.join(self.__cacheDir, fileName), key
+
+    def load(self, instrument, csvPath, parserKey):
+        """Returns the cached :class:`pyalgotrade.barfeed.columnar.BarColumns` or None if there is no valid cache
+        entry."""
+
+        path, key = self.__getPaths(instrument, csvPath, parserKey)
+        ret = None
+        if os.path.exists(path) and read_key(path) == key:
+            ret = read(path)
+        return ret
+
+    def save(self, instrument, csvPath, parserKey, barColumns):
+        """Stores a :class:`pyalgotrade.barfeed.columnar.BarColumns` in the cache."""
+
+        path, key = self.__getPaths(instrument, csvPath, parserKey)
+        if not os.path.exists(self.__cacheDir):
+            os.makedirs(self.__cacheDir)
+        # Write to a temporary file first so other processes never read a partially written file.
+        fd, tmpPath = tempfile.mkstemp(dir=self.__cacheDir)
+        os.close(fd)
+        try:
+            write(tmpPath, barColumns, key)
+            os.rename(tmpPath, path)
+        except Exception:
+            os.remove(tmpPath)
+            raise
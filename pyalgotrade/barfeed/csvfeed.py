@@ -21,10 +21,29 @@
 from pyalgotrade.utils import dt
 from pyalgotrade.utils import csvutils
 from pyalgotrade.barfeed import membf
+from pyalgotrade.barfeed import columnar
+from pyalgotrade.barfeed import columnfile
 from pyalgotrade import bar
 
+import os
 import datetime
 import pytz
+import numpy as np
+
+
+# The default directory used to cache parsed CSV files. Check BarFeed.setCacheDir.
+DEFAULT_CACHE_DIR = os.environ.get("PYALGOTRADE_BAR_CACHE_DIR")
+
+
+# Returns True if the class of obj overrides any of the given methods of cls.
+def overrides_any(obj, cls, *methodNames):
+    # Unbound methods are built on every attribute access, so the underlying functions are compared instead.
+    return any(getattr(type(obj), name).__func__ is not getattr(cls, name).__func__ for name in methodNames)
+
+
+# Returns the module qualified name of the class of obj.
+def get_class_name(obj):
+    return "%s.%s" % (type(obj).__module__, type(obj).__name__)
 
 
 # Interface for csv row parsers.
@@ -38,12 +57,35 @@ class RowParser(object):
     def getDelimiter(self):
         raise NotImplementedError()
 
+    # Override to return True if parseBarColumns is implemented.
+    def supportsBulkParsing(self):
+        return False
+
+    # Parses a whole csv file, given as a dictionary that maps field names to column values, and returns a
+    # pyalgotrade.barfeed.columnar.BarColumns.
+    def parseBarColumns(self, columns):
+        raise NotImplementedError()
+
+    # Override to return a list of strings with the settings that affect parsing, to cache the parsed bars.
+    # Return None if the bars should not be cached.
+    def getCacheKey(self):
+        return None
+
+    # Called, instead of parsing, when the bars were loaded from the cache.
+    def onBarsFromCache(self, barColumns):
+        pass
+
 
 # Interface for bar filters.
 class BarFilter(object):
     def includeBar(self, bar_):
         raise NotImplementedError()
 
+    # Returns a boolean array with the bars to include from a pyalgotrade.barfeed.columnar.BarColumns.
+    # Override to avoid building every bar.
+    def includeBars(self, barColumns):
+        return np.array([self.includeBar(bar_) for bar_ in barColumns], dtype=bool)
+
 
 class DateRangeFilter(BarFilter):
     def __init__(self, fromDate=None, toDate=None):
@@ -57,6 +99,21 @@ class DateRangeFilter(BarFilter):
             return False
         return True
 
+    def includeBars(self, barColumns):
+        # Comparing naive and aware datetimes fails, just like includeBar does.
+        naiveBars = barColumns.getTimezone() is None
+        for dateTime in [self.__fromDate, self.__toDate]:
+            if dateTime and dt.datetime_is_naive(dateTime) != naiveBars:
+                return super(DateRangeFilter, self).includeBars(barColumns)
+
+        dateTimes = barColumns.getDateTimeColumn()
+        ret = np.ones(len(dateTimes), dtype=bool)
+        if self.__toDate:
+            ret &= dateTimes <= barColumns.toColumnDateTime(self.__toDate)
+        if self.__fromDate:
+            ret &= dateTimes >= barColumns.toColumnDateTime(self.__fromDate)
+        return ret
+
 
 # US Equities Regular Trading Hours filter
 # Monday ~ Friday
@@ -86,6 +143,9 @@ class USEquitiesRTH(DateRangeFilter):
                 return False
         return ret
 
+    def includeBars(self, barColumns):
+        return BarFilter.includeBars(self, barColumns)
+
 
 class BarFeed(membf.BarFeed):
     """Base class for CSV file based :class:`pyalgotrade.barfeed.BarFeed`.
@@ -99,6 +159,8 @@ class BarFeed(membf.BarFeed):
 
         self.__barFilter = None
         self.__dailyTime = datetime.time(0, 0, 0)
+        self.__useBulkLoader = False
+        self.__cacheDir = DEFAULT_CACHE_DIR
 
     def getDailyBarTime(self):
         return self.__dailyTime
@@ -112,16 +174,90 @@ class BarFeed(membf.BarFeed):
     def setBarFilter(self, barFilter):
         self.__barFilter = barFilter
 
-    def addBarsFromCSV(self, instrument, path, rowParser):
-        # Load the csv file
-        loadedBars = []
+    def getUseBulkLoader(self):
+        return self.__useBulkLoader
+
+    def setUseBulkLoader(self, useBulkLoader):
+        """Sets whether CSV files are loaded in bulk.
+
+        When enabled, files are parsed in one pass into typed columns instead of one row at a time, date range
+        filters are applied to the whole datetime column at once, and bars are only built as they get dispatched.
+
+        :param useBulkLoader: True to load CSV files in bulk.
+        :type useBulkLoader: boolean.
+
+        .. note::
+            Only parsers that support bulk parsing are affected. The rest keep parsing one row at a time.
+        """
+        self.__useBulkLoader = useBulkLoader
+
+    def getCacheDir(self):
+        return self.__cacheDir
+
+    def setCacheDir(self, cacheDir):
+        """Sets the directory used to cache the bars parsed from CSV files.
+
+        The first time a file is loaded, the parsed bars are stored in a binary column file. Afterwards, as long as the
+        CSV file and the parser settings don't change, the column file gets memory-mapped instead of parsing the CSV.
+
+        :param cacheDir: The cache directory, or None to disable caching.
+        :type cacheDir: string.
+
+        .. note::
+            The default value is taken from the **PYALGOTRADE_BAR_CACHE_DIR** environment variable, if set.
+        """
+        self.__cacheDir = cacheDir
+
+    def __parseBarColumns(self, path, rowParser):
+        columns = csvutils.read_columns(open(path, "r"), fieldnames=rowParser.getFieldNames(), delimiter=rowParser.getDelimiter())
+        return rowParser.parseBarColumns(columns)
+
+    def __parseBars(self, path, rowParser):
+        ret = []
         reader = csvutils.FastDictReader(open(path, "r"), fieldnames=rowParser.getFieldNames(), delimiter=rowParser.getDelimiter())
         for row in reader:
             bar_ = rowParser.parseBar(row)
-            if bar_ is not None and (self.__barFilter is None or self.__barFilter.includeBar(bar_)):
-                loadedBars.append(bar_)
+            if bar_ is not None:
+                ret.append(bar_)
+        return ret
 
-        self.addBarsFromSequence(instrument, loadedBars)
+    def addBarsFromCSV(self, instrument, path, rowParser):
+        cache = None
+        parserKey = None
+        if self.__cacheDir is not None:
+            cache = columnfile.Cache(self.__cacheDir)
+            parserKey = rowParser.getCacheKey()
+
+        # Load the bars from the cache or from the csv file.
+        bars = None
+        if parserKey is not None:
+            bars = cache.load(instrument, path, parserKey)
+            if bars is not None:
+                rowParser.onBarsFromCache(bars)
+        if bars is None:
+            if rowParser.supportsBulkParsing() and (self.__useBulkLoader or parserKey is not None):
+                bars = self.__parseBarColumns(path, rowParser)
+            else:
+                bars = self.__parseBars(path, rowParser)
+                # Bars can only be cached if they share the frequency, the timezone and the extra columns.
+                if parserKey is not None:
+                    barColumns = columnar.from_bars(bars)
+                    if barColumns is not None:
+                        bars = barColumns
+            if parserKey is not None and isinstance(bars, columnar.BarColumns):
+                bars = bars.sort()
+                cache.save(instrument, path, parserKey, bars)
+
+        # Filter the bars.
+        if self.__barFilter is not None:
+            if isinstance(bars, columnar.BarColumns):
+                mask = self.__barFilter.includeBars(bars)
+                if not mask.all():
+                    bars = bars.take(mask)
+            else:
+                bars = [bar_ for bar_ in bars if self.__barFilter.includeBar(bar_)]
+
+        self.addBarsFromSequence(instrument, bars)
 
 
 class GenericRowParser(RowParser):
@@ -140,6 +276,8 @@ class GenericRowParser(RowParser):
         self.__volumeColName = columnNames["volume"]
         self.__adjCloseColName = columnNames["adj_close"]
         self.__columnNames = columnNames
+        # The names of the extra columns are the same for every row, so they are calculated only once.
+        self.__extraColumnNames = None
 
     def _parseDate(self, dateString):
         ret = datetime.datetime.strptime(dateString, self.__dateTimeFormat)
@@ -176,15 +314,69 @@ class GenericRowParser(RowParser):
                 self.__haveAdjClose = True
 
         # Process extra columns.
-        extra = {}
-        for k, v in csvRowDict.iteritems():
-            if k not in self.__columnNames:
-                extra[k] = csvutils.float_or_string(v)
+        if self.__extraColumnNames is None:
+            knownColumnNames = self.__columnNames.values()
+            self.__extraColumnNames = [k for k in csvRowDict.iterkeys() if k not in knownColumnNames]
+        extra = None
+        if len(self.__extraColumnNames):
+            extra = {}
+            for k in self.__extraColumnNames:
+                extra[k] = csvutils.float_or_string(csvRowDict[k])
 
         return bar.BasicBar(
             dateTime, open_, high, low, close, volume, adjClose, self.__frequency, extra=extra
         )
 
+    def getCacheKey(self):
+        # The bars parsed by overridden methods depend on code that is not part of the key, so they are not cached.
+        if overrides_any(self, GenericRowParser, "parseBar", "_parseDate"):
+            return None
+        return [
+            get_class_name(self),
+            str(sorted(self.__columnNames.items())),
+            self.__dateTimeFormat,
+            str(self.__dailyBarTime),
+            str(self.__frequency),
+            str(self.__timezone),
+        ]
+
+    def onBarsFromCache(self, barColumns):
+        if barColumns.haveAdjClose():
+            self.__haveAdjClose = True
+
+    def supportsBulkParsing(self):
+        # Bulk parsing doesn't go through parseBar nor _parseDate, so subclasses that override them parse row by row.
+        return not overrides_any(self, GenericRowParser, "parseBar", "_parseDate")
+
+    def parseBarColumns(self, columns):
+        dateTimes = columnar.parse_datetimes(columns[self.__dateTimeColName], self.__dateTimeFormat)
+        if self.__dailyBarTime is not None:
+            dateTimes = columnar.set_time(dateTimes, self.__dailyBarTime)
+        adjClose = None
+        if self.__adjCloseColName is not None and self.__adjCloseColName in columns:
+            adjClose = columnar.parse_optional_floats(columns[self.__adjCloseColName])
+            if adjClose is not None:
+                self.__haveAdjClose = True
+
+        knownColumnNames = self.__columnNames.values()
+        extra = {}
+        for name, values in columns.iteritems():
+            if name not in knownColumnNames:
+                extra[name] = [csvutils.float_or_string(value) for value in values]
+
+        return columnar.BarColumns(
+            dateTimes,
+            columnar.parse_floats(columns[self.__openColName]),
+            columnar.parse_floats(columns[self.__highColName]),
+            columnar.parse_floats(columns[self.__lowColName]),
+            columnar.parse_floats(columns[self.__closeColName]),
+            columnar.parse_floats(columns[self.__volumeColName]),
+            adjClose,
+            self.__frequency,
+            self.__timezone,
+            extra
+        )
+
 
 class GenericBarFeed(BarFeed):
     """A BarFeed that loads bars from CSV files that have the following format:
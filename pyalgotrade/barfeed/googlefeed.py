@@ -79,6 +79,12 @@ class RowParser(csvfeed.RowParser):
     def getDelimiter(self):
         return ","
 
+    def getCacheKey(self):
+        # The bars parsed by an overridden parseBar depend on code that is not part of the key, so they are not cached.
+        if csvfeed.overrides_any(self, RowParser, "parseBar"):
+            return None
+        return [csvfeed.get_class_name(self), str(self.__dailyBarTime), str(self.__frequency), str(self.__timezone), str(self.__sanitize)]
+
     def parseBar(self, csvRowDict):
         dateTime = self.__parseDate(csvRowDict["Date"])
         close = float(csvRowDict["Close"])
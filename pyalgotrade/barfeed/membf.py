@@ -18,9 +18,11 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import heapq
+
 from pyalgotrade import barfeed
+from pyalgotrade.barfeed import columnar
 from pyalgotrade import bar
-from pyalgotrade import utils
 
 
 # A non real-time BarFeed responsible for:
@@ -36,6 +38,8 @@ class BarFeed(barfeed.BaseBarFeed):
 
         self.__bars = {}
         self.__nextPos = {}
+        # A heap with the datetime of the next bar for each instrument that has bars left. Built on demand.
+        self.__heap = None
         self.__started = False
         self.__currDateTime = None
 
@@ -43,6 +47,7 @@ class BarFeed(barfeed.BaseBarFeed):
         self.__nextPos = {}
         for instrument in self.__bars.keys():
             self.__nextPos.setdefault(instrument, 0)
+        self.__heap = None
         self.__currDateTime = None
         super(BarFeed, self).reset()
 
@@ -63,33 +68,88 @@ class BarFeed(barfeed.BaseBarFeed):
         if self.__started:
             raise Exception("Can't add more bars once you started consuming bars")
 
-        self.__bars.setdefault(instrument, [])
-        self.__nextPos.setdefault(instrument, 0)
+        self.__addBars(instrument, bars)
+        self.__heap = None
+        self.registerInstrument(instrument)
 
-        # Add and sort the bars
-        self.__bars[instrument].extend(bars)
-        barCmp = lambda x, y: cmp(x.getDateTime(), y.getDateTime())
-        self.__bars[instrument].sort(barCmp)
+    def addBarsFromSequences(self, barsByInstrument):
+        """Adds bars for many instruments at once.
 
-        self.registerInstrument(instrument)
+        :param barsByInstrument: A dictionary that maps instrument identifiers to sequences of bars.
+        :type barsByInstrument: dict.
+        """
+
+        if self.__started:
+            raise Exception("Can't add more bars once you started consuming bars")
+
+        for instrument, bars in barsByInstrument.iteritems():
+            self.__addBars(instrument, bars)
+            self.registerInstrument(instrument)
+        self.__heap = None
+
+    def getBars(self, instrument):
+        """Returns the bars loaded for the given instrument, sorted by datetime, or None if the instrument has no bars.
+        Useful to calculate indicators up front, check :mod:`pyalgotrade.technical.batch`."""
+        return self.__bars.get(instrument)
+
+    def __addBars(self, instrument, bars):
+        self.__nextPos.setdefault(instrument, 0)
+        currentBars = self.__bars.get(instrument)
+
+        if isinstance(bars, columnar.BarColumns):
+            # Bars loaded in bulk are kept in columns and built as they get dispatched.
+            bars = bars.sort()
+            if currentBars is None or len(currentBars) == 0:
+                self.__bars[instrument] = bars
+                return
+            elif isinstance(currentBars, columnar.BarColumns) and currentBars.isCompatible(bars):
+                self.__bars[instrument] = currentBars.merge(bars)
+                return
+
+        if currentBars is None:
+            currentBars = []
+        elif isinstance(currentBars, columnar.BarColumns):
+            currentBars = list(currentBars)
+        self.__bars[instrument] = currentBars
+        self.__mergeBars(currentBars, bars)
+
+    def __mergeBars(self, currentBars, bars):
+        bars = list(bars)
+        if len(bars) == 0:
+            return
+
+        # Sort the new bars unless they're already sorted, which is the usual case.
+        dateTimes = [bar_.getDateTime() for bar_ in bars]
+        if any(dateTimes[i] > dateTimes[i+1] for i in xrange(len(dateTimes) - 1)):
+            order = sorted(xrange(len(bars)), key=dateTimes.__getitem__)
+            bars = [bars[i] for i in order]
+            dateTimes = [dateTimes[i] for i in order]
+
+        needsMerge = len(currentBars) > 0 and currentBars[-1].getDateTime() > dateTimes[0]
+        currentBars.extend(bars)
+        if needsMerge:
+            # list.sort merges the two sorted runs in linear time.
+            currentBars.sort(key=lambda bar_: bar_.getDateTime())
+
+    def __getHeap(self):
+        if self.__heap is None:
+            self.__heap = []
+            for instrument, bars in self.__bars.iteritems():
+                nextPos = self.__nextPos[instrument]
+                if nextPos < len(bars):
+                    self.__heap.append((bars[nextPos].getDateTime(), instrument))
+            heapq.heapify(self.__heap)
+        return self.__heap
 
     def eof(self):
-        ret = True
         # Check if there is at least one more bar to return.
-        for instrument, bars in self.__bars.iteritems():
-            nextPos = self.__nextPos[instrument]
-            if nextPos < len(bars):
-                ret = False
-                break
-        return ret
+        return len(self.__getHeap()) == 0
 
     def peekDateTime(self):
         ret = None
-
-        for instrument, bars in self.__bars.iteritems():
-            nextPos = self.__nextPos[instrument]
-            if nextPos < len(bars):
-                ret = utils.safe_min(ret, bars[nextPos].getDateTime())
+        heap = self.__getHeap()
+        if len(heap):
+            ret = heap[0][0]
         return ret
 
     def getNextBars(self):
@@ -99,13 +159,20 @@ class BarFeed(barfeed.BaseBarFeed):
         if smallestDateTime is None:
             return None
 
-        # Make a second pass to get all the bars that had the smallest datetime.
+        # Pop all the instruments that have a bar with the smallest datetime.
         ret = {}
-        for instrument, bars in self.__bars.iteritems():
-            nextPos = self.__nextPos[instrument]
-            if nextPos < len(bars) and bars[nextPos].getDateTime() == smallestDateTime:
-                ret[instrument] = bars[nextPos]
-                self.__nextPos[instrument] += 1
+        heap = self.__getHeap()
+        while len(heap) and heap[0][0] == smallestDateTime:
+            instrument = heapq.heappop(heap)[1]
+            ret[instrument] = self.__bars[instrument][self.__nextPos[instrument]]
+
+        # And push them back with the datetime of their next bar.
+        for instrument in ret.iterkeys():
+            bars = self.__bars[instrument]
+            nextPos = self.__nextPos[instrument] + 1
+            self.__nextPos[instrument] = nextPos
+            if nextPos < len(bars):
+                heapq.heappush(heap, (bars[nextPos].getDateTime(), instrument))
 
         if self.__currDateTime == smallestDateTime:
             raise Exception("Duplicate bars found for %s on %s" % (ret.keys(), smallestDateTime))
@@ -0,0 +1,193 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2015 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import heapq
+
+from pyalgotrade import barfeed
+from pyalgotrade import bar
+from pyalgotrade.barfeed import columnfile
+
+
+DEFAULT_CHUNK_SIZE = 1024
+
+
+# Iterates over the bars in a column file, reading chunkSize rows at a time.
+class Cursor(object):
+    def __init__(self, columnFile, chunkSize):
+        self.__columnFile = columnFile
+        self.__chunkSize = chunkSize
+        self.reset()
+
+    def reset(self):
+        self.__pos = -1
+        self.__chunkBegin = 0
+        self.__chunk = None
+        self.__bar = None
+        self.advance()
+
+    def eof(self):
+        return self.__bar is None
+
+    def getBar(self):
+        return self.__bar
+
+    def advance(self):
+        self.__pos += 1
+        self.__bar = None
+        if self.__pos < len(self.__columnFile):
+            chunkPos = self.__pos - self.__chunkBegin
+            if self.__chunk is None or chunkPos >= len(self.__chunk):
+                # Copy the rows so the file doesn't stay mapped.
+                self.__chunk = self.__columnFile.read(self.__pos, self.__pos + self.__chunkSize, copy=True)
+                self.__chunkBegin = self.__pos
+                chunkPos = 0
+            self.__bar = self.__chunk[chunkPos]
+
+
+class Feed(barfeed.BaseBarFeed):
+    """A :class:`pyalgotrade.barfeed.BaseBarFeed` that streams bars from column files, one file per instrument.
+    Only a small chunk of bars per instrument is held in memory, so it can be used to backtest over more data than
+    what fits in memory.
+
+    :param frequency: The frequency of the bars. Check :class:`pyalgotrade.bar.Frequency`.
+    :param maxLen: The maximum number of values that the :class:`pyalgotrade.dataseries.bards.BarDataSeries` will hold.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
+        opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+    :param chunkSize: The number of bars to read at once for each instrument.
+    :type chunkSize: int.
+
+    .. note::
+        * Column files can be written with :func:`pyalgotrade.barfeed.columnfile.write`.
+        * Bars in each file must be sorted by datetime.
+        * Extra columns, if any, are not streamed. They are loaded in memory the first time they're needed.
+    """
+
+    def __init__(self, frequency, maxLen=None, chunkSize=DEFAULT_CHUNK_SIZE):
+        super(Feed, self).__init__(frequency, maxLen)
+
+        self.__chunkSize = chunkSize
+        self.__columnFiles = {}
+        self.__cursors = {}
+        self.__heap = None
+        self.__currDateTime = None
+        self.__started = False
+
+    def reset(self):
+        for cursor in self.__cursors.values():
+            cursor.reset()
+        self.__heap = None
+        self.__currDateTime = None
+        super(Feed, self).reset()
+
+    def getCurrentDateTime(self):
+        return self.__currDateTime
+
+    def barsHaveAdjClose(self):
+        return len(self.__columnFiles) > 0 and all(columnFile.haveAdjClose() for columnFile in self.__columnFiles.values())
+
+    def start(self):
+        super(Feed, self).start()
+        self.__started = True
+
+    def stop(self):
+        pass
+
+    def join(self):
+        pass
+
+    def addBarsFromFile(self, instrument, path):
+        """Adds the bars for a given instrument from a column file.
+        The instrument gets registered in the bar feed.
+
+        :param instrument: Instrument identifier.
+        :type instrument: string.
+        :param path: The path to the column file.
+        :type path: string.
+        """
+
+        if self.__started:
+            raise Exception("Can't add more bars once you started consuming bars")
+        if instrument in self.__columnFiles:
+            raise Exception("Bars for %s were already added" % (instrument))
+
+        columnFile = columnfile.ColumnFile(path)
+        # Check that the bars are sorted, one chunk at a time.
+        prevDateTime = None
+        for begin in xrange(0, len(columnFile), self.__chunkSize):
+            dateTimes = columnFile.read(begin, begin + self.__chunkSize).getDateTimeColumn()
+            if (prevDateTime is not None and dateTimes[0] < prevDateTime) or (dateTimes[1:] < dateTimes[:-1]).any():
+                raise Exception("Bars in %s are not sorted" % (path))
+            prevDateTime = dateTimes[-1]
+
+        self.__columnFiles[instrument] = columnFile
+        self.__cursors[instrument] = Cursor(columnFile, self.__chunkSize)
+        self.__heap = None
+        self.registerInstrument(instrument)
+
+    def __getHeap(self):
+        # A heap with the datetime of the next bar for each instrument that is not at eof.
+        if self.__heap is None:
+            self.__heap = []
+            for instrument, cursor in self.__cursors.iteritems():
+                if not cursor.eof():
+                    self.__heap.append((cursor.getBar().getDateTime(), instrument))
+            heapq.heapify(self.__heap)
+        return self.__heap
+
+    def eof(self):
+        return len(self.__getHeap()) == 0
+
+    def peekDateTime(self):
+        ret = None
+        heap = self.__getHeap()
+        if len(heap):
+            ret = heap[0][0]
+        return ret
+
+    def getNextBars(self):
+        # All bars must have the same datetime. We will return all the ones with the smallest datetime.
+        smallestDateTime = self.peekDateTime()
+
+        if smallestDateTime is None:
+            return None
+
+        ret = {}
+        heap = self.__getHeap()
+        while len(heap) and heap[0][0] == smallestDateTime:
+            instrument = heapq.heappop(heap)[1]
+            ret[instrument] = self.__cursors[instrument].getBar()
+
+        # Schedule the next bar for the instruments that were returned.
+        for instrument in ret.iterkeys():
+            cursor = self.__cursors[instrument]
+            cursor.advance()
+            if not cursor.eof():
+                heapq.heappush(heap, (cursor.getBar().getDateTime(), instrument))
+
+        if self.__currDateTime == smallestDateTime:
+            raise Exception("Duplicate bars found for %s on %s" % (ret.keys(), smallestDateTime))
+
+        self.__currDateTime = smallestDateTime
+        return bar.Bars(ret)
+
+    def loadAll(self):
+        for dateTime, bars in self:
+            pass
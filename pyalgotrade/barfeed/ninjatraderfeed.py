@@ -90,6 +90,12 @@ class RowParser(csvfeed.RowParser):
     def getDelimiter(self):
         return ";"
 
+    def getCacheKey(self):
+        # The bars parsed by an overridden parseBar depend on code that is not part of the key, so they are not cached.
+        if csvfeed.overrides_any(self, RowParser, "parseBar"):
+            return None
+        return [csvfeed.get_class_name(self), str(self.__frequency), str(self.__dailyBarTime), str(self.__timezone)]
+
     def parseBar(self, csvRowDict):
         dateTime = self.__parseDateTime(csvRowDict["Date Time"])
         close = float(csvRowDict["Close"])
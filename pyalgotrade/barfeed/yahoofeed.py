@@ -20,6 +20,7 @@
 
 from pyalgotrade.barfeed import csvfeed
 from pyalgotrade.barfeed import common
+from pyalgotrade.barfeed import columnar
 from pyalgotrade.utils import dt
 from pyalgotrade import bar
 
@@ -70,6 +71,12 @@ class RowParser(csvfeed.RowParser):
     def getDelimiter(self):
         return ","
 
+    def getCacheKey(self):
+        # The bars parsed by an overridden parseBar depend on code that is not part of the key, so they are not cached.
+        if csvfeed.overrides_any(self, RowParser, "parseBar"):
+            return None
+        return [csvfeed.get_class_name(self), str(self.__dailyBarTime), str(self.__frequency), str(self.__timezone), str(self.__sanitize)]
+
     def parseBar(self, csvRowDict):
         dateTime = self.__parseDate(csvRowDict["Date"])
         close = float(csvRowDict["Close"])
@@ -84,6 +91,26 @@ class RowParser(csvfeed.RowParser):
 
         return bar.BasicBar(dateTime, open_, high, low, close, volume, adjClose, self.__frequency)
 
+    def supportsBulkParsing(self):
+        # Bulk parsing doesn't go through parseBar, so subclasses that override it parse row by row.
+        return not csvfeed.overrides_any(self, RowParser, "parseBar")
+
+    def parseBarColumns(self, columns):
+        dateTimes = columnar.parse_datetimes(columns["Date"], "%Y-%m-%d")
+        if self.__dailyBarTime is not None:
+            dateTimes = columnar.set_time(dateTimes, self.__dailyBarTime)
+        close = columnar.parse_floats(columns["Close"])
+        open_ = columnar.parse_floats(columns["Open"])
+        high = columnar.parse_floats(columns["High"])
+        low = columnar.parse_floats(columns["Low"])
+        volume = columnar.parse_floats(columns["Volume"])
+        adjClose = columnar.parse_floats(columns["Adj Close"])
+
+        if self.__sanitize:
+            open_, high, low, close = columnar.sanitize_ohlc(open_, high, low, close)
+
+        return columnar.BarColumns(dateTimes, open_, high, low, close, volume, adjClose, self.__frequency, self.__timezone)
+
 
 class Feed(csvfeed.BarFeed):
     """A :class:`pyalgotrade.barfeed.csvfeed.BarFeed` that loads bars from CSV files downloaded from Yahoo! Finance.
@@ -71,7 +71,11 @@ class DataSeries(object):
 
     @abc.abstractmethod
     def getDateTimes(self):
-        """Returns a list of :class:`datetime.datetime` associated with each value."""
+        """Returns a sequence of :class:`datetime.datetime` associated with each value.
+
+        .. note::
+            The sequence may be a read-only view instead of a list. Use list() to get a list.
+        """
         raise NotImplementedError()
 
 
@@ -18,7 +18,13 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import numpy as np
+
 from pyalgotrade import dataseries
+from pyalgotrade import observer
+from pyalgotrade import bar
+from pyalgotrade.utils import collections
+from pyalgotrade.utils import dt
 
 
 class BarDataSeries(dataseries.SequenceDataSeries):
@@ -108,3 +114,184 @@ class BarDataSeries(dataseries.SequenceDataSeries):
         """Returns a :class:`pyalgotrade.dataseries.DataSeries` for an extra column."""
         return self.__getOrCreateExtraDS(name)
 
+
+
+class ColumnDataSeries(dataseries.DataSeries):
+    """A read-only :class:`pyalgotrade.dataseries.DataSeries` that is a view over one of the columns in a
+    :class:`ColumnarBarDataSeries`. Missing values are stored as NaN and returned as None.
+
+    .. note::
+        This class should not be instantiated directly.
+    """
+
+    def __init__(self, barDataSeries, values):
+        super(ColumnDataSeries, self).__init__()
+        self.__barDataSeries = barDataSeries
+        self.__values = values
+        self.__newValueEvent = observer.Event()
+
+    def __len__(self):
+        return len(self.__values)
+
+    def getMaxLen(self):
+        return self.__values.getMaxLen()
+
+    def getNewValueEvent(self):
+        return self.__newValueEvent
+
+    def getValueAbsolute(self, pos):
+        ret = None
+        if pos >= 0 and pos < len(self.__values):
+            ret = float(self.__values[pos])
+            if ret != ret:
+                ret = None
+        return ret
+
+    def getDateTimes(self):
+        return self.__barDataSeries.getDateTimes()
+
+    def getNumPyArray(self):
+        """Returns a numpy.array with the values. This is a view, not a copy, so it should not be modified."""
+        return self.__values.data()
+
+
+class ColumnarBarDataSeries(BarDataSeries):
+    """A :class:`BarDataSeries` that holds open, high, low, close, volume and adjusted close values in typed NumPy
+    arrays that share a single datetime index, instead of holding :class:`pyalgotrade.bar.Bar` instances and a separate
+    :class:`pyalgotrade.dataseries.SequenceDataSeries` for each field.
+    Bars are rebuilt when accessed.
+
+    :param maxLen: The maximum number of values to hold.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
+        opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+
+    .. note::
+        * Datetimes are stored as microseconds since the epoch. All bars are expected to be in the same timezone.
+        * Field dataseries values are updated before the new bar event is emitted.
+    """
+
+    def __init__(self, maxLen=None):
+        super(ColumnarBarDataSeries, self).__init__(maxLen)
+        maxLen = dataseries.get_checked_max_len(maxLen)
+
+        self.__dateTimes = collections.NumPyDeque(maxLen, np.int64)
+        self.__open = collections.NumPyDeque(maxLen)
+        self.__high = collections.NumPyDeque(maxLen)
+        self.__low = collections.NumPyDeque(maxLen)
+        self.__close = collections.NumPyDeque(maxLen)
+        self.__volume = collections.NumPyDeque(maxLen)
+        self.__adjClose = collections.NumPyDeque(maxLen)
+        self.__extra = collections.ListDeque(maxLen)
+        self.__timeZone = None
+        self.__frequency = None
+        self.__useAdjustedValues = False
+
+        self.__openDS = ColumnDataSeries(self, self.__open)
+        self.__closeDS = ColumnDataSeries(self, self.__close)
+        self.__highDS = ColumnDataSeries(self, self.__high)
+        self.__lowDS = ColumnDataSeries(self, self.__low)
+        self.__volumeDS = ColumnDataSeries(self, self.__volume)
+        self.__adjCloseDS = ColumnDataSeries(self, self.__adjClose)
+
+    def __len__(self):
+        return len(self.__dateTimes)
+
+    def __getitem__(self, key):
+        return dataseries.DataSeries.__getitem__(self, key)
+
+    def setMaxLen(self, maxLen):
+        for values in (
+            self.__dateTimes, self.__open, self.__high, self.__low, self.__close, self.__volume, self.__adjClose,
+            self.__extra
+        ):
+            values.resize(maxLen)
+
+    def getMaxLen(self):
+        return self.__dateTimes.getMaxLen()
+
+    def setUseAdjustedValues(self, useAdjusted):
+        super(ColumnarBarDataSeries, self).setUseAdjustedValues(useAdjusted)
+        self.__useAdjustedValues = useAdjusted
+
+    def getValueAbsolute(self, pos):
+        ret = None
+        if pos >= 0 and pos < len(self.__dateTimes):
+            ret = bar.BasicBar(
+                dt.microseconds_to_datetime(self.__dateTimes[pos], self.__timeZone),
+                self.__openDS.getValueAbsolute(pos),
+                self.__highDS.getValueAbsolute(pos),
+                self.__lowDS.getValueAbsolute(pos),
+                self.__closeDS.getValueAbsolute(pos),
+                self.__volumeDS.getValueAbsolute(pos),
+                self.__adjCloseDS.getValueAbsolute(pos),
+                self.__frequency,
+                extra=self.__extra[pos]
+            )
+            ret.setUseAdjustedValue(self.__useAdjustedValues)
+        return ret
+
+    def appendWithDateTime(self, dateTime, bar):
+        assert(dateTime is not None)
+        assert(bar is not None)
+        bar.setUseAdjustedValue(self.__useAdjustedValues)
+
+        timestamp = dt.datetime_to_microseconds(dateTime)
+        if len(self.__dateTimes) != 0 and self.__dateTimes[-1] >= timestamp:
+            raise Exception("Invalid datetime. It must be bigger than that last one")
+
+        if len(self.__dateTimes) == 0:
+            self.__timeZone = dateTime.tzinfo
+            self.__frequency = bar.getFrequency()
+
+        adjClose = bar.getAdjClose()
+        if adjClose is None:
+            adjClose = np.nan
+        self.__dateTimes.append(timestamp)
+        self.__open.append(bar.getOpen())
+        self.__high.append(bar.getHigh())
+        self.__low.append(bar.getLow())
+        self.__close.append(bar.getClose())
+        self.__volume.append(bar.getVolume())
+        self.__adjClose.append(adjClose)
+        # Most bars don't have extra columns, so None is stored instead of an empty dict.
+        self.__extra.append(bar.getExtraColumns() or None)
+
+        self.getNewValueEvent().emit(self, dateTime, bar)
+        self.__openDS.getNewValueEvent().emit(self.__openDS, dateTime, bar.getOpen())
+        self.__closeDS.getNewValueEvent().emit(self.__closeDS, dateTime, bar.getClose())
+        self.__highDS.getNewValueEvent().emit(self.__highDS, dateTime, bar.getHigh())
+        self.__lowDS.getNewValueEvent().emit(self.__lowDS, dateTime, bar.getLow())
+        self.__volumeDS.getNewValueEvent().emit(self.__volumeDS, dateTime, bar.getVolume())
+        self.__adjCloseDS.getNewValueEvent().emit(self.__adjCloseDS, dateTime, bar.getAdjClose())
+
+        # Process extra columns.
+        for name, value in bar.getExtraColumns().iteritems():
+            self.getExtraDataSeries(name).appendWithDateTime(dateTime, value)
+
+    def getDateTimes(self):
+        return [dt.microseconds_to_datetime(timestamp, self.__timeZone) for timestamp in self.__dateTimes.data()]
+
+    def getOpenDataSeries(self):
+        return self.__openDS
+
+    def getCloseDataSeries(self):
+        return self.__closeDS
+
+    def getHighDataSeries(self):
+        return self.__highDS
+
+    def getLowDataSeries(self):
+        return self.__lowDS
+
+    def getVolumeDataSeries(self):
+        return self.__volumeDS
+
+    def getAdjCloseDataSeries(self):
+        return self.__adjCloseDS
+
+    def getPriceDataSeries(self):
+        if self.__useAdjustedValues:
+            return self.__adjCloseDS
+        else:
+            return self.__closeDS
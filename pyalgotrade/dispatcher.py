@@ -18,20 +18,100 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import heapq
+
 from pyalgotrade import utils
 from pyalgotrade import observer
 from pyalgotrade import dispatchprio
 
 
+# Keeps track of non-realtime subjects in a heap keyed by (next datetime, dispatch rank) and of realtime subjects in a
+# list sorted by dispatch rank.
+# This assumes that the next datetime for a non-realtime subject only changes when that subject dispatches events, and
+# that once a non-realtime subject hits eof it won't generate more events.
+class PriorityQueueScheduler(object):
+    def __init__(self):
+        self.__heap = []
+        self.__realtime = []
+        self.__pending = []
+        # Non-realtime subjects that had no datetime to peek after dispatching events.
+        self.__waiting = []
+
+    def add(self, rank, subject):
+        # Subjects are classified the next time events are dispatched.
+        self.__pending.append((rank, subject))
+
+    def __classifyPending(self):
+        for rank, subject in self.__pending:
+            dateTime = subject.peekDateTime()
+            if dateTime is not None:
+                heapq.heappush(self.__heap, (dateTime, rank, subject))
+            else:
+                # Subjects at eof with no datetime to peek are classified as realtime too, since realtime subjects may
+                # start at eof and get values as other subjects dispatch, like resampled feeds do.
+                self.__realtime.append((rank, subject))
+        self.__realtime.sort()
+        self.__pending = []
+
+    # Returns a tuple with:
+    # 1: True if all subjects hit eof.
+    # 2: The lowest datetime, or None if there are only realtime subjects.
+    # 3: A list with (rank, subject, realtime) tuples sorted by rank.
+    def getNext(self):
+        if len(self.__pending):
+            self.__classifyPending()
+
+        # Non-realtime subjects that still have no datetime get dispatched like realtime ones and rescheduled again.
+        ret = []
+        if len(self.__waiting):
+            waiting = self.__waiting
+            self.__waiting = []
+            for rank, subject in waiting:
+                if not subject.eof():
+                    dateTime = subject.peekDateTime()
+                    if dateTime is None:
+                        ret.append((rank, subject, False))
+                    else:
+                        heapq.heappush(self.__heap, (dateTime, rank, subject))
+
+        smallestDateTime = None
+        if len(self.__heap):
+            smallestDateTime = self.__heap[0][0]
+            while len(self.__heap) and self.__heap[0][0] == smallestDateTime:
+                dateTime, rank, subject = heapq.heappop(self.__heap)
+                ret.append((rank, subject, False))
+
+        eof = len(ret) == 0
+        for rank, subject in self.__realtime:
+            if not subject.eof():
+                eof = False
+            ret.append((rank, subject, True))
+
+        if len(ret) > len(self.__realtime):
+            ret.sort()
+        return eof, smallestDateTime, ret
+
+    # Re-key a non-realtime subject that was returned by getNext. Subjects that hit eof are dropped.
+    def reschedule(self, rank, subject):
+        if not subject.eof():
+            dateTime = subject.peekDateTime()
+            if dateTime is None:
+                self.__waiting.append((rank, subject))
+            else:
+                heapq.heappush(self.__heap, (dateTime, rank, subject))
+
+
 # This class is responsible for dispatching events from multiple subjects, synchronizing them if necessary.
 class Dispatcher(object):
     def __init__(self):
         self.__subjects = []
+        self.__ranks = {}
         self.__stop = False
         self.__startEvent = observer.Event()
         self.__idleEvent = observer.Event()
         self.__currDateTime = None
         self.__gotError = False
+        self.__scheduler = None
 
     # Returns the current event datetime. It may be None for events from realtime subjects.
     def getCurrentDateTime(self):
@@ -46,14 +126,47 @@ class Dispatcher(object):
     def stop(self):
         self.__stop = True
 
+    def isStopped(self):
+        return self.__stop
+
     def getSubjects(self):
         return self.__subjects
 
+    def setUsePriorityQueue(self, usePriorityQueue):
+        """Sets the scheduling mode.
+
+        :param usePriorityQueue: True to keep non-realtime subjects in a priority queue keyed by their next datetime
+            so that only subjects that dispatched events get re-scanned on each step. False to scan every subject on
+            each step.
+        :type usePriorityQueue: boolean.
+
+        .. note::
+            The priority queue mode assumes that the datetime returned by peekDateTime only changes when the subject
+            dispatches events.
+        """
+        if usePriorityQueue and self.__scheduler is None:
+            self.__scheduler = PriorityQueueScheduler()
+            for subject in self.__subjects:
+                self.__scheduler.add(self.__ranks[subject], subject)
+        elif not usePriorityQueue:
+            self.__scheduler = None
+
+    def getUsePriorityQueue(self):
+        return self.__scheduler is not None
+
     def addSubject(self, subject):
         # Skip the subject if it was already added.
         if subject in self.__subjects:
             return
 
+        # Subjects are sorted by priority first, and then by the order in which they were added.
+        if subject.getDispatchPriority() is dispatchprio.LAST:
+            self.__ranks[subject] = (1, 0, len(self.__ranks))
+        else:
+            self.__ranks[subject] = (0, subject.getDispatchPriority(), len(self.__ranks))
+        if self.__scheduler is not None:
+            self.__scheduler.add(self.__ranks[subject], subject)
+
         # If the subject has no specific dispatch priority put it right at the end.
         if subject.getDispatchPriority() is dispatchprio.LAST:
             self.__subjects.append(subject)
@@ -99,6 +212,21 @@ class Dispatcher(object):
                     eventsDispatched = True
         return eof, eventsDispatched
 
+    # Same as __dispatch but using the priority queue to find the subjects with the lowest datetime.
+    def __dispatchWithScheduler(self):
+        eventsDispatched = False
+        eof, smallestDateTime, subjects = self.__scheduler.getNext()
+
+        if not eof:
+            self.__currDateTime = smallestDateTime
+
+            for rank, subject, realtime in subjects:
+                if self.__dispatchSubject(subject, smallestDateTime):
+                    eventsDispatched = True
+                if not realtime:
+                    self.__scheduler.reschedule(rank, subject)
+        return eof, eventsDispatched
+
     def run(self):
         try:
             for subject in self.__subjects:
@@ -107,7 +235,10 @@ class Dispatcher(object):
             self.__startEvent.emit()
 
             while not self.__stop:
-                eof, eventsDispatched = self.__dispatch()
+                if self.__scheduler is not None:
+                    eof, eventsDispatched = self.__dispatchWithScheduler()
+                else:
+                    eof, eventsDispatched = self.__dispatch()
                 if eof:
                     self.__stop = True
                 elif not eventsDispatched:
@@ -0,0 +1,181 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2015 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import SocketServer
+import socket
+import struct
+import threading
+import zlib
+import cPickle
+
+
+######################################################################
+## Binary RPC
+# Requests and responses are pickled and sent as frames over a persistent TCP connection. Each frame is:
+#
+# - A flags byte. Bit 0 is set if the payload is compressed with zlib.
+# - The payload length as a little endian uint32.
+# - The payload.
+#
+# A request payload is a (function name, arguments) tuple. A response payload is a (True, result) tuple, or a
+# (False, error message) tuple if the function raised an exception.
+#
+# Payloads are unpickled as they are received, so, as with the XML-RPC transport, only connect to trusted peers.
+
+# zlib compression level for outgoing frames. 0 disables compression.
+COMPRESSION_LEVEL = 1
+# Frames smaller than this, in bytes, are not compressed.
+COMPRESSION_THRESHOLD = 1024
+
+FLAG_COMPRESSED = 1
+
+_header = struct.Struct("<BI")
+
+
+def send_frame(sock, obj):
+    payload = cPickle.dumps(obj, cPickle.HIGHEST_PROTOCOL)
+    flags = 0
+    if COMPRESSION_LEVEL > 0 and len(payload) >= COMPRESSION_THRESHOLD:
+        payload = zlib.compress(payload, COMPRESSION_LEVEL)
+        flags |= FLAG_COMPRESSED
+    sock.sendall(_header.pack(flags, len(payload)) + payload)
+
+
+def _recv_exactly(sock, size):
+    chunks = []
+    while size > 0:
+        chunk = sock.recv(min(size, 1024 * 1024))
+        if chunk == "":
+            raise socket.error("Connection closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return "".join(chunks)
+
+
+def recv_frame(sock):
+    flags, size = _header.unpack(_recv_exactly(sock, _header.size))
+    payload = _recv_exactly(sock, size)
+    if flags & FLAG_COMPRESSED:
+        payload = zlib.decompress(payload)
+    return cPickle.loads(payload)
+
+
+class RequestHandler(SocketServer.BaseRequestHandler):
+    def setup(self):
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.server.addConnection(self.request)
+
+    def handle(self):
+        try:
+            while True:
+                functionName, args = recv_frame(self.request)
+                send_frame(self.request, self.server.dispatch(functionName, args))
+        except socket.error:
+            # The connection was closed.
+            pass
+
+    def finish(self):
+        self.server.removeConnection(self.request)
+
+
+class Server(SocketServer.ThreadingMixIn, SocketServer.TCPServer):
+    """A server that handles binary RPC calls. Each client connection is served by its own thread, so registered
+    functions must be thread safe.
+
+    :param address: The address to listen for incoming connections.
+    :type address: string.
+    :param port: The port to listen for incoming connections.
+    :type port: int.
+    """
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, address, port):
+        SocketServer.TCPServer.__init__(self, (address, port), RequestHandler)
+        self.__functions = {}
+        self.__connections = set()
+        self.__connectionsLock = threading.Lock()
+
+    def register_function(self, function, name):
+        self.__functions[name] = function
+
+    def addConnection(self, connection):
+        with self.__connectionsLock:
+            self.__connections.add(connection)
+
+    def removeConnection(self, connection):
+        with self.__connectionsLock:
+            self.__connections.discard(connection)
+
+    def shutdown(self):
+        """Stops serving requests and closes the client connections."""
+
+        SocketServer.TCPServer.shutdown(self)
+        with self.__connectionsLock:
+            for connection in self.__connections:
+                try:
+                    connection.shutdown(socket.SHUT_RDWR)
+                except socket.error:
+                    pass
+
+    def dispatch(self, functionName, args):
+        try:
+            return (True, self.__functions[functionName](*args))
+        except Exception, e:
+            return (False, "%s: %s" % (type(e).__name__, e))
+
+
+# Calls functions in a Server. Function calls are forwarded as in xmlrpclib.ServerProxy.
+class ServerProxy(object):
+    def __init__(self, address, port):
+        self.__address = (address, port)
+        self.__socket = None
+        self.__lock = threading.Lock()
+
+    def __connect(self):
+        if self.__socket is None:
+            self.__socket = socket.create_connection(self.__address)
+            self.__socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return self.__socket
+
+    def close(self):
+        if self.__socket is not None:
+            self.__socket.close()
+            self.__socket = None
+
+    def call(self, functionName, *args):
+        with self.__lock:
+            try:
+                sock = self.__connect()
+                send_frame(sock, (functionName, args))
+                ok, result = recv_frame(sock)
+            except socket.error:
+                # Reconnect on the next call.
+                self.close()
+                raise
+        if not ok:
+            raise Exception("Error calling %s: %s" % (functionName, result))
+        return result
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return lambda *args: self.call(name, *args)
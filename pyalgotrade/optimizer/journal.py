@@ -0,0 +1,87 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2015 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import sqlite3
+import cPickle
+
+
+# Returns a value that identifies a set of parameters. Parameters are compared by value if they are hashable.
+def get_key(parameters):
+    try:
+        hash(parameters)
+        return parameters
+    except TypeError:
+        return cPickle.dumps(parameters, cPickle.HIGHEST_PROTOCOL)
+
+
+class Journal(object):
+    """Records the results of an optimization in a SQLite database, so that it can be resumed if the server stops.
+
+    :param dbFilePath: The path to the database file. It gets created if it doesn't exist.
+    :type dbFilePath: string.
+
+    .. note::
+        Parameters and results are pickled.
+    """
+
+    def __init__(self, dbFilePath):
+        # The optimizer server may add results from different threads. Calls are serialized by the server.
+        self.__connection = sqlite3.connect(dbFilePath, check_same_thread=False)
+        self.__connection.execute(
+            "create table if not exists journal ("
+            "journal_id integer primary key autoincrement"
+            ", parameters blob not null"
+            ", result blob not null"
+            ", worker_name text"
+            ", pruned integer not null default 0)")
+
+    def addResults(self, results, workerName):
+        """Records a batch of results. Changes are committed before returning.
+
+        :param results: The results.
+        :type results: A list of :class:`pyalgotrade.optimizer.server.Results`.
+        :param workerName: The name of the worker that sent the results.
+        :type workerName: string.
+        """
+
+        rows = []
+        for result in results:
+            rows.append([
+                sqlite3.Binary(cPickle.dumps(result.getParameters(), cPickle.HIGHEST_PROTOCOL)),
+                sqlite3.Binary(cPickle.dumps(result.getResult(), cPickle.HIGHEST_PROTOCOL)),
+                workerName,
+                int(result.isPruned())
+            ])
+        self.__connection.executemany("insert into journal (parameters, result, worker_name, pruned) values (?, ?, ?, ?)", rows)
+        self.__connection.commit()
+
+    def getResults(self):
+        """Returns a list of (parameters, result, worker name, pruned) tuples with the results recorded so far, in the
+        order they were recorded."""
+
+        ret = []
+        cursor = self.__connection.execute("select parameters, result, worker_name, pruned from journal order by journal_id")
+        for parameters, result, workerName, pruned in cursor:
+            ret.append((cPickle.loads(str(parameters)), cPickle.loads(str(result)), workerName, bool(pruned)))
+        cursor.close()
+        return ret
+
+    def close(self):
+        self.__connection.close()
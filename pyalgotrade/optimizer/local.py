@@ -24,9 +24,13 @@ import logging
 import socket
 import random
 import os
+import shutil
+import tempfile
 
+from pyalgotrade import barfeed
 from pyalgotrade.optimizer import server
 from pyalgotrade.optimizer import worker
+from pyalgotrade.optimizer import sharedbars
 
 
 class ServerThread(threading.Thread):
@@ -44,16 +48,25 @@ class ServerThread(threading.Thread):
         self.__results = self.__server.serve(self.__barFeed, self.__strategyParameters)
 
 
-def worker_process(strategyClass, port):
+def worker_process(strategyClass, port, sharedBarsPath, transport, pruningRule, singlePass):
     class Worker(worker.Worker):
+        def buildStrategy(self, barFeed, *args, **kwargs):
+            return strategyClass(barFeed, *args, **kwargs)
+
         def runStrategy(self, barFeed, *args, **kwargs):
-            strat = strategyClass(barFeed, *args, **kwargs)
+            strat = self.buildStrategy(barFeed, *args, **kwargs)
+            self.watchStrategy(strat)
             strat.run()
             return strat.getResult()
 
+        def getFeedBuilder(self):
+            if sharedBarsPath is None:
+                return super(Worker, self).getFeedBuilder()
+            return sharedbars.SharedBars(sharedBarsPath).buildFeed
+
     # Create a worker and run it.
     name = "worker-%s" % (os.getpid())
-    w = Worker("localhost", port, name)
+    w = Worker("localhost", port, name, transport, pruningRule, singlePass)
     w.getLogger().setLevel(logging.ERROR)
     w.run()
 
@@ -70,16 +83,61 @@ def find_port():
             pass
 
 
-def run(strategyClass, barFeed, strategyParameters, workerCount=None):
+# Loads the bars and writes them to a temporary directory, in shared memory if available. Returns the directory, or None
+# if the bars can't be shared, along with a bar feed with the bars for the server to use if they can't be shared.
+def share_bars(barFeed):
+    instruments = barFeed.getRegisteredInstruments()
+    loadedBars = [bars for dateTime, bars in barFeed]
+    path = tempfile.mkdtemp(prefix="pyalgotrade-", dir=sharedbars.get_tmp_dir())
+    try:
+        shared = sharedbars.write(barfeed.OptimizerBarFeed(barFeed.getFrequency(), instruments, loadedBars), path)
+    except Exception:
+        shutil.rmtree(path, ignore_errors=True)
+        raise
+    if shared:
+        return path, None
+    shutil.rmtree(path, ignore_errors=True)
+    return None, barfeed.OptimizerBarFeed(barFeed.getFrequency(), instruments, loadedBars)
+
+
+def run(strategyClass, barFeed, strategyParameters, workerCount=None, shareBars=False, transport=server.TRANSPORT_XMLRPC, resultSink=None, leaderboardSize=server.DEFAULT_LEADERBOARD_SIZE, journalPath=None, pruningRule=None, singlePass=False):
     """Executes many instances of a strategy in parallel and finds the parameters that yield the best results.
 
     :param strategyClass: The strategy class.
     :param barFeed: The bar feed to use to backtest the strategy.
     :type barFeed: :class:`pyalgotrade.barfeed.BarFeed`.
-    :param strategyParameters: The set of parameters to use for backtesting. An iterable object where **each element is a tuple that holds parameter values**.
+    :param strategyParameters: The set of parameters to use for backtesting. An iterable object where **each element is a tuple that holds parameter values**,
+        or a :class:`pyalgotrade.optimizer.search.SearchDriver` that picks the parameters as results arrive.
     :param workerCount: The number of strategies to run in parallel. If None then as many workers as CPUs are used.
     :type workerCount: int.
+    :param shareBars: True to load the bars once into memory-mapped files, in shared memory if available, that all the
+        workers use without copying them. False, the default, to send a copy of the bars to each worker.
+    :type shareBars: boolean.
+    :param transport: The transport used by the workers to communicate with the server.
+        **pyalgotrade.optimizer.server.TRANSPORT_XMLRPC**, the default, or **pyalgotrade.optimizer.server.TRANSPORT_BINARY**,
+        which is faster.
+    :type transport: string.
+    :param resultSink: Where to store every set of parameters along with its result. The sink gets closed once all the
+        strategies were executed.
+    :type resultSink: :class:`pyalgotrade.optimizer.resultsinks.ResultSink`.
+    :param leaderboardSize: The number of results to keep in the leaderboard.
+        Check :meth:`pyalgotrade.optimizer.server.Results.getLeaderboard`.
+    :type leaderboardSize: int.
+    :param journalPath: The path to a SQLite database where results get recorded as they arrive. If the database already
+        has results, for example because a previous run was interrupted, those results are used and the parameters
+        that were already evaluated are skipped.
+    :type journalPath: string.
+    :param pruningRule: A rule to stop strategy executions early. Executions that get stopped are reported as pruned,
+        with the result the strategy had at that point, and are not considered for the best result.
+    :type pruningRule: :class:`pyalgotrade.optimizer.pruning.PruningRule`.
+    :param singlePass: True to run the strategies for all the parameters in a job with a single pass over the bars,
+        instead of one pass for each set of parameters. Check :func:`pyalgotrade.strategy.multi.run`.
+    :type singlePass: boolean.
     :rtype: A :class:`Results` instance with the best results found.
+
+    .. note::
+        * Bars can only be shared if, for each instrument, they have the same frequency, timezone and extra columns.
+          Otherwise a copy is sent to each worker.
     """
 
     assert(workerCount is None or workerCount > 0)
@@ -92,15 +150,19 @@ def run(strategyClass, barFeed, strategyParameters, workerCount=None):
     if port is None:
         raise Exception("Failed to find a port to listen")
 
+    sharedBarsPath = None
+    if shareBars:
+        sharedBarsPath, barFeed = share_bars(barFeed)
+
     # Build and start the server thread before the worker processes. We'll manually stop the server once workers have finished.
-    srv = server.Server("localhost", port, False)
+    srv = server.Server("localhost", port, False, transport, resultSink, leaderboardSize, journalPath)
     serverThread = ServerThread(srv, barFeed, strategyParameters)
     serverThread.start()
 
     try:
         # Build the worker processes.
         for i in range(workerCount):
-            workers.append(multiprocessing.Process(target=worker_process, args=(strategyClass, port)))
+            workers.append(multiprocessing.Process(target=worker_process, args=(strategyClass, port, sharedBarsPath, transport, pruningRule, singlePass)))
 
         # Start workers
         for process in workers:
@@ -115,4 +177,6 @@ def run(strategyClass, barFeed, strategyParameters, workerCount=None):
         srv.stop()
         serverThread.join()
         ret = serverThread.getResults()
+        if sharedBarsPath is not None:
+            shutil.rmtree(sharedBarsPath, ignore_errors=True)
     return ret
@@ -0,0 +1,101 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2015 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import abc
+
+
+class PruningRule(object):
+    """Base class for rules that stop a strategy execution early, once it is clear that the parameters are not worth
+    evaluating until the end. The rule is checked after each bar is processed.
+
+    .. note::
+        This is a base class and should not be used directly.
+    """
+
+    __metaclass__ = abc.ABCMeta
+
+    def reset(self):
+        """Called before each strategy execution. Override to clear any state kept from a previous execution."""
+        pass
+
+    @abc.abstractmethod
+    def shouldPrune(self, strat, bars):
+        """Override to return True to stop the strategy execution.
+
+        :param strat: The strategy.
+        :type strat: :class:`pyalgotrade.strategy.BaseStrategy`.
+        :param bars: The bars that were just processed.
+        :type bars: :class:`pyalgotrade.bar.Bars`.
+        """
+        raise NotImplementedError()
+
+
+class MaxDrawDown(PruningRule):
+    """Stops the execution once the equity falls a given fraction below its highest value.
+
+    :param maxDrawDown: The maximum draw down, as a fraction of the highest equity. For example, 0.3 for 30%.
+    :type maxDrawDown: float.
+    """
+
+    def __init__(self, maxDrawDown):
+        assert(maxDrawDown > 0)
+        self.__maxDrawDown = maxDrawDown
+        self.__highWatermark = None
+
+    def reset(self):
+        self.__highWatermark = None
+
+    def shouldPrune(self, strat, bars):
+        equity = strat.getBroker().getEquity()
+        if self.__highWatermark is None or equity > self.__highWatermark:
+            self.__highWatermark = equity
+        return self.__highWatermark > 0 and (self.__highWatermark - equity) / float(self.__highWatermark) >= self.__maxDrawDown
+
+
+class MinEquity(PruningRule):
+    """Stops the execution once the equity falls below a given value.
+
+    :param minEquity: The minimum equity.
+    :type minEquity: float.
+    """
+
+    def __init__(self, minEquity):
+        self.__minEquity = minEquity
+
+    def shouldPrune(self, strat, bars):
+        return strat.getBroker().getEquity() < self.__minEquity
+
+
+# Checks a pruning rule after each bar that a strategy processes, and stops the strategy once the rule fires.
+class Pruner(object):
+    def __init__(self, strat, pruningRule):
+        self.__strategy = strat
+        self.__pruningRule = pruningRule
+        self.__pruned = False
+        pruningRule.reset()
+        strat.getBarsProcessedEvent().subscribe(self.__onBarsProcessed)
+
+    def isPruned(self):
+        return self.__pruned
+
+    def __onBarsProcessed(self, strat, bars):
+        if not self.__pruned and self.__pruningRule.shouldPrune(strat, bars):
+            self.__pruned = True
+            strat.stop()
@@ -0,0 +1,141 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2015 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import abc
+import csv
+import sqlite3
+
+
+class ResultSink(object):
+    """Base class for result sinks. The optimizer server sends every (parameters, result) pair to the sink as
+    results arrive from workers.
+
+    .. note::
+        This is a base class and should not be used directly.
+    """
+
+    __metaclass__ = abc.ABCMeta
+
+    @abc.abstractmethod
+    def addResults(self, results):
+        """Override to store a batch of results.
+
+        :param results: The results.
+        :type results: A list of :class:`pyalgotrade.optimizer.server.Results`.
+        """
+        raise NotImplementedError()
+
+    def close(self):
+        """Called once the optimization is over."""
+        pass
+
+
+class MemorySink(ResultSink):
+    """A :class:`ResultSink` that keeps the results in memory."""
+
+    def __init__(self):
+        self.__results = []
+
+    def addResults(self, results):
+        self.__results.extend(results)
+
+    def getResults(self):
+        """Returns a list of :class:`pyalgotrade.optimizer.server.Results` in the order they arrived."""
+        return self.__results
+
+
+class CSVSink(ResultSink):
+    """A :class:`ResultSink` that writes the results to a CSV file, one row per set of parameters. There is one column
+    for each parameter value ("Parameter 1", "Parameter 2", ...) followed by the "Result" column and the "Pruned" column,
+    that is 1 if the strategy execution was stopped early by a pruning rule and 0 otherwise.
+
+    :param path: The path to the CSV file. It gets overwritten if it exists.
+    :type path: string.
+    """
+
+    def __init__(self, path):
+        self.__file = open(path, "wb")
+        self.__writer = csv.writer(self.__file)
+        self.__headerWritten = False
+
+    def addResults(self, results):
+        for result in results:
+            parameters = result.getParameters()
+            if not self.__headerWritten:
+                self.__writer.writerow(["Parameter %d" % (i + 1) for i in range(len(parameters))] + ["Result", "Pruned"])
+                self.__headerWritten = True
+            self.__writer.writerow(list(parameters) + [result.getResult(), int(result.isPruned())])
+        self.__file.flush()
+
+    def close(self):
+        self.__file.close()
+
+
+# Returns a value that can be stored in a SQLite column.
+def _to_sqlite_value(value):
+    if value is None or isinstance(value, (int, long, float, basestring)):
+        return value
+    return str(value)
+
+
+class SQLiteSink(ResultSink):
+    """A :class:`ResultSink` that writes the results to a SQLite database, in a table named **result** with one
+    column for each parameter value (parameter_1, parameter_2, ...) followed by the result and pruned columns.
+
+    :param dbFilePath: The path to the database file. If the file exists the result table is recreated.
+    :type dbFilePath: string.
+    """
+
+    def __init__(self, dbFilePath):
+        # The optimizer server may add results from different threads. Calls are serialized by the server.
+        self.__connection = sqlite3.connect(dbFilePath, check_same_thread=False)
+        self.__connection.execute("drop table if exists result")
+        self.__parameterCount = None
+
+    def __createSchema(self, parameterCount):
+        columns = ["parameter_%d" % (i + 1) for i in range(parameterCount)]
+        self.__connection.execute(
+            "create table result ("
+            "result_id integer primary key autoincrement"
+            "%s"
+            ", result real"
+            ", pruned integer not null)" % ("".join(", %s" % column for column in columns))
+        )
+        self.__insertSql = "insert into result (%s) values (%s)" % (
+            ", ".join(columns + ["result", "pruned"]),
+            ", ".join(["?"] * (parameterCount + 2))
+        )
+        self.__parameterCount = parameterCount
+
+    def addResults(self, results):
+        rows = []
+        for result in results:
+            parameters = result.getParameters()
+            if self.__parameterCount is None:
+                self.__createSchema(len(parameters))
+            if len(parameters) != self.__parameterCount:
+                raise Exception("Expected %d parameters but got %d" % (self.__parameterCount, len(parameters)))
+            rows.append([_to_sqlite_value(value) for value in parameters] + [_to_sqlite_value(result.getResult()), int(result.isPruned())])
+        if len(rows):
+            self.__connection.executemany(self.__insertSql, rows)
+            self.__connection.commit()
+
+    def close(self):
+        self.__connection.close()
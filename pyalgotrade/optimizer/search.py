@@ -0,0 +1,508 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2015 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import abc
+import math
+import random
+
+from pyalgotrade.optimizer import journal
+
+
+######################################################################
+## Parameter spaces
+# A parameter space is a sequence with one element per strategy parameter. Each element is either a dimension
+# (Choice, IntRange or FloatRange) or a constant value that is passed as is, like the instrument.
+
+class Dimension(object):
+    __metaclass__ = abc.ABCMeta
+
+    @abc.abstractmethod
+    def sample(self, rng):
+        raise NotImplementedError()
+
+
+class Choice(Dimension):
+    """A parameter that takes one of a set of values.
+
+    :param values: The values.
+    :type values: list.
+    """
+
+    def __init__(self, values):
+        assert(len(values) > 0)
+        self.__values = list(values)
+
+    def getValues(self):
+        return self.__values
+
+    def sample(self, rng):
+        return rng.choice(self.__values)
+
+
+class IntRange(Dimension):
+    """An integer parameter.
+
+    :param low: The lowest value.
+    :type low: int.
+    :param high: The highest value, inclusive.
+    :type high: int.
+    :param step: The step between values.
+    :type step: int.
+    """
+
+    def __init__(self, low, high, step=1):
+        assert(low <= high and step > 0)
+        self.__low = low
+        self.__high = high
+        self.__step = step
+
+    def getLow(self):
+        return self.__low
+
+    def getHigh(self):
+        return self.__high
+
+    def round(self, value):
+        steps = int(round((value - self.__low) / float(self.__step)))
+        return min(self.__high, max(self.__low, self.__low + steps * self.__step))
+
+    def sample(self, rng):
+        return self.__low + rng.randint(0, (self.__high - self.__low) // self.__step) * self.__step
+
+
+class FloatRange(Dimension):
+    """A floating point parameter.
+
+    :param low: The lowest value.
+    :type low: float.
+    :param high: The highest value.
+    :type high: float.
+    :param log: True to sample uniformly in log scale. Both low and high must be positive.
+    :type log: boolean.
+    """
+
+    def __init__(self, low, high, log=False):
+        assert(low <= high and (not log or low > 0))
+        self.__low = low
+        self.__high = high
+        self.__log = log
+
+    def getLow(self):
+        return self.__low
+
+    def getHigh(self):
+        return self.__high
+
+    def isLog(self):
+        return self.__log
+
+    def sample(self, rng):
+        if self.__log:
+            return math.exp(rng.uniform(math.log(self.__low), math.log(self.__high)))
+        return rng.uniform(self.__low, self.__high)
+
+
+def sample(space, rng):
+    """Returns a tuple of parameter values sampled uniformly from a parameter space."""
+
+    return tuple(dimension.sample(rng) if isinstance(dimension, Dimension) else dimension for dimension in space)
+
+
+# Results are maximized. Strategies that failed rank last.
+def _rank_value(result):
+    if result is None:
+        return float("-inf")
+    return result
+
+
+######################################################################
+## Search drivers
+
+class Trial(object):
+    """A set of parameters to evaluate with a fraction of the bars. Workers run these using the bars in the first
+    part of the date range only.
+
+    :param parameters: The parameter values.
+    :type parameters: tuple.
+    :param budget: The fraction of the date range to use, greater than 0 and less than 1.
+    :type budget: float.
+    """
+
+    def __init__(self, parameters, budget):
+        self.__parameters = parameters
+        self.__budget = budget
+
+    def getParameters(self):
+        return self.__parameters
+
+    def getBudget(self):
+        return self.__budget
+
+    def __repr__(self):
+        return "Trial(%s, %s)" % (self.__parameters, self.__budget)
+
+
+class SearchDriver(object):
+    """Base class for search drivers. A search driver decides which parameters to evaluate next, and it is notified
+    of the results as they arrive from workers.
+
+    .. note::
+        This is a base class and should not be used directly.
+    """
+
+    __metaclass__ = abc.ABCMeta
+
+    @abc.abstractmethod
+    def getNextParameters(self):
+        """Override to return the next set of parameters to evaluate, either as a tuple or as a :class:`Trial`.
+        Return None if there are no parameters available until more results arrive, or if the search is finished.
+        """
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def isFinished(self):
+        """Override to return True once there are no more parameters to evaluate."""
+        raise NotImplementedError()
+
+    def onResults(self, results):
+        """Called as results arrive.
+
+        :param results: The results.
+        :type results: A list of :class:`pyalgotrade.optimizer.server.Results`.
+        """
+        pass
+
+
+class GridSearch(SearchDriver):
+    """Evaluates every set of parameters in an iterable.
+
+    :param parameters: An iterable object where each element is a tuple that holds parameter values.
+    """
+
+    def __init__(self, parameters):
+        self.__parametersIterator = iter(parameters)
+
+    def getNextParameters(self):
+        ret = None
+        if self.__parametersIterator is not None:
+            try:
+                ret = self.__parametersIterator.next()
+            except StopIteration:
+                self.__parametersIterator = None
+        return ret
+
+    def isFinished(self):
+        return self.__parametersIterator is None
+
+
+class RandomSearch(SearchDriver):
+    """Evaluates sets of parameters sampled uniformly from a parameter space.
+
+    :param space: The parameter space. A sequence with a :class:`Choice`, :class:`IntRange`, :class:`FloatRange`
+        or a constant value for each parameter.
+    :param count: The number of sets of parameters to evaluate.
+    :type count: int.
+    :param seed: The random seed.
+    """
+
+    def __init__(self, space, count, seed=None):
+        self.__space = space
+        self.__count = count
+        self.__rng = random.Random(seed)
+
+    def getNextParameters(self):
+        ret = None
+        if self.__count > 0:
+            self.__count -= 1
+            ret = sample(self.__space, self.__rng)
+        return ret
+
+    def isFinished(self):
+        return self.__count == 0
+
+
+# Samples up to count different sets of parameters.
+def _sample_distinct(space, count, rng):
+    ret = []
+    keys = set()
+    attempts = 0
+    while len(ret) < count and attempts < count * 10:
+        attempts += 1
+        parameters = sample(space, rng)
+        key = journal.get_key(parameters)
+        if key not in keys:
+            keys.add(key)
+            ret.append(parameters)
+    return ret
+
+
+class SuccessiveHalving(SearchDriver):
+    """Samples sets of parameters and evaluates them with a small fraction of the bars. Only the best 1/eta of them
+    are evaluated again with eta times more bars, and so on, until the remaining ones are evaluated with all the bars.
+
+    :param space: The parameter space. Check :class:`RandomSearch`.
+    :param count: The number of sets of parameters to start with.
+    :type count: int.
+    :param minBudget: The fraction of the date range used in the first round.
+    :type minBudget: float.
+    :param eta: The factor by which the number of sets of parameters is reduced, and the budget increased, on each
+        round.
+    :type eta: int.
+    :param seed: The random seed.
+    """
+
+    def __init__(self, space, count, minBudget, eta=3, seed=None):
+        assert(0 < minBudget <= 1 and eta > 1)
+        self.__eta = eta
+        self.__budget = minBudget
+        self.__candidates = _sample_distinct(space, count, random.Random(seed))
+        self.__startRound()
+
+    def __startRound(self):
+        self.__pending = {}
+        self.__results = []
+        self.__nextPos = 0
+        # Don't let rounding errors add an extra round.
+        if self.__budget >= 1 - 1e-9:
+            self.__budget = 1
+
+    def __getKey(self, parameters):
+        return journal.get_key(parameters)
+
+    def getNextParameters(self):
+        ret = None
+        if self.__nextPos < len(self.__candidates):
+            parameters = self.__candidates[self.__nextPos]
+            self.__nextPos += 1
+            self.__pending[self.__getKey(parameters)] = parameters
+            if self.__budget < 1:
+                ret = Trial(parameters, self.__budget)
+            else:
+                ret = parameters
+        return ret
+
+    def isFinished(self):
+        return self.__budget >= 1 and self.__nextPos == len(self.__candidates)
+
+    def getPendingCount(self):
+        """Returns the number of parameters proposed in the current round that are waiting for results."""
+        return len(self.__pending)
+
+    def onResults(self, results):
+        for result in results:
+            parameters = result.getParameters()
+            if isinstance(parameters, Trial):
+                if parameters.getBudget() != self.__budget:
+                    continue
+                parameters = parameters.getParameters()
+            elif self.__budget < 1:
+                continue
+            key = self.__getKey(parameters)
+            if key in self.__pending:
+                self.__results.append((_rank_value(result.getResult()), -len(self.__results), self.__pending.pop(key)))
+
+        # Once the round is complete keep the best ones and increase the budget.
+        if self.__budget < 1 and self.__nextPos == len(self.__candidates) and len(self.__pending) == 0:
+            self.__results.sort(reverse=True)
+            keep = max(1, len(self.__candidates) // self.__eta)
+            self.__candidates = [entry[2] for entry in self.__results[:keep]]
+            self.__budget *= self.__eta
+            self.__startRound()
+
+
+class Hyperband(SearchDriver):
+    """Runs :class:`SuccessiveHalving` several times, from many sets of parameters with a small budget to a few sets of
+    parameters with the whole date range, to hedge against rankings with small budgets being misleading.
+
+    :param space: The parameter space. Check :class:`RandomSearch`.
+    :param minBudget: The smallest fraction of the date range to use.
+    :type minBudget: float.
+    :param eta: The factor by which the number of sets of parameters is reduced, and the budget increased, on each
+        round.
+    :type eta: int.
+    :param seed: The random seed.
+    """
+
+    def __init__(self, space, minBudget, eta=3, seed=None):
+        assert(0 < minBudget <= 1 and eta > 1)
+        rng = random.Random(seed)
+        maxRounds = int(math.floor(math.log(1 / float(minBudget)) / math.log(eta) + 1e-9))
+        # Brackets run one after the other, starting with the one with most sets of parameters.
+        self.__brackets = []
+        for rounds in range(maxRounds, -1, -1):
+            count = int(math.ceil((maxRounds + 1) / float(rounds + 1) * eta ** rounds))
+            self.__brackets.append(SuccessiveHalving(space, count, eta ** -rounds, eta, rng.random()))
+
+    def __dropFinishedBrackets(self):
+        # Move to the next bracket once all the results for the current one arrived.
+        while len(self.__brackets) and self.__brackets[0].isFinished() and self.__brackets[0].getPendingCount() == 0:
+            self.__brackets.pop(0)
+
+    def getNextParameters(self):
+        ret = None
+        self.__dropFinishedBrackets()
+        if len(self.__brackets):
+            ret = self.__brackets[0].getNextParameters()
+        return ret
+
+    def isFinished(self):
+        return len(self.__brackets) == 0 or (len(self.__brackets) == 1 and self.__brackets[0].isFinished())
+
+    def onResults(self, results):
+        if len(self.__brackets):
+            self.__brackets[0].onResults(results)
+        self.__dropFinishedBrackets()
+
+
+######################################################################
+## Model-based search
+# A Tree-structured Parzen Estimator. Results seen so far are split in good and bad ones, and each dimension gets a
+# density estimate for each group. Candidates are sampled around the good parameters and the one that maximizes the
+# ratio between the good and bad densities is evaluated next.
+
+# Density estimate for a numeric dimension: A uniform prior plus a gaussian kernel around each observation.
+class _NumericEstimator(object):
+    def __init__(self, dimension, values):
+        self.__log = isinstance(dimension, FloatRange) and dimension.isLog()
+        self.__low = self.__transform(dimension.getLow())
+        self.__high = self.__transform(dimension.getHigh())
+        self.__values = [self.__transform(value) for value in values]
+        self.__width = max(self.__high - self.__low, 1e-12)
+        self.__bandwidth = self.__width * 0.5 * (len(self.__values) + 1) ** -0.2
+
+    def __transform(self, value):
+        if self.__log:
+            return math.log(value)
+        return value
+
+    def sample(self, rng):
+        pos = rng.randint(0, len(self.__values))
+        if pos == len(self.__values):
+            ret = rng.uniform(self.__low, self.__high)
+        else:
+            ret = min(self.__high, max(self.__low, rng.gauss(self.__values[pos], self.__bandwidth)))
+        if self.__log:
+            ret = math.exp(ret)
+        return ret
+
+    def logDensity(self, value):
+        value = self.__transform(value)
+        density = 1 / self.__width
+        for center in self.__values:
+            z = (value - center) / self.__bandwidth
+            density += math.exp(-0.5 * z * z) / (self.__bandwidth * math.sqrt(2 * math.pi))
+        return math.log(density / (len(self.__values) + 1))
+
+
+# Density estimate for a Choice dimension: Observed frequencies plus one for each value.
+class _ChoiceEstimator(object):
+    def __init__(self, dimension, values):
+        self.__values = dimension.getValues()
+        counts = [1] * len(self.__values)
+        for value in values:
+            counts[self.__values.index(value)] += 1
+        self.__counts = counts
+        self.__total = float(sum(counts))
+
+    def sample(self, rng):
+        pos = rng.uniform(0, self.__total)
+        for value, count in zip(self.__values, self.__counts):
+            pos -= count
+            if pos <= 0:
+                return value
+        return self.__values[-1]
+
+    def logDensity(self, value):
+        return math.log(self.__counts[self.__values.index(value)] / self.__total)
+
+
+def _build_estimator(dimension, values):
+    if isinstance(dimension, Choice):
+        return _ChoiceEstimator(dimension, values)
+    return _NumericEstimator(dimension, values)
+
+
+class TPESearch(SearchDriver):
+    """Model-based search that samples new parameters near the ones that scored best so far, using a Tree-structured
+    Parzen Estimator. Parameters are proposed as soon as a worker needs them, using the results that arrived until then.
+
+    :param space: The parameter space. Check :class:`RandomSearch`.
+    :param count: The number of sets of parameters to evaluate.
+    :type count: int.
+    :param startupCount: The number of sets of parameters sampled at random before using the model.
+    :type startupCount: int.
+    :param gamma: The fraction of results considered good.
+    :type gamma: float.
+    :param candidateCount: The number of candidates sampled from the model for each set of parameters proposed.
+    :type candidateCount: int.
+    :param seed: The random seed.
+    """
+
+    def __init__(self, space, count, startupCount=10, gamma=0.25, candidateCount=24, seed=None):
+        self.__space = space
+        self.__count = count
+        self.__startupCount = startupCount
+        self.__gamma = gamma
+        self.__candidateCount = candidateCount
+        self.__rng = random.Random(seed)
+        self.__proposed = 0
+        self.__observations = []
+
+    def getNextParameters(self):
+        ret = None
+        if self.__proposed < self.__count:
+            self.__proposed += 1
+            if len(self.__observations) < max(self.__startupCount, 2):
+                ret = sample(self.__space, self.__rng)
+            else:
+                ret = self.__sampleFromModel()
+        return ret
+
+    def isFinished(self):
+        return self.__proposed >= self.__count
+
+    def onResults(self, results):
+        for result in results:
+            parameters = result.getParameters()
+            if not isinstance(parameters, Trial):
+                self.__observations.append((_rank_value(result.getResult()), parameters))
+
+    def __sampleFromModel(self):
+        ranked = sorted(self.__observations, key=lambda observation: observation[0], reverse=True)
+        goodCount = max(1, int(math.ceil(self.__gamma * len(ranked))))
+        good = [observation[1] for observation in ranked[:goodCount]]
+        bad = [observation[1] for observation in ranked[goodCount:]]
+
+        ret = list(sample(self.__space, self.__rng))
+        for i, dimension in enumerate(self.__space):
+            if not isinstance(dimension, Dimension):
+                continue
+            goodEstimator = _build_estimator(dimension, [parameters[i] for parameters in good])
+            badEstimator = _build_estimator(dimension, [parameters[i] for parameters in bad])
+            bestScore = None
+            for j in xrange(self.__candidateCount):
+                candidate = goodEstimator.sample(self.__rng)
+                if isinstance(dimension, IntRange):
+                    candidate = dimension.round(candidate)
+                score = goodEstimator.logDensity(candidate) - badEstimator.logDensity(candidate)
+                if bestScore is None or score > bestScore:
+                    bestScore = score
+                    ret[i] = candidate
+        return tuple(ret)
@@ -19,10 +19,27 @@
 """
 
 import SimpleXMLRPCServer
+import SocketServer
 import threading
 import time
 import pickle
+import cPickle
+import heapq
+import collections
+import itertools
+import math
+
 import pyalgotrade.logger
+from pyalgotrade.optimizer import binaryrpc
+from pyalgotrade.optimizer import journal
+from pyalgotrade.optimizer import search
+
+
+# Transports for the communication between the server and the workers.
+TRANSPORT_XMLRPC = "xmlrpc"
+TRANSPORT_BINARY = "binary"
+
+DEFAULT_LEADERBOARD_SIZE = 10
 
 
 class AutoStopThread(threading.Thread):
@@ -38,9 +55,11 @@ class AutoStopThread(threading.Thread):
 
 class Results(object):
     """The results of the strategy executions."""
-    def __init__(self, parameters, result):
+    def __init__(self, parameters, result, leaderboard=None, pruned=False):
         self.__parameters = parameters
         self.__result = result
+        self.__leaderboard = leaderboard
+        self.__pruned = pruned
 
     def getParameters(self):
         """Returns a sequence of parameter values."""
@@ -50,13 +69,48 @@ class Results(object):
         """Returns the result for a given set of parameters."""
         return self.__result
 
+    def getLeaderboard(self):
+        """Returns a list with the best :class:`Results` found, sorted from best to worst."""
+        return self.__leaderboard
+
+    def isPruned(self):
+        """Returns True if the strategy execution was stopped early by a pruning rule. The result is the one the strategy
+        had when it was stopped."""
+        return self.__pruned
+
+
+# Keeps the best results found. Results that tie keep the one that arrived first.
+class Leaderboard(object):
+    def __init__(self, size):
+        self.__size = size
+        # A min-heap with the results to keep, so the worst one can be replaced in O(log size).
+        self.__heap = []
+        self.__count = 0
+
+    def add(self, results):
+        if results.getResult() is None or self.__size <= 0:
+            return
+        self.__count += 1
+        entry = (results.getResult(), -self.__count, results)
+        if len(self.__heap) < self.__size:
+            heapq.heappush(self.__heap, entry)
+        elif entry > self.__heap[0]:
+            heapq.heapreplace(self.__heap, entry)
+
+    def getResults(self):
+        return [entry[2] for entry in sorted(self.__heap, reverse=True)]
+
+
+# Job ids are never reused, so results for a job that was re-issued can't be mistaken for another job's.
+_jobIds = itertools.count(1)
+
 
 class Job(object):
     def __init__(self, strategyParameters):
         self.__strategyParameters = strategyParameters
         self.__bestResult = None
         self.__bestParameters = None
-        self.__id = id(self)
+        self.__id = _jobIds.next()
 
     def getId(self):
         return self.__id
@@ -82,53 +136,234 @@ class Job(object):
         self.__bestWorkerName = workerName
 
 
+# A job handed out to a worker.
+class ActiveJob(object):
+    def __init__(self, job, parameters, issueTime, deadline, group):
+        self.job = job
+        self.parameters = parameters
+        self.issueTime = issueTime
+        self.deadline = deadline
+        # The ids of the jobs with the same parameters. Once one of them completes the others are discarded.
+        self.group = group
+        self.reissued = False
+
+
+# Hands out jobs to workers.
+# - Batch sizes are set from the time it takes to run a strategy, so that each job takes about targetJobDuration
+#   seconds, and they get smaller once the parameters are about to run out so that workers finish at the same time.
+# - Each job has a deadline. Jobs that don't complete in time, because the worker died or is too slow, are handed out
+#   again to the next worker that asks for a job. The results that arrive first are used.
+# - Parameters come from a search driver, that gets the results as jobs complete. Parameters with a known result, for
+#   example from a journal, are not evaluated again and their results are passed to the driver right away.
+class Scheduler(object):
+    # Weight of the last job in the running estimate of the time it takes to run a strategy.
+    ESTIMATE_WEIGHT = 0.3
+
+    def __init__(self, strategyParameters, maxBatchSize, targetJobDuration, minJobLease, jobLeaseFactor, clock=time.time, knownResults=None):
+        if isinstance(strategyParameters, search.SearchDriver):
+            self.__searchDriver = strategyParameters
+        else:
+            self.__searchDriver = search.GridSearch(strategyParameters)
+        self.__knownResults = knownResults or {}
+        # True if the driver had no more parameters available the last time the queue was filled.
+        self.__driverIdle = False
+        self.__maxBatchSize = maxBatchSize
+        self.__targetJobDuration = targetJobDuration
+        self.__minJobLease = minJobLease
+        self.__jobLeaseFactor = jobLeaseFactor
+        self.__clock = clock
+        self.__queue = collections.deque()
+        self.__reissueQueue = collections.deque()
+        self.__activeJobs = {}
+        self.__runTime = None
+        self.__cancelled = False
+        self.__cond = threading.Condition()
+
+    def __fillQueue(self, size):
+        self.__driverIdle = False
+        while len(self.__queue) < size:
+            parameters = None
+            if not self.__searchDriver.isFinished():
+                parameters = self.__searchDriver.getNextParameters()
+            if parameters is None:
+                self.__driverIdle = True
+                break
+            key = journal.get_key(parameters)
+            if key in self.__knownResults:
+                self.__searchDriver.onResults([Results(parameters, self.__knownResults[key])])
+            else:
+                self.__queue.append(parameters)
+
+    def __getBatchSize(self):
+        if self.__runTime is None:
+            # Start small until there is an estimate.
+            ret = 1
+        else:
+            ret = int(self.__targetJobDuration / max(self.__runTime, 1e-6))
+        ret = max(1, min(ret, self.__maxBatchSize))
+
+        # Each worker is expected to have a job in progress, so this is an estimate of the number of workers.
+        workers = len(self.__activeJobs) + 1
+        self.__fillQueue(ret * workers)
+        if self.__driverIdle:
+            # Near the end, or while the driver waits for results, split what's left among the workers.
+            ret = max(1, min(ret, int(math.ceil(len(self.__queue) / float(workers)))))
+        return ret
+
+    def __expireJobs(self, now):
+        for activeJob in self.__activeJobs.values():
+            if not activeJob.reissued and now > activeJob.deadline:
+                activeJob.reissued = True
+                self.__reissueQueue.append(activeJob)
+
+    def __issueJob(self, parameters, now, group):
+        job = Job(list(parameters))
+        lease = self.__minJobLease
+        if self.__runTime is not None:
+            lease = max(lease, self.__jobLeaseFactor * self.__runTime * len(parameters))
+        group.append(job.getId())
+        self.__activeJobs[job.getId()] = ActiveJob(job, parameters, now, now + lease, group)
+        return job
+
+    def __buildNextJob(self):
+        now = self.__clock()
+        self.__expireJobs(now)
+
+        # Re-issue expired jobs first, unless they completed in the meantime.
+        while len(self.__reissueQueue):
+            activeJob = self.__reissueQueue.popleft()
+            if activeJob.job.getId() in self.__activeJobs:
+                return self.__issueJob(activeJob.parameters, now, activeJob.group)
+
+        parameters = []
+        batchSize = self.__getBatchSize()
+        while len(parameters) < batchSize and len(self.__queue):
+            parameters.append(self.__queue.popleft())
+        if len(parameters) == 0:
+            return None
+        return self.__issueJob(parameters, now, [])
+
+    def getNextJob(self, wait=False):
+        """Returns the next job or None if there are no more jobs.
+        If wait is True and there are jobs in progress, it waits until they complete or have to be re-issued."""
+
+        with self.__cond:
+            ret = self.__buildNextJob()
+            while ret is None and wait and not self.__cancelled and len(self.__activeJobs):
+                self.__cond.wait(1)
+                ret = self.__buildNextJob()
+            return ret
+
+    def completeJob(self, jobId, results=None):
+        """Marks a job as completed and passes its results, a list of Results, to the search driver.
+        Returns the Job or None if the job, or a copy of it, already completed."""
+
+        if results is None:
+            results = []
+        with self.__cond:
+            activeJob = self.__activeJobs.get(jobId)
+            if activeJob is None:
+                return None
+            for otherJobId in activeJob.group:
+                self.__activeJobs.pop(otherJobId, None)
+
+            runTime = (self.__clock() - activeJob.issueTime) / float(len(activeJob.parameters))
+            if self.__runTime is None:
+                self.__runTime = runTime
+            else:
+                self.__runTime += Scheduler.ESTIMATE_WEIGHT * (runTime - self.__runTime)
+
+            self.__searchDriver.onResults(results)
+            self.__cond.notifyAll()
+            return activeJob.job
+
+    def jobsPending(self):
+        with self.__cond:
+            self.__fillQueue(1)
+            return len(self.__queue) > 0 or len(self.__activeJobs) > 0
+
+    def cancel(self):
+        with self.__cond:
+            self.__cancelled = True
+            self.__cond.notifyAll()
+
+
 # Restrict to a particular path.
 class RequestHandler(SimpleXMLRPCServer.SimpleXMLRPCRequestHandler):
     rpc_paths = ('/PyAlgoTradeRPC',)
 
 
-class Server(SimpleXMLRPCServer.SimpleXMLRPCServer):
-    defaultBatchSize = 200
+# Requests are handled in different threads so workers can wait for jobs without blocking each other.
+class XMLRPCServer(SocketServer.ThreadingMixIn, SimpleXMLRPCServer.SimpleXMLRPCServer):
+    daemon_threads = True
 
-    def __init__(self, address, port, autoStop=True):
+    def __init__(self, address, port):
         SimpleXMLRPCServer.SimpleXMLRPCServer.__init__(self, (address, port), requestHandler=RequestHandler, logRequests=False, allow_none=True)
+        self.register_introspection_functions()
+
+
+# Returns the functions used to serialize values for a given transport.
+# XML-RPC strings have to be valid XML so the text pickle protocol is used.
+def get_serializer(transport):
+    if transport == TRANSPORT_XMLRPC:
+        return pickle.dumps, pickle.loads
+    elif transport == TRANSPORT_BINARY:
+        return lambda obj: cPickle.dumps(obj, cPickle.HIGHEST_PROTOCOL), cPickle.loads
+    else:
+        raise Exception("Invalid transport %s" % (transport))
+
+
+class Server(object):
+    # The maximum number of parameter sets in a job.
+    defaultBatchSize = 200
+    # Jobs are sized to take about this many seconds.
+    targetJobDuration = 10
+    # Jobs that don't complete within max(minJobLease, jobLeaseFactor * expected duration) seconds get re-issued.
+    minJobLease = 60
+    jobLeaseFactor = 3
+
+    def __init__(self, address, port, autoStop=True, transport=TRANSPORT_XMLRPC, resultSink=None, leaderboardSize=DEFAULT_LEADERBOARD_SIZE, journalPath=None):
+        self.__dumps, self.__loads = get_serializer(transport)
+        if transport == TRANSPORT_XMLRPC:
+            self.__rpcServer = XMLRPCServer(address, port)
+        else:
+            self.__rpcServer = binaryrpc.Server(address, port)
 
         self.__instrumentsAndBars = None  # Pickle'd instruments and bars for faster retrieval.
         self.__barsFreq = None
-        self.__activeJobs = {}
-        self.__activeJobsLock = threading.Lock()
-        self.__parametersLock = threading.Lock()
+        self.__scheduler = None
         self.__bestJob = None
-        self.__parametersIterator = None
+        self.__resultsLock = threading.Lock()
+        self.__resultSink = resultSink
+        self.__leaderboard = Leaderboard(leaderboardSize)
+        self.__journalPath = journalPath
+        self.__journal = None
         self.__logger = pyalgotrade.logger.getLogger("server")
         if autoStop:
             self.__autoStopThread = AutoStopThread(self)
         else:
             self.__autoStopThread = None
 
-        self.register_introspection_functions()
-        self.register_function(self.getInstrumentsAndBars, 'getInstrumentsAndBars')
-        self.register_function(self.getBarsFrequency, 'getBarsFrequency')
-        self.register_function(self.getNextJob, 'getNextJob')
-        self.register_function(self.pushJobResults, 'pushJobResults')
+        self.__rpcServer.register_function(self.getInstrumentsAndBars, 'getInstrumentsAndBars')
+        self.__rpcServer.register_function(self.getBarsFrequency, 'getBarsFrequency')
+        self.__rpcServer.register_function(self.getNextJob, 'getNextJob')
+        self.__rpcServer.register_function(self.pushJobResults, 'pushJobResults')
         self.__forcedStop = False
 
-    def __getNextParams(self):
-        ret = []
-
-        # Get the next set of parameters.
-        with self.__parametersLock:
-            if self.__parametersIterator is not None:
-                try:
-                    for i in xrange(Server.defaultBatchSize):
-                        ret.append(self.__parametersIterator.next())
-                except StopIteration:
-                    self.__parametersIterator = None
-        return ret
-
     def getLogger(self):
         return self.__logger
 
+    # Returns the SocketServer based server for the transport in use.
+    def getRPCServer(self):
+        return self.__rpcServer
+
+    # Server used to be a SimpleXMLRPCServer. To keep that interface, attributes that are not found, like
+    # serve_forever, shutdown, register_function or server_address, are looked up in the server for the transport.
+    def __getattr__(self, name):
+        if name.startswith("_Server__"):
+            raise AttributeError(name)
+        return getattr(self.__rpcServer, name)
+
     def getInstrumentsAndBars(self):
         return self.__instrumentsAndBars
 
@@ -139,76 +374,108 @@ class Server(SimpleXMLRPCServer.SimpleXMLRPCServer):
         return self.__bestJob
 
     def getNextJob(self):
-        ret = None
-        params = []
-
-        # Get the next set of parameters.
-        params = self.__getNextParams()
-
-        # Map the active job
-        if len(params):
-            ret = Job(params)
-            with self.__activeJobsLock:
-                self.__activeJobs[ret.getId()] = ret
-
-        return pickle.dumps(ret)
+        # Workers wait while there are jobs in progress in case they have to be re-issued.
+        ret = self.__scheduler.getNextJob(True)
+        return self.__dumps(ret)
 
     def jobsPending(self):
         if self.__forcedStop:
             return False
-
-        with self.__parametersLock:
-            jobsPending = self.__parametersIterator is not None
-        with self.__activeJobsLock:
-            activeJobs = len(self.__activeJobs) > 0
-        return jobsPending or activeJobs
-
-    def pushJobResults(self, jobId, result, parameters, workerName):
-        jobId = pickle.loads(jobId)
-        result = pickle.loads(result)
-        parameters = pickle.loads(parameters)
-        workerName = pickle.loads(workerName)
-
-        job = None
-
-        # Get the active job and remove the mapping.
-        with self.__activeJobsLock:
-            try:
-                job = self.__activeJobs[jobId]
-                del self.__activeJobs[jobId]
-            except KeyError:
-                # The job's results were already submitted.
-                return
-
-        # Save the job with the best result
-        if self.__bestJob is None or result > self.__bestJob.getBestResult():
-            job.setBestResult(result, parameters, workerName)
-            self.__bestJob = job
+        return self.__scheduler.jobsPending()
+
+    # allResults holds every (parameters, result) pair in the job, or (parameters, result, True) for executions that
+    # were pruned. It is None if the worker only sent the best one.
+    def pushJobResults(self, jobId, result, parameters, workerName, allResults=None):
+        jobId = self.__loads(jobId)
+        result = self.__loads(result)
+        parameters = self.__loads(parameters)
+        workerName = self.__loads(workerName)
+        if allResults is None:
+            allResults = [(parameters, result)]
+        else:
+            allResults = self.__loads(allResults)
+
+        allResults = [Results(entry[0], entry[1], pruned=len(entry) > 2 and entry[2]) for entry in allResults]
+        job = self.__scheduler.completeJob(jobId, allResults)
+        if job is None:
+            # The job's results were already submitted.
+            return
+
+        # Results for trials with a fraction of the bars are only used by the search driver.
+        allResults = [results for results in allResults if not isinstance(results.getParameters(), search.Trial)]
+        with self.__resultsLock:
+            # Record the results first so they are not lost if the server stops.
+            if self.__journal is not None:
+                self.__journal.addResults(allResults, workerName)
+
+            # Save the job with the best result. Pruned executions didn't run until the end so they don't compete.
+            for results in allResults:
+                if results.isPruned():
+                    continue
+                if self.__bestJob is None or results.getResult() > self.__bestJob.getBestResult():
+                    job.setBestResult(results.getResult(), results.getParameters(), workerName)
+                    self.__bestJob = job
+                self.__leaderboard.add(results)
+            if self.__resultSink is not None:
+                self.__resultSink.addResults(allResults)
 
         self.getLogger().info("Partial result %s with parameters: %s from %s" % (result, parameters, workerName))
 
+    # Loads the results recorded in the journal and returns them in a dictionary keyed by parameters.
+    def __resume(self):
+        journalResults = self.__journal.getResults()
+        completed = {}
+        if len(journalResults) == 0:
+            return completed
+
+        self.getLogger().info("Resuming with %d results from the journal" % (len(journalResults)))
+        allResults = []
+        for parameters, result, workerName, pruned in journalResults:
+            completed[journal.get_key(parameters)] = result
+            allResults.append(Results(parameters, result, pruned=pruned))
+            if pruned:
+                continue
+            if self.__bestJob is None or result > self.__bestJob.getBestResult():
+                self.__bestJob = Job([])
+                self.__bestJob.setBestResult(result, parameters, workerName)
+            self.__leaderboard.add(allResults[-1])
+        if self.__resultSink is not None:
+            self.__resultSink.addResults(allResults)
+
+        return completed
+
     def stop(self):
-        self.shutdown()
+        self.__rpcServer.shutdown()
 
     def serve(self, barFeed, strategyParameters):
         ret = None
         try:
             # Initialize instruments, bars and parameters.
-            self.getLogger().info("Loading bars")
-            loadedBars = []
-            for dateTime, bars in barFeed:
-                loadedBars.append(bars)
-            instruments = barFeed.getRegisteredInstruments()
-            self.__instrumentsAndBars = pickle.dumps((instruments, loadedBars))
-            self.__barsFreq = barFeed.getFrequency()
-
-            self.__parametersIterator = iter(strategyParameters)
+            # No bar feed means that workers get the bars some other way, like optimizer.local does with shared bars.
+            if barFeed is not None:
+                self.getLogger().info("Loading bars")
+                loadedBars = []
+                for dateTime, bars in barFeed:
+                    loadedBars.append(bars)
+                instruments = barFeed.getRegisteredInstruments()
+                self.__instrumentsAndBars = self.__dumps((instruments, loadedBars))
+                self.__barsFreq = barFeed.getFrequency()
+
+            knownResults = None
+            if self.__journalPath is not None:
+                self.__journal = journal.Journal(self.__journalPath)
+                knownResults = self.__resume()
+
+            self.__scheduler = Scheduler(
+                strategyParameters, Server.defaultBatchSize, Server.targetJobDuration, Server.minJobLease, Server.jobLeaseFactor,
+                knownResults=knownResults
+            )
 
             if self.__autoStopThread:
                 self.__autoStopThread.start()
 
             self.getLogger().info("Waiting for workers")
-            self.serve_forever()
+            self.__rpcServer.serve_forever()
 
             if self.__autoStopThread:
                 self.__autoStopThread.join()
@@ -218,27 +485,47 @@ class Server(SimpleXMLRPCServer.SimpleXMLRPCServer):
             if bestJob:
                 if bestJob.getBestResult() is not None:
                     self.getLogger().info("Best final result %s with parameters: %s from client %s" % (bestJob.getBestResult(), bestJob.getBestParameters(), bestJob.getBestWorkerName()))
-                    ret = Results(bestJob.getBestParameters(), bestJob.getBestResult())
+                    ret = Results(bestJob.getBestParameters(), bestJob.getBestResult(), self.__leaderboard.getResults())
                 else:
                     self.getLogger().error("No results. All jobs failed")
             else:
                 self.getLogger().error("No jobs processed")
         finally:
             self.__forcedStop = True
+            if self.__scheduler is not None:
+                self.__scheduler.cancel()
+            if self.__resultSink is not None:
+                self.__resultSink.close()
+            if self.__journal is not None:
+                self.__journal.close()
         return ret
 
 
-def serve(barFeed, strategyParameters, address, port):
+def serve(barFeed, strategyParameters, address, port, transport=TRANSPORT_XMLRPC, resultSink=None, leaderboardSize=DEFAULT_LEADERBOARD_SIZE, journalPath=None):
     """Executes a server that will provide bars and strategy parameters for workers to use.
 
     :param barFeed: The bar feed that each worker will use to backtest the strategy.
     :type barFeed: :class:`pyalgotrade.barfeed.BarFeed`.
-    :param strategyParameters: The set of parameters to use for backtesting. An iterable object where **each element is a tuple that holds parameter values**.
+    :param strategyParameters: The set of parameters to use for backtesting. An iterable object where **each element is a tuple that holds parameter values**,
+        or a :class:`pyalgotrade.optimizer.search.SearchDriver` that picks the parameters as results arrive.
     :param address: The address to listen for incoming worker connections.
     :type address: string.
     :param port: The port to listen for incoming worker connections.
     :type port: int.
+    :param transport: The transport used to communicate with workers. **TRANSPORT_XMLRPC** or **TRANSPORT_BINARY**.
+        Workers must use the same transport.
+    :type transport: string.
+    :param resultSink: Where to store every set of parameters along with its result. The sink gets closed once the
+        server finishes.
+    :type resultSink: :class:`pyalgotrade.optimizer.resultsinks.ResultSink`.
+    :param leaderboardSize: The number of results to keep in the leaderboard. Check :meth:`Results.getLeaderboard`.
+    :type leaderboardSize: int.
+    :param journalPath: The path to a SQLite database where results get recorded as they arrive. If the database already
+        has results, for example because a previous run was interrupted, those results are used and the parameters
+        that were already evaluated are skipped. Results for :class:`pyalgotrade.optimizer.search.Trial` instances are
+        not recorded.
+    :type journalPath: string.
     :rtype: A :class:`Results` instance with the best results found.
     """
-    s = Server(address, port)
+    s = Server(address, port, transport=transport, resultSink=resultSink, leaderboardSize=leaderboardSize, journalPath=journalPath)
     return s.serve(barFeed, strategyParameters)
@@ -0,0 +1,146 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2015 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import os
+import json
+
+from pyalgotrade.barfeed import membf
+from pyalgotrade.barfeed import columnar
+from pyalgotrade.barfeed import columnfile
+
+
+######################################################################
+## Shared bars
+# Bars are written once to a directory with one column file per instrument and a JSON manifest. Every process that
+# opens the directory maps the same files, so the bars are held in memory only once, in the page cache, no matter how
+# many processes use them.
+
+MANIFEST_FILE_NAME = "bars.json"
+
+
+# Returns a directory in shared memory, if available, for temporary files.
+def get_tmp_dir():
+    ret = None
+    if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK):
+        ret = "/dev/shm"
+    return ret
+
+
+def write(barFeed, path):
+    """Loads all the bars from a feed and writes them to a directory that can be opened with :class:`SharedBars`.
+    Returns False, without writing anything, if the bars for an instrument can't be stored in columns (for example,
+    because they mix timezones or extra columns).
+
+    :param barFeed: The bar feed to load the bars from.
+    :type barFeed: :class:`pyalgotrade.barfeed.BaseBarFeed`.
+    :param path: The directory where to write the bars. It must exist.
+    :type path: string.
+    """
+
+    barsByInstrument = dict((instrument, []) for instrument in barFeed.getRegisteredInstruments())
+    for dateTime, bars in barFeed:
+        for instrument in bars.getInstruments():
+            barsByInstrument[instrument].append(bars[instrument])
+
+    columnsByInstrument = {}
+    for instrument, bars in barsByInstrument.iteritems():
+        barColumns = columnar.from_bars(bars)
+        if barColumns is None:
+            return False
+        columnsByInstrument[instrument] = barColumns
+
+    manifest = {"frequency": barFeed.getFrequency(), "instruments": {}}
+    for i, (instrument, barColumns) in enumerate(sorted(columnsByInstrument.iteritems())):
+        fileName = "%d.bars" % (i)
+        columnfile.write(os.path.join(path, fileName), barColumns)
+        manifest["instruments"][instrument] = fileName
+    with open(os.path.join(path, MANIFEST_FILE_NAME), "w") as f:
+        json.dump(manifest, f)
+    return True
+
+
+class SharedBars(object):
+    """Bars written with :func:`write`. Columns are memory-mapped, read-only, and shared by every process that opens
+    the same directory.
+
+    :param path: The directory where the bars were written.
+    :type path: string.
+    """
+
+    def __init__(self, path):
+        with open(os.path.join(path, MANIFEST_FILE_NAME)) as f:
+            manifest = json.load(f)
+        self.__frequency = manifest["frequency"]
+        self.__bars = {}
+        for instrument, fileName in manifest["instruments"].iteritems():
+            self.__bars[instrument] = columnfile.read(os.path.join(path, fileName))
+
+    def getFrequency(self):
+        return self.__frequency
+
+    def getInstruments(self):
+        return self.__bars.keys()
+
+    def buildFeed(self, budget=None, maxLen=None):
+        """Returns a new :class:`Feed` that dispatches the shared bars. No bars are copied.
+
+        :param budget: The fraction of the date range to use, starting from the first bar, or None to use all of it.
+        :type budget: float.
+        :param maxLen: The maximum number of values that the dataseries will hold.
+        :type maxLen: int.
+        """
+
+        bars = self.__bars
+        if budget is not None:
+            bars = self.__truncate(budget)
+        ret = Feed(self.__frequency, maxLen)
+        ret.addBarsFromSequences(bars)
+        return ret
+
+    def __truncate(self, budget):
+        nonEmpty = [barColumns.getDateTimeColumn() for barColumns in self.__bars.itervalues() if len(barColumns)]
+        if len(nonEmpty) == 0:
+            return self.__bars
+        begin = min(dateTimes[0] for dateTimes in nonEmpty)
+        end = max(dateTimes[-1] for dateTimes in nonEmpty)
+        cutoff = begin + int((end - begin) * budget)
+        ret = {}
+        for instrument, barColumns in self.__bars.iteritems():
+            # Slicing the memory-mapped columns returns views, so bars are not copied.
+            ret[instrument] = barColumns.take(slice(0, barColumns.getDateTimeColumn().searchsorted(cutoff, "right")))
+        return ret
+
+
+class Feed(membf.BarFeed):
+    def __init__(self, frequency, maxLen=None):
+        super(Feed, self).__init__(frequency, maxLen)
+        self.__haveAdjClose = None
+
+    def addBarsFromSequences(self, barsByInstrument):
+        super(Feed, self).addBarsFromSequences(barsByInstrument)
+        haveAdjClose = all(barColumns.haveAdjClose() for barColumns in barsByInstrument.itervalues())
+        if self.__haveAdjClose is None:
+            self.__haveAdjClose = haveAdjClose
+        else:
+            self.__haveAdjClose = self.__haveAdjClose and haveAdjClose
+
+    def barsHaveAdjClose(self):
+        return bool(self.__haveAdjClose)
+
@@ -19,14 +19,21 @@
 """
 
 import xmlrpclib
-import pickle
 import time
 import socket
 import random
+import math
+import copy
+import collections
 import multiprocessing
 
 import pyalgotrade.logger
 from pyalgotrade import barfeed
+from pyalgotrade.strategy import multi
+from pyalgotrade.optimizer import server
+from pyalgotrade.optimizer import binaryrpc
+from pyalgotrade.optimizer import search
+from pyalgotrade.optimizer import pruning
 
 
 def call_function(function, *args, **kwargs):
@@ -47,21 +54,30 @@ def call_and_retry_on_network_error(function, retryCount, *args, **kwargs):
 
 
 class Worker(object):
-    def __init__(self, address, port, workerName=None):
-        url = "http://%s:%s/PyAlgoTradeRPC" % (address, port)
-        self.__server = xmlrpclib.ServerProxy(url, allow_none=True)
+    def __init__(self, address, port, workerName=None, transport=server.TRANSPORT_XMLRPC, pruningRule=None, singlePass=False):
+        self.__dumps, self.__loads = server.get_serializer(transport)
+        self.__pruningRule = pruningRule
+        self.__singlePass = singlePass
+        self.__pruner = None
+        if transport == server.TRANSPORT_XMLRPC:
+            url = "http://%s:%s/PyAlgoTradeRPC" % (address, port)
+            self.__server = xmlrpclib.ServerProxy(url, allow_none=True)
+        else:
+            self.__server = binaryrpc.ServerProxy(address, port)
         self.__logger = pyalgotrade.logger.getLogger(workerName)
         if workerName is None:
             self.__workerName = socket.gethostname()
         else:
             self.__workerName = workerName
+        # Servers before 0.18 only take the best result for each job.
+        self.__sendAllResults = True
 
     def getLogger(self):
         return self.__logger
 
     def getInstrumentsAndBars(self):
         ret = call_and_retry_on_network_error(self.__server.getInstrumentsAndBars, 10)
-        ret = pickle.loads(ret)
+        ret = self.__loads(ret)
         return ret
 
     def getBarsFrequency(self):
@@ -71,69 +87,167 @@ class Worker(object):
 
     def getNextJob(self):
         ret = call_and_retry_on_network_error(self.__server.getNextJob, 10)
-        ret = pickle.loads(ret)
+        ret = self.__loads(ret)
         return ret
 
-    def pushJobResults(self, jobId, result, parameters):
-        jobId = pickle.dumps(jobId)
-        result = pickle.dumps(result)
-        parameters = pickle.dumps(parameters)
-        workerName = pickle.dumps(self.__workerName)
+    def pushJobResults(self, jobId, result, parameters, allResults=None):
+        jobId = self.__dumps(jobId)
+        result = self.__dumps(result)
+        parameters = self.__dumps(parameters)
+        workerName = self.__dumps(self.__workerName)
+        if allResults is not None and self.__sendAllResults:
+            try:
+                call_and_retry_on_network_error(self.__server.pushJobResults, 10, jobId, result, parameters, workerName, self.__dumps(allResults))
+                return
+            except xmlrpclib.Fault, e:
+                if "pushJobResults() takes" not in e.faultString:
+                    raise
+                self.getLogger().warning("The server doesn't take every result. Only the best one for each job will be sent")
+                self.__sendAllResults = False
         call_and_retry_on_network_error(self.__server.pushJobResults, 10, jobId, result, parameters, workerName)
 
-    def __processJob(self, job, barsFreq, instruments, bars):
-        bestResult = None
-        parameters = job.getNextParameters()
-        bestParams = parameters
-        while parameters is not None:
-            # Wrap the bars into a feed.
-            feed = barfeed.OptimizerBarFeed(barsFreq, instruments, bars)
-            # Run the strategy.
-            self.getLogger().info("Running strategy with parameters %s" % (str(parameters)))
-            result = None
+    # Returns the strategy parameters and the budget for a set of parameters from a job.
+    # Trials run with the bars in the first part of the date range only.
+    def __unwrapParameters(self, parameters):
+        if isinstance(parameters, search.Trial):
+            return parameters.getParameters(), parameters.getBudget()
+        return parameters, None
+
+    # Runs the strategy with a set of parameters and returns a (result, pruned) tuple.
+    def __runStrategy(self, parameters, buildFeed):
+        strategyParameters, budget = self.__unwrapParameters(parameters)
+        # Wrap the bars into a feed.
+        feed = buildFeed(budget)
+        # Run the strategy.
+        self.getLogger().info("Running strategy with parameters %s" % (str(parameters)))
+        result = None
+        self.__pruner = None
+        try:
+            result = self.runStrategy(feed, *strategyParameters)
+        except Exception, e:
+            self.getLogger().exception("Error running strategy with parameters %s: %s" % (str(parameters), e))
+        return result, self.__pruner is not None and self.__pruner.isPruned()
+
+    # Runs the strategies for many sets of parameters with a single pass over the bars, one for each budget.
+    # Returns a list of (result, pruned) tuples.
+    def __runSinglePass(self, jobParameters, buildFeed):
+        ret = [(None, False)] * len(jobParameters)
+        positionsByBudget = collections.OrderedDict()
+        for i, parameters in enumerate(jobParameters):
+            positionsByBudget.setdefault(self.__unwrapParameters(parameters)[1], []).append(i)
+
+        for budget, positions in positionsByBudget.iteritems():
+            feed = buildFeed(budget)
+            strategies = []
+            for i in positions:
+                strategyParameters = self.__unwrapParameters(jobParameters[i])[0]
+                try:
+                    strat = self.buildStrategy(feed, *strategyParameters)
+                except Exception, e:
+                    self.getLogger().exception("Error building strategy with parameters %s: %s" % (str(jobParameters[i]), e))
+                    continue
+                pruner = None
+                if self.__pruningRule is not None:
+                    # Strategies run side by side so each one needs its own copy of the rule.
+                    pruner = pruning.Pruner(strat, copy.deepcopy(self.__pruningRule))
+                strategies.append((i, strat, pruner))
+
+            self.getLogger().info("Running %d strategies in a single pass" % (len(strategies)))
             try:
-                result = self.runStrategy(feed, *parameters)
+                results = multi.run([strat for i, strat, pruner in strategies])
             except Exception, e:
-                self.getLogger().exception("Error running strategy with parameters %s: %s" % (str(parameters), e))
-            self.getLogger().info("Result %s" % result)
-            if bestResult is None or result > bestResult:
+                # Find out which ones failed by running them one at a time.
+                self.getLogger().exception("Error running strategies in a single pass: %s" % (e))
+                for i, strat, pruner in strategies:
+                    ret[i] = self.__runStrategy(jobParameters[i], buildFeed)
+                continue
+            for (i, strat, pruner), result in zip(strategies, results):
+                ret[i] = (result, pruner is not None and pruner.isPruned())
+        return ret
+
+    def __processJob(self, job, buildFeed):
+        jobParameters = []
+        parameters = job.getNextParameters()
+        while parameters is not None:
+            jobParameters.append(parameters)
+            parameters = job.getNextParameters()
+
+        if self.__singlePass:
+            evaluations = self.__runSinglePass(jobParameters, buildFeed)
+        else:
+            evaluations = [self.__runStrategy(parameters, buildFeed) for parameters in jobParameters]
+
+        bestResult = None
+        bestParams = jobParameters[0]
+        allResults = []
+        for parameters, (result, pruned) in zip(jobParameters, evaluations):
+            if pruned:
+                self.getLogger().info("Pruned with result %s" % result)
+                allResults.append((parameters, result, True))
+            else:
+                self.getLogger().info("Result %s" % result)
+                allResults.append((parameters, result))
+            if not isinstance(parameters, search.Trial) and not pruned and (bestResult is None or result > bestResult):
                 bestResult = result
                 bestParams = parameters
-            # Run with the next set of parameters.
-            parameters = job.getNextParameters()
 
-        assert(bestParams is not None)
-        self.pushJobResults(job.getId(), bestResult, bestParams)
+        self.pushJobResults(job.getId(), bestResult, bestParams, allResults)
 
     # Run the strategy and return the result.
     def runStrategy(self, feed, parameters):
         raise Exception("Not implemented")
 
-    def run(self):
+    # Build the strategy without running it. Needed to run strategies in a single pass.
+    def buildStrategy(self, feed, parameters):
+        raise Exception("Not implemented")
+
+    # Call from runStrategy, before running the strategy, to stop it early if the pruning rule fires.
+    def watchStrategy(self, strat):
+        if self.__pruningRule is not None:
+            self.__pruner = pruning.Pruner(strat, self.__pruningRule)
+
+    # Returns a function that builds a new bar feed for each strategy execution.
+    # The function receives the budget, the fraction of the date range to use, or None to use all of it.
+    def getFeedBuilder(self):
         # Get the instruments and bars.
         instruments, bars = self.getInstrumentsAndBars()
         barsFreq = self.getBarsFrequency()
 
+        def buildFeed(budget=None):
+            feedBars = bars
+            if budget is not None and len(bars):
+                # OptimizerBarFeed holds a Bars instance per datetime.
+                feedBars = bars[:int(math.ceil(len(bars) * budget))]
+            return barfeed.OptimizerBarFeed(barsFreq, instruments, feedBars)
+        return buildFeed
+
+    def run(self):
+        buildFeed = self.getFeedBuilder()
+
         # Process jobs
         job = self.getNextJob()
         while job is not None:
-            self.__processJob(job, barsFreq, instruments, bars)
+            self.__processJob(job, buildFeed)
             job = self.getNextJob()
 
 
-def worker_process(strategyClass, address, port, workerName):
+def worker_process(strategyClass, address, port, workerName, transport, pruningRule, singlePass):
     class MyWorker(Worker):
+        def buildStrategy(self, barFeed, *args, **kwargs):
+            return strategyClass(barFeed, *args, **kwargs)
+
         def runStrategy(self, barFeed, *args, **kwargs):
-            strat = strategyClass(barFeed, *args, **kwargs)
+            strat = self.buildStrategy(barFeed, *args, **kwargs)
+            self.watchStrategy(strat)
             strat.run()
             return strat.getResult()
 
     # Create a worker and run it.
-    w = MyWorker(address, port, workerName)
+    w = MyWorker(address, port, workerName, transport, pruningRule, singlePass)
     w.run()
 
 
-def run(strategyClass, address, port, workerCount=None, workerName=None):
+def run(strategyClass, address, port, workerCount=None, workerName=None, transport=server.TRANSPORT_XMLRPC, pruningRule=None, singlePass=False):
     """Executes one or more worker processes that will run a strategy with the bars and parameters supplied by the server.
 
     :param strategyClass: The strategy class.
@@ -145,6 +259,15 @@ def run(strategyClass, address, port, workerCount=None, workerName=None):
     :type workerCount: int.
     :param workerName: A name for the worker. A name that identifies the worker. If None, the hostname is used.
     :type workerName: string.
+    :param transport: The transport used to communicate with the server. **pyalgotrade.optimizer.server.TRANSPORT_XMLRPC**
+        or **pyalgotrade.optimizer.server.TRANSPORT_BINARY**. It must match the one used by the server.
+    :type transport: string.
+    :param pruningRule: A rule to stop strategy executions early. Executions that get stopped are reported as pruned,
+        with the result the strategy had at that point, and are not considered for the best result.
+    :type pruningRule: :class:`pyalgotrade.optimizer.pruning.PruningRule`.
+    :param singlePass: True to run the strategies for all the parameters in a job with a single pass over the bars.
+        Check :func:`pyalgotrade.strategy.multi.run`.
+    :type singlePass: boolean.
     """
 
     assert(workerCount is None or workerCount > 0)
@@ -154,7 +277,7 @@ def run(strategyClass, address, port, workerCount=None, workerName=None):
     workers = []
     # Build the worker processes.
     for i in range(workerCount):
-        workers.append(multiprocessing.Process(target=worker_process, args=(strategyClass, address, port, workerName)))
+        workers.append(multiprocessing.Process(target=worker_process, args=(strategyClass, address, port, workerName, transport, pruningRule, singlePass)))
 
     # Start workers
     for process in workers:
@@ -74,6 +74,12 @@ class BaseStrategy(object):
     def _setBroker(self, broker):
         self.__broker = broker
 
+    # Stops processing bars from the feed. Used when many strategies share a feed. Check pyalgotrade.strategy.multi.
+    def _detachFromFeed(self):
+        self.__barFeed.getNewValuesEvent().unsubscribe(self.__onBars)
+        if isinstance(self.__broker, backtesting.Broker):
+            self.__barFeed.getNewValuesEvent().unsubscribe(self.__broker.onBars)
+
     def setUseEventDateTimeInLogs(self, useEventDateTime):
         if useEventDateTime:
             logger.Formatter.DATETIME_HOOK = self.getDispatcher().getCurrentDateTime
@@ -0,0 +1,101 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2015 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+from pyalgotrade import dispatcher
+
+
+# Drives many strategies that share a bar feed with a single dispatcher.
+class Runner(object):
+    def __init__(self, strategies):
+        self.__strategies = strategies
+        self.__barFeed = strategies[0].getFeed()
+        self.__results = [None] * len(strategies)
+        self.__active = range(len(strategies))
+        self.__dispatcher = dispatcher.Dispatcher()
+        # Each strategy has a dispatcher with its broker, the feed and any resampled feed. Subjects already added are
+        # skipped, so the shared feed is added only once.
+        for strat in strategies:
+            if strat.getFeed() is not self.__barFeed:
+                raise Exception("All the strategies must use the same bar feed")
+            for subject in strat.getDispatcher().getSubjects():
+                self.__dispatcher.addSubject(subject)
+        self.__dispatcher.getStartEvent().subscribe(self.__onStart)
+        self.__dispatcher.getIdleEvent().subscribe(self.__onIdle)
+
+    def __finish(self, i, bars):
+        strat = self.__strategies[i]
+        strat._detachFromFeed()
+        strat.onFinish(bars)
+        self.__results[i] = strat.getResult()
+
+    def __onStart(self):
+        for i in self.__active:
+            self.__strategies[i].getDispatcher().getStartEvent().emit()
+
+    def __onIdle(self):
+        for i in self.__active:
+            self.__strategies[i].getDispatcher().getIdleEvent().emit()
+
+    # Subscribed after all the strategies, so it runs once every strategy processed the bars.
+    def __onBars(self, dateTime, bars):
+        active = []
+        for i in self.__active:
+            if self.__strategies[i].getDispatcher().isStopped():
+                self.__finish(i, bars)
+            else:
+                active.append(i)
+        self.__active = active
+        if len(self.__active) == 0:
+            self.__dispatcher.stop()
+
+    def run(self):
+        self.__barFeed.getNewValuesEvent().subscribe(self.__onBars)
+        try:
+            self.__dispatcher.run()
+        finally:
+            self.__barFeed.getNewValuesEvent().unsubscribe(self.__onBars)
+
+        bars = self.__barFeed.getCurrentBars()
+        if bars is None:
+            raise Exception("Feed was empty")
+        for i in self.__active:
+            self.__finish(i, bars)
+        self.__active = []
+        return self.__results
+
+
+def run(strategies):
+    """Runs many strategies with a single pass over the bars. Strategies must share the same bar feed, so the bars are
+    loaded and dispatched once, and each strategy gets them in turn. This is equivalent to running each strategy on its
+    own, but a lot cheaper when the strategies only differ in some parameters.
+
+    :param strategies: The strategies to run. Each one should have its own broker.
+    :type strategies: A list of :class:`pyalgotrade.strategy.BaseStrategy`.
+    :rtype: A list with the result of each strategy, as returned by getResult once the strategy finished.
+
+    .. note::
+        * A strategy that calls stop is finished right after the current bars are processed, and it doesn't get more
+          bars. Its result is taken at that point, since the feed keeps moving for the others.
+        * Settings that belong to the feed, like the use of adjusted values, apply to all the strategies.
+    """
+
+    if len(strategies) == 0:
+        return []
+    return Runner(strategies).run()
@@ -18,10 +18,57 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import weakref
+
 from pyalgotrade.utils import collections
 from pyalgotrade import dataseries
 
 
+# Shared indicators, by source dataseries and then by (indicator class, arguments). Indicators are held with weak
+# references since the source dataseries keeps them alive while they are subscribed to it.
+_sharedIndicators = weakref.WeakKeyDictionary()
+
+
+def get_shared(indicatorClass, dataSeries, *args, **kwargs):
+    """Returns indicatorClass(dataSeries, \*args, \*\*kwargs), reusing the instance built by a previous call with the
+    same indicator class, source dataseries and arguments, if any. This way the values get calculated once, no matter
+    how many strategies, analyzers or helpers use the same indicator.
+
+    :param indicatorClass: The indicator class, for example :class:`pyalgotrade.technical.ma.SMA`.
+    :param dataSeries: The DataSeries instance being filtered.
+    :type dataSeries: :class:`pyalgotrade.dataseries.DataSeries`.
+
+    .. note::
+        * The maxLen argument is not part of the key. If the shared instance holds fewer values than requested, it gets
+          resized. Values that were already discarded can't be recovered.
+        * If the arguments are not hashable a new instance is returned every time.
+    """
+
+    maxLen = kwargs.pop("maxLen", None)
+    key = (indicatorClass, args, tuple(sorted(kwargs.items())))
+    try:
+        hash(key)
+    except TypeError:
+        key = None
+    if maxLen is not None:
+        kwargs["maxLen"] = maxLen
+    if key is None:
+        return indicatorClass(dataSeries, *args, **kwargs)
+
+    indicators = _sharedIndicators.setdefault(dataSeries, {})
+    ret = None
+    if key in indicators:
+        ret = indicators[key]()
+    if ret is None:
+        ret = indicatorClass(dataSeries, *args, **kwargs)
+        indicators[key] = weakref.ref(ret)
+    elif hasattr(ret, "setMaxLen"):
+        maxLen = dataseries.get_checked_max_len(maxLen)
+        if maxLen > ret.getMaxLen():
+            ret.setMaxLen(maxLen)
+    return ret
+
+
 class EventWindow(object):
     """An EventWindow class is responsible for making calculation over a moving window of values.
 
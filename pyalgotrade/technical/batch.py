@@ -0,0 +1,534 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2015 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import numpy as np
+
+from pyalgotrade import dataseries
+from pyalgotrade.barfeed import columnar
+
+
+######################################################################
+## Vectorized calculations
+# These take the whole history of values and return a float array with the indicator value for each position, and NaN
+# where the event based filter would return None. Missing values are not supported.
+
+def _to_array(values):
+    ret = np.ascontiguousarray(values, dtype=float)
+    if ret.ndim != 1:
+        raise Exception("Values must be one dimensional")
+    if np.isnan(ret).any():
+        raise Exception("Missing values are not supported in batch mode")
+    return ret
+
+
+# Returns a read only view with one row per full window.
+def _windows(values, windowSize):
+    count = len(values) - windowSize + 1
+    if count <= 0:
+        return np.zeros((0, windowSize))
+    stride = values.strides[0]
+    ret = np.lib.stride_tricks.as_strided(values, shape=(count, windowSize), strides=(stride, stride))
+    ret.flags.writeable = False
+    return ret
+
+
+# Returns a boolean array with the windows that hold a single repeated value. Rounding errors leave tiny non zero
+# deviations and slopes for them, while the event windows return exact values.
+def _flat(windows):
+    return windows.max(axis=1) == windows.min(axis=1)
+
+
+def _pad(size, values):
+    ret = np.empty(size)
+    ret.fill(np.nan)
+    if len(values):
+        ret[size - len(values):] = values
+    return ret
+
+
+# Recursive smoothing can't be vectorized with NumPy alone, so it is done with Python floats. The formula is the same
+# one used by the event windows, so the results are identical.
+def _ema_from(seed, values, period):
+    multiplier = 2.0 / (period + 1)
+    ret = [seed]
+    value = seed
+    for current in values.tolist():
+        value = (current - value) * multiplier + value
+        ret.append(value)
+    return ret
+
+
+def _wilder_from(seed, values, period):
+    ret = [seed]
+    value = seed
+    for current in values.tolist():
+        value = (value * (period - 1) + current) / float(period)
+        ret.append(value)
+    return ret
+
+
+def sma(values, period):
+    assert(period > 0)
+    values = _to_array(values)
+    return _pad(len(values), _windows(values, period).mean(axis=1))
+
+
+def ema(values, period):
+    assert(period > 1)
+    values = _to_array(values)
+    smoothed = []
+    if len(values) >= period:
+        smoothed = _ema_from(values[:period].mean(), values[period:], period)
+    return _pad(len(values), smoothed)
+
+
+def wma(values, weights):
+    assert(len(weights) > 0)
+    values = _to_array(values)
+    weights = np.asarray(weights)
+    return _pad(len(values), (_windows(values, len(weights)) * weights).sum(axis=1) / float(weights.sum()))
+
+
+def stddev(values, period, ddof=0):
+    assert(period > 0)
+    values = _to_array(values)
+    windows = _windows(values, period)
+    ret = windows.std(axis=1, ddof=ddof)
+    ret[_flat(windows)] = 0.0
+    return _pad(len(values), ret)
+
+
+def zscore(values, period, ddof=0):
+    assert(period > 1)
+    values = _to_array(values)
+    windows = _windows(values, period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ret = (windows[:, -1] - windows.mean(axis=1)) / windows.std(axis=1, ddof=ddof)
+    ret[_flat(windows)] = np.nan
+    return _pad(len(values), ret)
+
+
+def rsi(values, period):
+    assert(period > 1)
+    values = _to_array(values)
+    ret = _pad(len(values), [])
+    if len(values) >= period + 1:
+        changes = np.diff(values)
+        gains = np.where(changes < 0, 0, changes)
+        losses = np.where(changes < 0, -changes, 0)
+        avgGains = np.array(_wilder_from(gains[:period].sum() / float(period), gains[period:], period))
+        avgLosses = np.array(_wilder_from(losses[:period].sum() / float(period), losses[period:], period))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rsiValues = np.where(avgLosses == 0, 100, 100 - 100 / (1 + avgGains / avgLosses))
+        ret[period:] = rsiValues
+    return ret
+
+
+def atr(highs, lows, closes, period):
+    assert(period > 1)
+    highs = _to_array(highs)
+    lows = _to_array(lows)
+    closes = _to_array(closes)
+    trueRanges = highs - lows
+    prevCloses = closes[:-1]
+    trueRanges[1:] = np.maximum(np.maximum(trueRanges[1:], np.abs(highs[1:] - prevCloses)), np.abs(lows[1:] - prevCloses))
+    smoothed = []
+    if len(trueRanges) >= period:
+        smoothed = _wilder_from(trueRanges[:period].mean(), trueRanges[period:], period)
+    return _pad(len(trueRanges), smoothed)
+
+
+def roc(values, valuesAgo):
+    assert(valuesAgo > 0)
+    values = _to_array(values)
+    prev = values[:-valuesAgo]
+    diff = values[valuesAgo:] - prev
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ret = np.where(diff == 0, 0, np.where(prev != 0, diff / prev, np.nan))
+    return _pad(len(values), ret)
+
+
+def bollinger_bands(values, period, numStdDev):
+    """Returns the upper, middle and lower bands."""
+    middle = sma(values, period)
+    stdDev = stddev(values, period)
+    return middle + stdDev * numStdDev, middle, middle + stdDev * numStdDev * -1
+
+
+def macd(values, fastEMA, slowEMA, signalEMA):
+    """Returns the MACD, the signal and the histogram."""
+    assert(fastEMA > 0)
+    assert(slowEMA > 0)
+    assert(fastEMA < slowEMA)
+    assert(signalEMA > 0)
+
+    values = _to_array(values)
+    # The fast EMA skips the first values, just like MACD does to match TA-Lib, so both EMAs start at the same time.
+    fastEMASkip = slowEMA - fastEMA
+    diff = ema(values, slowEMA) * -1
+    diff[fastEMASkip:] += ema(values[fastEMASkip:], fastEMA)
+    signal = _pad(len(values), [])
+    if len(values) >= slowEMA:
+        signal[slowEMA - 1:] = ema(diff[slowEMA - 1:], signalEMA)
+    macdValues = np.where(np.isnan(signal), np.nan, diff)
+    return macdValues, signal, macdValues - signal
+
+
+def high(values, period):
+    values = _to_array(values)
+    return _pad(len(values), _windows(values, period).max(axis=1))
+
+
+def low(values, period):
+    values = _to_array(values)
+    return _pad(len(values), _windows(values, period).min(axis=1))
+
+
+def slope(values, period):
+    values = _to_array(values)
+    x = np.arange(period, dtype=float)
+    x -= x.mean()
+    windows = _windows(values, period)
+    ret = windows.dot(x) / (x * x).sum()
+    ret[_flat(windows)] = 0.0
+    return _pad(len(values), ret)
+
+
+######################################################################
+## Indicators
+
+class Replay(dataseries.SequenceDataSeries):
+    """A :class:`pyalgotrade.dataseries.SequenceDataSeries` that appends precomputed values in sync with another
+    dataseries, one value for every value added to it.
+
+    :param dataSeries: The DataSeries instance being filtered.
+    :type dataSeries: :class:`pyalgotrade.dataseries.DataSeries`.
+    :param values: The values to replay. NaN values are replayed as None.
+    :param inputs: The values that the dataseries is expected to produce, or None. If set, each value added to the
+        dataseries is checked against it so a replay that got out of sync fails instead of looking ahead.
+    :param maxLen: The maximum number of values to hold.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
+        opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+
+    .. note::
+        The replay starts with the next value added to the dataseries.
+    """
+
+    def __init__(self, dataSeries, values, inputs=None, maxLen=None):
+        super(Replay, self).__init__(maxLen)
+        self.__values = [None if np.isnan(value) else value for value in np.asarray(values, dtype=float).tolist()]
+        self.__inputs = None
+        if inputs is not None:
+            self.__inputs = np.asarray(inputs, dtype=float).tolist()
+            assert(len(self.__inputs) == len(self.__values))
+        self.__pos = 0
+        self.__dataSeries = dataSeries
+        dataSeries.getNewValueEvent().subscribe(self.__onNewValue)
+
+    def _getInput(self, value):
+        return value
+
+    def __onNewValue(self, dataSeries, dateTime, value):
+        pos = self.__pos
+        if pos >= len(self.__values):
+            raise Exception("There are no more values to replay")
+        if self.__inputs is not None and self._getInput(value) != self.__inputs[pos]:
+            raise Exception("The dataseries is out of sync with the values being replayed at %s" % (dateTime))
+        self.__pos += 1
+        self.appendWithDateTime(dateTime, self.__values[pos])
+
+    def getDataSeries(self):
+        return self.__dataSeries
+
+
+class SMA(Replay):
+    """Batch version of :class:`pyalgotrade.technical.ma.SMA`.
+
+    :param dataSeries: The DataSeries instance being filtered.
+    :type dataSeries: :class:`pyalgotrade.dataseries.DataSeries`.
+    :param values: All the values that the dataseries will hold.
+    :param period: The number of values to use to calculate the SMA.
+    :type period: int.
+    :param maxLen: The maximum number of values to hold.
+    :type maxLen: int.
+    """
+
+    def __init__(self, dataSeries, values, period, maxLen=None):
+        super(SMA, self).__init__(dataSeries, sma(values, period), values, maxLen)
+
+
+class EMA(Replay):
+    """Batch version of :class:`pyalgotrade.technical.ma.EMA`.
+
+    :param dataSeries: The DataSeries instance being filtered.
+    :type dataSeries: :class:`pyalgotrade.dataseries.DataSeries`.
+    :param values: All the values that the dataseries will hold.
+    :param period: The number of values to use to calculate the EMA. Must be an integer greater than 1.
+    :type period: int.
+    :param maxLen: The maximum number of values to hold.
+    :type maxLen: int.
+    """
+
+    def __init__(self, dataSeries, values, period, maxLen=None):
+        super(EMA, self).__init__(dataSeries, ema(values, period), values, maxLen)
+
+
+class WMA(Replay):
+    """Batch version of :class:`pyalgotrade.technical.ma.WMA`.
+
+    :param dataSeries: The DataSeries instance being filtered.
+    :type dataSeries: :class:`pyalgotrade.dataseries.DataSeries`.
+    :param values: All the values that the dataseries will hold.
+    :param weights: A list of int/float with the weights.
+    :type weights: list.
+    :param maxLen: The maximum number of values to hold.
+    :type maxLen: int.
+    """
+
+    def __init__(self, dataSeries, values, weights, maxLen=None):
+        super(WMA, self).__init__(dataSeries, wma(values, weights), values, maxLen)
+
+
+class StdDev(Replay):
+    """Batch version of :class:`pyalgotrade.technical.stats.StdDev`.
+
+    :param dataSeries: The DataSeries instance being filtered.
+    :type dataSeries: :class:`pyalgotrade.dataseries.DataSeries`.
+    :param values: All the values that the dataseries will hold.
+    :param period: The number of values to use to calculate the Standard deviation.
+    :type period: int.
+    :param ddof: Delta degrees of freedom.
+    :type ddof: int.
+    :param maxLen: The maximum number of values to hold.
+    :type maxLen: int.
+    """
+
+    def __init__(self, dataSeries, values, period, ddof=0, maxLen=None):
+        super(StdDev, self).__init__(dataSeries, stddev(values, period, ddof), values, maxLen)
+
+
+class ZScore(Replay):
+    """Batch version of :class:`pyalgotrade.technical.stats.ZScore`.
+
+    :param dataSeries: The DataSeries instance being filtered.
+    :type dataSeries: :class:`pyalgotrade.dataseries.DataSeries`.
+    :param values: All the values that the dataseries will hold.
+    :param period: The number of values to use to calculate the Z-Score.
+    :type period: int.
+    :param ddof: Delta degrees of freedom to use for the standard deviation.
+    :type ddof: int.
+    :param maxLen: The maximum number of values to hold.
+    :type maxLen: int.
+    """
+
+    def __init__(self, dataSeries, values, period, ddof=0, maxLen=None):
+        super(ZScore, self).__init__(dataSeries, zscore(values, period, ddof), values, maxLen)
+
+
+class RSI(Replay):
+    """Batch version of :class:`pyalgotrade.technical.rsi.RSI`.
+
+    :param dataSeries: The DataSeries instance being filtered.
+    :type dataSeries: :class:`pyalgotrade.dataseries.DataSeries`.
+    :param values: All the values that the dataseries will hold.
+    :param period: The period. Note that if period is **n**, then **n+1** values are used. Must be > 1.
+    :type period: int.
+    :param maxLen: The maximum number of values to hold.
+    :type maxLen: int.
+    """
+
+    def __init__(self, dataSeries, values, period, maxLen=None):
+        super(RSI, self).__init__(dataSeries, rsi(values, period), values, maxLen)
+
+
+class ATR(Replay):
+    """Batch version of :class:`pyalgotrade.technical.atr.ATR`.
+
+    :param barDataSeries: The BarDataSeries instance being filtered.
+    :type barDataSeries: :class:`pyalgotrade.dataseries.bards.BarDataSeries`.
+    :param bars: All the bars that the dataseries will hold, for example the ones returned by
+        :meth:`pyalgotrade.barfeed.membf.BarFeed.getBars`.
+    :param period: The average period. Must be > 1.
+    :type period: int.
+    :param useAdjustedValues: True to use adjusted Low/High/Close values.
+    :type useAdjustedValues: boolean.
+    :param maxLen: The maximum number of values to hold.
+    :type maxLen: int.
+    """
+
+    def __init__(self, barDataSeries, bars, period, useAdjustedValues=False, maxLen=None):
+        self.__useAdjustedValues = useAdjustedValues
+        if isinstance(bars, columnar.BarColumns) and not useAdjustedValues:
+            highs = bars.getHighColumn()
+            lows = bars.getLowColumn()
+            closes = bars.getCloseColumn()
+        else:
+            bars = list(bars)
+            highs = [bar_.getHigh(useAdjustedValues) for bar_ in bars]
+            lows = [bar_.getLow(useAdjustedValues) for bar_ in bars]
+            closes = [bar_.getClose(useAdjustedValues) for bar_ in bars]
+        super(ATR, self).__init__(barDataSeries, atr(highs, lows, closes, period), closes, maxLen)
+
+    def _getInput(self, value):
+        return value.getClose(self.__useAdjustedValues)
+
+
+class RateOfChange(Replay):
+    """Batch version of :class:`pyalgotrade.technical.roc.RateOfChange`.
+
+    :param dataSeries: The DataSeries instance being filtered.
+    :type dataSeries: :class:`pyalgotrade.dataseries.DataSeries`.
+    :param values: All the values that the dataseries will hold.
+    :param valuesAgo: The number of values back that a given value will compare to. Must be > 0.
+    :type valuesAgo: int.
+    :param maxLen: The maximum number of values to hold.
+    :type maxLen: int.
+    """
+
+    def __init__(self, dataSeries, values, valuesAgo, maxLen=None):
+        super(RateOfChange, self).__init__(dataSeries, roc(values, valuesAgo), values, maxLen)
+
+
+class BollingerBands(object):
+    """Batch version of :class:`pyalgotrade.technical.bollinger.BollingerBands`.
+
+    :param dataSeries: The DataSeries instance being filtered.
+    :type dataSeries: :class:`pyalgotrade.dataseries.DataSeries`.
+    :param values: All the values that the dataseries will hold.
+    :param period: The number of values to use in the calculation. Must be > 1.
+    :type period: int.
+    :param numStdDev: The number of standard deviations to use for the upper and lower bands.
+    :type numStdDev: int.
+    :param maxLen: The maximum number of values to hold.
+    :type maxLen: int.
+    """
+
+    def __init__(self, dataSeries, values, period, numStdDev, maxLen=None):
+        upper, middle, lower = bollinger_bands(values, period, numStdDev)
+        self.__upperBand = Replay(dataSeries, upper, values, maxLen)
+        self.__middleBand = Replay(dataSeries, middle, None, maxLen)
+        self.__lowerBand = Replay(dataSeries, lower, None, maxLen)
+
+    def getMaxLen(self):
+        """Returns the maximum number of values to hold."""
+        return self.__upperBand.getMaxLen()
+
+    def setMaxLen(self, maxLen):
+        """Sets the maximum number of values to hold and resizes accordingly if necessary."""
+        self.__upperBand.setMaxLen(maxLen)
+        self.__middleBand.setMaxLen(maxLen)
+        self.__lowerBand.setMaxLen(maxLen)
+
+    def getUpperBand(self):
+        """Returns the upper band as a :class:`pyalgotrade.dataseries.DataSeries`."""
+        return self.__upperBand
+
+    def getMiddleBand(self):
+        """Returns the middle band as a :class:`pyalgotrade.dataseries.DataSeries`."""
+        return self.__middleBand
+
+    def getLowerBand(self):
+        """Returns the lower band as a :class:`pyalgotrade.dataseries.DataSeries`."""
+        return self.__lowerBand
+
+
+class MACD(Replay):
+    """Batch version of :class:`pyalgotrade.technical.macd.MACD`.
+
+    :param dataSeries: The DataSeries instance being filtered.
+    :type dataSeries: :class:`pyalgotrade.dataseries.DataSeries`.
+    :param values: All the values that the dataseries will hold.
+    :param fastEMA: The number of values to use to calculate the fast EMA.
+    :type fastEMA: int.
+    :param slowEMA: The number of values to use to calculate the slow EMA.
+    :type slowEMA: int.
+    :param signalEMA: The number of values to use to calculate the signal EMA.
+    :type signalEMA: int.
+    :param maxLen: The maximum number of values to hold.
+    :type maxLen: int.
+    """
+
+    def __init__(self, dataSeries, values, fastEMA, slowEMA, signalEMA, maxLen=None):
+        macdValues, signal, histogram = macd(values, fastEMA, slowEMA, signalEMA)
+        super(MACD, self).__init__(dataSeries, macdValues, values, maxLen)
+        self.__signal = Replay(dataSeries, signal, None, maxLen)
+        self.__histogram = Replay(dataSeries, histogram, None, maxLen)
+
+    def setMaxLen(self, maxLen):
+        super(MACD, self).setMaxLen(maxLen)
+        self.__signal.setMaxLen(maxLen)
+        self.__histogram.setMaxLen(maxLen)
+
+    def getSignal(self):
+        """Returns a :class:`pyalgotrade.dataseries.DataSeries` with the EMA over the MACD."""
+        return self.__signal
+
+    def getHistogram(self):
+        """Returns a :class:`pyalgotrade.dataseries.DataSeries` with the histogram (the difference between the MACD and the Signal)."""
+        return self.__histogram
+
+
+class High(Replay):
+    """Batch version of :class:`pyalgotrade.technical.highlow.High`.
+
+    :param dataSeries: The DataSeries instance being filtered.
+    :type dataSeries: :class:`pyalgotrade.dataseries.DataSeries`.
+    :param values: All the values that the dataseries will hold.
+    :param period: The number of values to use to calculate the highest value.
+    :type period: int.
+    :param maxLen: The maximum number of values to hold.
+    :type maxLen: int.
+    """
+
+    def __init__(self, dataSeries, values, period, maxLen=None):
+        super(High, self).__init__(dataSeries, high(values, period), values, maxLen)
+
+
+class Low(Replay):
+    """Batch version of :class:`pyalgotrade.technical.highlow.Low`.
+
+    :param dataSeries: The DataSeries instance being filtered.
+    :type dataSeries: :class:`pyalgotrade.dataseries.DataSeries`.
+    :param values: All the values that the dataseries will hold.
+    :param period: The number of values to use to calculate the lowest value.
+    :type period: int.
+    :param maxLen: The maximum number of values to hold.
+    :type maxLen: int.
+    """
+
+    def __init__(self, dataSeries, values, period, maxLen=None):
+        super(Low, self).__init__(dataSeries, low(values, period), values, maxLen)
+
+
+class Slope(Replay):
+    """Batch version of :class:`pyalgotrade.technical.linreg.Slope`.
+
+    :param dataSeries: The DataSeries instance being filtered.
+    :type dataSeries: :class:`pyalgotrade.dataseries.DataSeries`.
+    :param values: All the values that the dataseries will hold.
+    :param period: The number of values to use to calculate the slope.
+    :type period: int.
+    :param maxLen: The maximum number of values to hold.
+    :type maxLen: int.
+    """
+
+    def __init__(self, dataSeries, values, period, maxLen=None):
+        super(Slope, self).__init__(dataSeries, slope(values, period), values, maxLen)
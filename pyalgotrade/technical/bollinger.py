@@ -19,7 +19,6 @@
 """
 
 from pyalgotrade import dataseries
-from pyalgotrade.technical import ma
 from pyalgotrade.technical import stats
 
 
@@ -39,28 +38,42 @@ class BollingerBands(object):
     """
 
     def __init__(self, dataSeries, period, numStdDev, maxLen=None):
-        self.__sma = ma.SMA(dataSeries, period, maxLen=maxLen)
+        # The middle band and the standard deviation are calculated from the same rolling moments.
         self.__stdDev = stats.StdDev(dataSeries, period, maxLen=maxLen)
+        self.__middleBand = dataseries.SequenceDataSeries(maxLen)
         self.__upperBand = dataseries.SequenceDataSeries(maxLen)
         self.__lowerBand = dataseries.SequenceDataSeries(maxLen)
         self.__numStdDev = numStdDev
-        # It is important to subscribe after sma and stddev since we'll use those values.
+        # It is important to subscribe after stddev since we'll use those values.
         dataSeries.getNewValueEvent().subscribe(self.__onNewValue)
 
     def __onNewValue(self, dataSeries, dateTime, value):
+        middleValue = None
         upperValue = None
         lowerValue = None
 
-        if value is not None:
-            sma = self.__sma[-1]
-            if sma is not None:
-                stdDev = self.__stdDev[-1]
-                upperValue = sma + stdDev * self.__numStdDev
-                lowerValue = sma + stdDev * self.__numStdDev * -1
+        stdDev = self.__stdDev[-1]
+        if stdDev is not None:
+            middleValue = self.__stdDev.getEventWindow().getMoments().getMean()
+            if value is not None:
+                upperValue = middleValue + stdDev * self.__numStdDev
+                lowerValue = middleValue + stdDev * self.__numStdDev * -1
 
+        self.__middleBand.appendWithDateTime(dateTime, middleValue)
         self.__upperBand.appendWithDateTime(dateTime, upperValue)
         self.__lowerBand.appendWithDateTime(dateTime, lowerValue)
 
+    def getMaxLen(self):
+        """Returns the maximum number of values to hold."""
+        return self.__upperBand.getMaxLen()
+
+    def setMaxLen(self, maxLen):
+        """Sets the maximum number of values to hold and resizes accordingly if necessary."""
+        self.__stdDev.setMaxLen(maxLen)
+        self.__middleBand.setMaxLen(maxLen)
+        self.__upperBand.setMaxLen(maxLen)
+        self.__lowerBand.setMaxLen(maxLen)
+
     def getUpperBand(self):
         """
         Returns the upper band as a :class:`pyalgotrade.dataseries.DataSeries`.
@@ -71,7 +84,7 @@ class BollingerBands(object):
         """
         Returns the middle band as a :class:`pyalgotrade.dataseries.DataSeries`.
         """
-        return self.__sma
+        return self.__middleBand
 
     def getLowerBand(self):
         """
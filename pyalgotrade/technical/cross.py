@@ -18,6 +18,8 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+from pyalgotrade import dataseries
+
 
 def compute_diff(values1, values2):
     assert(len(values1) == len(values2))
@@ -76,6 +78,8 @@ def _cross_impl(values1, values2, start, end, signCheck):
 # Since it was too complicated to make CrossAbove and CrossBelow filters work with this new model (
 # mainly because the underlying DataSeries may not get new values added at the same time, or one after
 # another) I decided to turn those into functions, cross_above and cross_below.
+# CrossAbove and CrossBelow are back as filters. Values from both DataSeries get paired by datetime, so they don't need
+# to get new values at the same time.
 
 def cross_above(values1, values2, start=-2, end=None):
     """Checks for a cross above conditions over the specified period between two DataSeries objects.
@@ -115,3 +119,102 @@ def cross_below(values1, values2, start=-2, end=None):
         The default start and end values check for cross below conditions over the last 2 values.
     """
     return _cross_impl(values1, values2, start, end, lambda x: x < 0)
+
+
+# Values from both DataSeries get paired by datetime, like dataseries.aligned.Syncer does, but without filling two
+# intermediate DataSeries.
+class _CrossFilter(dataseries.SequenceDataSeries):
+    def __init__(self, values1, values2, signCheck, maxLen):
+        super(_CrossFilter, self).__init__(maxLen)
+        self.__signCheck = signCheck
+        # Whether the last difference passes the sign check, or None if it was zero.
+        self.__lastSign = None
+        # (datetime, value) pairs that are waiting for a value with the same datetime in the other DataSeries.
+        self.__values1 = []
+        self.__values2 = []
+        values1.getNewValueEvent().subscribe(self.__onNewValue1)
+        values2.getNewValueEvent().subscribe(self.__onNewValue2)
+
+    # Pending values older than dateTime will never get paired since datetimes only move forward.
+    def __dropOlder(self, values, dateTime):
+        i = 0
+        while i < len(values) and values[i][0] < dateTime:
+            i += 1
+        del values[:i]
+
+    # Only one of the pending lists holds values at any given time: the one for the DataSeries that is ahead.
+    def __onNewValue1(self, dataSeries, dateTime, value):
+        self.__dropOlder(self.__values2, dateTime)
+        if len(self.__values2) == 0:
+            self.__values1.append((dateTime, value))
+        elif self.__values2[0][0] == dateTime:
+            self.__onPair(dateTime, value, self.__values2.pop(0)[1])
+
+    def __onNewValue2(self, dataSeries, dateTime, value):
+        self.__dropOlder(self.__values1, dateTime)
+        if len(self.__values1) == 0:
+            self.__values2.append((dateTime, value))
+        elif self.__values1[0][0] == dateTime:
+            self.__onPair(dateTime, self.__values1.pop(0)[1], value)
+
+    def __onPair(self, dateTime, value1, value2):
+        ret = 0
+        if value1 is not None and value2 is not None:
+            diff = value1 - value2
+            if diff != 0:
+                sign = bool(self.__signCheck(diff))
+                if sign and self.__lastSign is False:
+                    ret = 1
+                self.__lastSign = sign
+            else:
+                # Like cross_above and cross_below, going through equal values is not a cross.
+                self.__lastSign = None
+        self.appendWithDateTime(dateTime, ret)
+
+
+class CrossAbove(_CrossFilter):
+    """Cross above filter. Holds 1 for every datetime when values1 crossed above values2, and 0 otherwise.
+
+    :param values1: The DataSeries that crosses.
+    :type values1: :class:`pyalgotrade.dataseries.DataSeries`.
+    :param values2: The DataSeries being crossed.
+    :type values2: :class:`pyalgotrade.dataseries.DataSeries`.
+    :param maxLen: The maximum number of values to hold.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
+        opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+
+    .. note::
+        * Values get paired by datetime, and a value is added to the filter once both DataSeries have a value for the
+          same datetime.
+        * Like :func:`cross_above` with the default start and end values, a value where values1 equals values2 is not
+          part of a cross, so going from below to equal and then above is not a cross above.
+        * Values for datetimes that the other DataSeries doesn't have are skipped.
+    """
+
+    def __init__(self, values1, values2, maxLen=None):
+        super(CrossAbove, self).__init__(values1, values2, lambda x: x > 0, maxLen)
+
+
+class CrossBelow(_CrossFilter):
+    """Cross below filter. Holds 1 for every datetime when values1 crossed below values2, and 0 otherwise.
+
+    :param values1: The DataSeries that crosses.
+    :type values1: :class:`pyalgotrade.dataseries.DataSeries`.
+    :param values2: The DataSeries being crossed.
+    :type values2: :class:`pyalgotrade.dataseries.DataSeries`.
+    :param maxLen: The maximum number of values to hold.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
+        opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+
+    .. note::
+        * Values get paired by datetime, and a value is added to the filter once both DataSeries have a value for the
+          same datetime.
+        * Like :func:`cross_below` with the default start and end values, a value where values1 equals values2 is not
+          part of a cross, so going from above to equal and then below is not a cross below.
+        * Values for datetimes that the other DataSeries doesn't have are skipped.
+    """
+
+    def __init__(self, values1, values2, maxLen=None):
+        super(CrossBelow, self).__init__(values1, values2, lambda x: x < 0, maxLen)
@@ -19,21 +19,26 @@
 """
 
 from pyalgotrade import technical
+from pyalgotrade.utils import stats as utils_stats
 
 
+# Only the monotonic queue in RollingExtremum is kept, not the values in the window.
 class HighLowEventWindow(technical.EventWindow):
     def __init__(self, windowSize, useMin):
         super(HighLowEventWindow, self).__init__(windowSize)
-        self.__useMin = useMin
+        self.__extremum = utils_stats.RollingExtremum(windowSize, useMin)
+
+    def onNewValue(self, dateTime, value):
+        if value is not None:
+            self.__extremum.add(value)
+
+    def windowFull(self):
+        return self.__extremum.windowFull()
 
     def getValue(self):
         ret = None
         if self.windowFull():
-            values = self.getValues()
-            if self.__useMin:
-                ret = values.min()
-            else:
-                ret = values.max()
+            ret = self.__extremum.getValue()
         return ret
 
 
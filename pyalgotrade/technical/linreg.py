@@ -21,6 +21,7 @@
 from pyalgotrade import technical
 from pyalgotrade.utils import collections
 from pyalgotrade.utils import dt
+from pyalgotrade.utils import stats as utils_stats
 
 import numpy as np
 from scipy import stats
@@ -35,11 +36,20 @@ def lsreg(x, y):
     return res[0], res[1]
 
 
+# The regression line is calculated from the rolling moments of the timestamps and the values, so it gets updated in
+# O(1) with every new value. Raw sums of squared timestamps would lose most of their precision, so moments about the
+# mean are used instead. They get recalculated from the values in the window every utils_stats.RECALC_PERIOD values.
+def get_regression_line(moments):
+    slope = moments.getCovariance() / moments.getXVariance()
+    return slope, moments.getYMean(), moments.getXMean()
+
+
 class LeastSquaresRegressionWindow(technical.EventWindow):
     def __init__(self, windowSize):
         assert(windowSize > 1)
         super(LeastSquaresRegressionWindow, self).__init__(windowSize)
         self.__timestamps = collections.NumPyDeque(windowSize)
+        self.__moments = utils_stats.RollingCoMoments(windowSize)
 
     def onNewValue(self, dateTime, value):
         technical.EventWindow.onNewValue(self, dateTime, value)
@@ -48,12 +58,13 @@ class LeastSquaresRegressionWindow(technical.EventWindow):
             if len(self.__timestamps):
                 assert(timestamp > self.__timestamps[-1])
             self.__timestamps.append(timestamp)
+            self.__moments.add(timestamp, value)
 
     def __getValueAtImpl(self, timestamp):
         ret = None
         if self.windowFull():
-            a, b = lsreg(self.__timestamps.data(), self.getValues())
-            ret = a * timestamp + b
+            slope, meanValue, meanTimestamp = get_regression_line(self.__moments)
+            ret = meanValue + slope * (timestamp - meanTimestamp)
         return ret
 
     def getTimeStamps(self):
@@ -65,7 +76,7 @@ class LeastSquaresRegressionWindow(technical.EventWindow):
     def getValue(self):
         ret = None
         if self.windowFull():
-            ret = self.__getValueAtImpl(self.__timestamps.data()[-1])
+            ret = self.__getValueAtImpl(self.__timestamps[-1])
         return ret
 
 
@@ -94,16 +105,68 @@ class LeastSquaresRegression(technical.EventBasedFilter):
         return self.getEventWindow().getValueAt(dateTime)
 
 
+# Values are regressed against their position in the window, 0 to windowSize - 1, so the slope only depends on the sum
+# of the values and the sum of the values times their position. Both sums get updated in O(1) as the window slides,
+# and are recalculated from the values in the window every utils_stats.RECALC_PERIOD values.
+# The sums are kept relative to an anchor value, since the slope doesn't change if every value is shifted by the same
+# amount. Sums of raw prices would cancel out and leave tiny non zero slopes for flat windows, so the anchor is moved to
+# the last value once the window is flat, which resets both sums to exactly 0.
 class SlopeEventWindow(technical.EventWindow):
     def __init__(self, windowSize):
+        assert(windowSize > 1)
         super(SlopeEventWindow, self).__init__(windowSize)
-        self.__x = np.asarray(range(windowSize))
+        self.__xMean = (windowSize - 1) / 2.0
+        # The sum of the squared distances between each position and the mean position.
+        self.__xSquares = windowSize * (windowSize * windowSize - 1) / 12.0
+        self.__anchor = None
+        self.__sum = 0.0
+        self.__weightedSum = 0.0
+        self.__updates = 0
+        # The number of consecutive values equal to the last one.
+        self.__lastValue = None
+        self.__repeated = 0
+
+    def onNewValue(self, dateTime, value):
+        if value is not None:
+            if self.__anchor is None:
+                self.__anchor = value
+            values = self.getValues()
+            position = len(values)
+            if self.windowFull():
+                # Remove the oldest value. The remaining ones move one position back.
+                self.__sum -= float(values[0] - self.__anchor)
+                self.__weightedSum -= self.__sum
+                position -= 1
+            self.__weightedSum += position * (value - self.__anchor)
+            self.__sum += value - self.__anchor
+        super(SlopeEventWindow, self).onNewValue(dateTime, value)
+
+        if value is not None:
+            if value == self.__lastValue:
+                self.__repeated += 1
+            else:
+                self.__lastValue = value
+                self.__repeated = 1
+
+            self.__updates += 1
+            if self.__repeated >= self.getWindowSize():
+                # Every value in the window is equal to the new anchor.
+                self.__updates = 0
+                self.__anchor = value
+                self.__sum = 0.0
+                self.__weightedSum = 0.0
+            elif self.__updates == utils_stats.RECALC_PERIOD:
+                self.__updates = 0
+                values = self.getValues()
+                self.__anchor = values[0]
+                values = values - self.__anchor
+                self.__sum = values.sum()
+                self.__weightedSum = (values * np.arange(len(values))).sum()
 
     def getValue(self):
         ret = None
         if self.windowFull():
-            y = self.getValues()
-            ret = lsreg(self.__x, y)[0]
+            ret = (self.__weightedSum - self.__xMean * self.__sum) / self.__xSquares
         return ret
 
 
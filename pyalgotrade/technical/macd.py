@@ -58,6 +58,11 @@ class MACD(dataseries.SequenceDataSeries):
         self.__histogram = dataseries.SequenceDataSeries(maxLen)
         dataSeries.getNewValueEvent().subscribe(self.__onNewValue)
 
+    def setMaxLen(self, maxLen):
+        super(MACD, self).setMaxLen(maxLen)
+        self.__signal.setMaxLen(maxLen)
+        self.__histogram.setMaxLen(maxLen)
+
     def getSignal(self):
         """Returns a :class:`pyalgotrade.dataseries.DataSeries` with the EMA over the MACD."""
         return self.__signal
@@ -19,9 +19,30 @@
 """
 
 from pyalgotrade import technical
+from pyalgotrade.utils import stats as utils_stats
 
 
-class StdDevEventWindow(technical.EventWindow):
+# Keeps the values in RollingMoments so the mean and the variance get updated in O(1) with every new value.
+class RollingMomentsEventWindow(technical.EventWindow):
+    def __init__(self, period, recalcPeriod=utils_stats.RECALC_PERIOD):
+        super(RollingMomentsEventWindow, self).__init__(period)
+        self.__moments = utils_stats.RollingMoments(period, recalcPeriod)
+
+    def onNewValue(self, dateTime, value):
+        if value is not None:
+            self.__moments.add(value)
+
+    def getValues(self):
+        return self.__moments.getValues()
+
+    def windowFull(self):
+        return self.__moments.windowFull()
+
+    def getMoments(self):
+        return self.__moments
+
+
+class StdDevEventWindow(RollingMomentsEventWindow):
     def __init__(self, period, ddof):
         assert(period > 0)
         super(StdDevEventWindow, self).__init__(period)
@@ -30,7 +51,7 @@ class StdDevEventWindow(technical.EventWindow):
     def getValue(self):
         ret = None
         if self.windowFull():
-            ret = self.getValues().std(ddof=self.__ddof)
+            ret = self.getMoments().getStdDev(self.__ddof)
         return ret
 
 
@@ -53,7 +74,7 @@ class StdDev(technical.EventBasedFilter):
         super(StdDev, self).__init__(dataSeries, StdDevEventWindow(period, ddof), maxLen)
 
 
-class ZScoreEventWindow(technical.EventWindow):
+class ZScoreEventWindow(RollingMomentsEventWindow):
     def __init__(self, period, ddof):
         assert(period > 1)
         super(ZScoreEventWindow, self).__init__(period)
@@ -62,11 +83,9 @@ class ZScoreEventWindow(technical.EventWindow):
     def getValue(self):
         ret = None
         if self.windowFull():
-            values = self.getValues()
-            lastValue = values[-1]
-            mean = values.mean()
-            std = values.std(ddof=self.__ddof)
-            ret = (lastValue - mean) / float(std)
+            moments = self.getMoments()
+            lastValue = self.getValues()[-1]
+            ret = (lastValue - moments.getMean()) / float(moments.getStdDev(self.__ddof))
         return ret
 
 
@@ -21,6 +21,7 @@
 from pyalgotrade import technical
 from pyalgotrade.dataseries import bards
 from pyalgotrade.technical import ma
+from pyalgotrade.utils import stats as utils_stats
 
 
 def get_low_high_values(useAdjusted, bars):
@@ -39,11 +40,20 @@ class SOEventWindow(technical.EventWindow):
         assert(period > 1)
         super(SOEventWindow, self).__init__(period, dtype=object)
         self.__useAdjusted = useAdjustedValues
+        self.__lowestLow = utils_stats.RollingExtremum(period, True)
+        self.__highestHigh = utils_stats.RollingExtremum(period, False)
+
+    def onNewValue(self, dateTime, value):
+        super(SOEventWindow, self).onNewValue(dateTime, value)
+        if value is not None:
+            self.__lowestLow.add(value.getLow(self.__useAdjusted))
+            self.__highestHigh.add(value.getHigh(self.__useAdjusted))
 
     def getValue(self):
         ret = None
         if self.windowFull():
-            lowestLow, highestHigh = get_low_high_values(self.__useAdjusted, self.getValues())
+            lowestLow = self.__lowestLow.getValue()
+            highestHigh = self.__highestHigh.getValue()
             currentClose = self.getValues()[-1].getClose(self.__useAdjusted)
             closeDelta = currentClose - lowestLow
             if closeDelta:
@@ -80,6 +90,10 @@ class StochasticOscillator(technical.EventBasedFilter):
         super(StochasticOscillator, self).__init__(barDataSeries, SOEventWindow(period, useAdjustedValues), maxLen)
         self.__d = ma.SMA(self, dSMAPeriod, maxLen)
 
+    def setMaxLen(self, maxLen):
+        super(StochasticOscillator, self).setMaxLen(maxLen)
+        self.__d.setMaxLen(maxLen)
+
     def getD(self):
         """Returns a :class:`pyalgotrade.dataseries.DataSeries` with the %D values."""
         return self.__d
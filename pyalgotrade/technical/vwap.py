@@ -20,27 +20,59 @@
 
 from pyalgotrade import technical
 from pyalgotrade.dataseries import bards
+from pyalgotrade.utils import collections
+from pyalgotrade.utils import dt
+from pyalgotrade.utils import stats as utils_stats
 
+import datetime
 
+
+def get_price_volume(bar, useTypicalPrice):
+    if useTypicalPrice:
+        price = bar.getTypicalPrice()
+    else:
+        price = bar.getPrice()
+    volume = bar.getVolume()
+    return price * volume, volume
+
+
+# Keeps running sums of price * volume and volume, adding the new bar and removing the oldest one. Every
+# utils_stats.RECALC_PERIOD bars the sums are recalculated from the values in the window to discard rounding errors.
+# Only the price * volume and volume of each bar are kept, not the bars themselves.
 class VWAPEventWindow(technical.EventWindow):
     def __init__(self, windowSize, useTypicalPrice):
-        super(VWAPEventWindow, self).__init__(windowSize, dtype=object)
+        super(VWAPEventWindow, self).__init__(windowSize)
         self.__useTypicalPrice = useTypicalPrice
+        self.__priceVolumes = collections.NumPyDeque(windowSize)
+        self.__volumes = collections.NumPyDeque(windowSize)
+        self.__cumTotal = 0.0
+        self.__cumVolume = 0.0
+        self.__updates = 0
+
+    def onNewValue(self, dateTime, value):
+        if value is not None:
+            priceVolume, volume = get_price_volume(value, self.__useTypicalPrice)
+            if len(self.__volumes) == self.getWindowSize():
+                self.__cumTotal -= self.__priceVolumes[0]
+                self.__cumVolume -= self.__volumes[0]
+            self.__priceVolumes.append(priceVolume)
+            self.__volumes.append(volume)
+            self.__cumTotal += priceVolume
+            self.__cumVolume += volume
+
+            self.__updates += 1
+            if self.__updates == utils_stats.RECALC_PERIOD:
+                self.__updates = 0
+                self.__cumTotal = self.__priceVolumes.data().sum()
+                self.__cumVolume = self.__volumes.data().sum()
+
+    def windowFull(self):
+        return len(self.__volumes) == self.getWindowSize()
 
     def getValue(self):
         ret = None
         if self.windowFull():
-            cumTotal = 0
-            cumVolume = 0
-
-            for bar in self.getValues():
-                if self.__useTypicalPrice:
-                    cumTotal += bar.getTypicalPrice() * bar.getVolume()
-                else:
-                    cumTotal += bar.getPrice() * bar.getVolume()
-                cumVolume += bar.getVolume()
-
-            ret = cumTotal / float(cumVolume)
+            ret = self.__cumTotal / float(self.__cumVolume)
         return ret
 
 
@@ -67,3 +99,87 @@ class VWAP(technical.EventBasedFilter):
 
     def getPeriod(self):
         return self.getWindowSize()
+
+
+# Keeps running sums of price * volume and volume since the first bar of the current session.
+# Each bar belongs to the session that opened last, at sessionOpen in the session timezone, so sessions that cross
+# midnight are not split in two.
+class SessionVWAPEventWindow(technical.EventWindow):
+    def __init__(self, timezone, useTypicalPrice, sessionOpen=None):
+        super(SessionVWAPEventWindow, self).__init__(1)
+        self.__timezone = timezone
+        self.__useTypicalPrice = useTypicalPrice
+        self.__sessionOpen = datetime.timedelta()
+        if sessionOpen is not None:
+            self.__sessionOpen = datetime.timedelta(
+                hours=sessionOpen.hour, minutes=sessionOpen.minute, seconds=sessionOpen.second, microseconds=sessionOpen.microsecond
+            )
+        self.__sessionDate = None
+        self.__cumTotal = 0.0
+        self.__cumVolume = 0.0
+
+    # Returns the date in which the session that the bar belongs to opened.
+    def __getSessionDate(self, dateTime):
+        if self.__timezone is not None:
+            # Wall clock time, so daylight saving time changes don't move the session open.
+            dateTime = dt.localize(dateTime, self.__timezone).replace(tzinfo=None)
+        return (dateTime - self.__sessionOpen).date()
+
+    def onNewValue(self, dateTime, value):
+        if value is not None:
+            sessionDate = self.__getSessionDate(value.getDateTime())
+            if sessionDate != self.__sessionDate:
+                self.__sessionDate = sessionDate
+                self.__cumTotal = 0.0
+                self.__cumVolume = 0.0
+            priceVolume, volume = get_price_volume(value, self.__useTypicalPrice)
+            self.__cumTotal += priceVolume
+            self.__cumVolume += volume
+
+    def getSessionDate(self):
+        return self.__sessionDate
+
+    def windowFull(self):
+        return self.__sessionDate is not None
+
+    def getValue(self):
+        ret = None
+        if self.windowFull():
+            ret = self.__cumTotal / float(self.__cumVolume)
+        return ret
+
+
+class SessionVWAP(technical.EventBasedFilter):
+    """Volume Weighted Average Price filter anchored to the session open. The calculation starts over with the first
+    bar of every trading session.
+
+    :param dataSeries: The DataSeries instance being filtered.
+    :type dataSeries: :class:`pyalgotrade.dataseries.bards.BarDataSeries`.
+    :param marketSession: The market session, used to get the trading day of each bar in the session timezone.
+        If None, the date of each bar datetime is used as is.
+    :type marketSession: :class:`pyalgotrade.marketsession.MarketSession`.
+    :param useTypicalPrice: True if the typical price should be used instead of the closing price.
+    :type useTypicalPrice: boolean.
+    :param maxLen: The maximum number of values to hold.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
+        opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+    :param sessionOpen: The time, in the session timezone, at which each session opens. A session lasts until the next
+        one opens. If None, sessions open at midnight, which is fine for markets that open and close on the same day.
+        Sessions that cross midnight, like futures or FX sessions that open at 17:00 or 18:00 the day before, need it.
+    :type sessionOpen: :class:`datetime.time`.
+
+    .. note::
+        * Naive datetimes are considered to be in the session timezone.
+        * Bars are assigned to sessions using the session open alone, so breaks within a session, weekends and
+          holidays are not taken into account.
+    """
+
+    def __init__(self, dataSeries, marketSession=None, useTypicalPrice=False, maxLen=None, sessionOpen=None):
+        assert isinstance(dataSeries, bards.BarDataSeries), \
+            "dataSeries must be a dataseries.bards.BarDataSeries instance"
+
+        timezone = None
+        if marketSession is not None:
+            timezone = marketSession.getTimezone()
+        super(SessionVWAP, self).__init__(dataSeries, SessionVWAPEventWindow(timezone, useTypicalPrice, sessionOpen), maxLen)
@@ -57,85 +57,164 @@ def intersect(values1, values2, skipNone=False):
 
 
 # Like a collections.deque but using a numpy.array.
+# Values are stored in a buffer twice as big as maxLen, and the window [begin, end) moves to the right as new values get
+# appended. When the window hits the end of the buffer, the values are moved back to the beginning. This makes append
+# amortized O(1) while data() still returns a contiguous view.
 class NumPyDeque(object):
     def __init__(self, maxLen, dtype=float):
         assert maxLen > 0, "Invalid maximum length"
 
-        self.__values = np.empty(maxLen, dtype=dtype)
+        self.__values = np.empty(maxLen * 2, dtype=dtype)
         self.__maxLen = maxLen
-        self.__nextPos = 0
+        self.__begin = 0
+        self.__end = 0
 
     def getMaxLen(self):
         return self.__maxLen
 
     def append(self, value):
-        if self.__nextPos < self.__maxLen:
-            self.__values[self.__nextPos] = value
-            self.__nextPos += 1
-        else:
-            # Shift items to the left and put the last value.
+        if self.__end == len(self.__values):
+            # Move the values to the beginning of the buffer.
             # I'm not using np.roll to avoid creating a new array.
-            self.__values[0:-1] = self.__values[1:]
-            self.__values[self.__nextPos - 1] = value
+            count = self.__end - self.__begin
+            self.__values[0:count] = self.__values[self.__begin:self.__end]
+            self.__begin = 0
+            self.__end = count
+
+        self.__values[self.__end] = value
+        self.__end += 1
+        if self.__end - self.__begin > self.__maxLen:
+            self.__begin += 1
 
     def data(self):
-        # If all values are not initialized, return a portion of the array.
-        if self.__nextPos < self.__maxLen:
-            ret = self.__values[0:self.__nextPos]
-        else:
-            ret = self.__values
-        return ret
+        return self.__values[self.__begin:self.__end]
 
     def resize(self, maxLen):
         assert maxLen > 0, "Invalid maximum length"
 
         # Create empty, copy last values and swap.
-        values = np.empty(maxLen, dtype=self.__values.dtype)
-        lastValues = self.__values[0:self.__nextPos]
-        values[0:min(maxLen, len(lastValues))] = lastValues[-1*min(maxLen, len(lastValues)):]
+        values = np.empty(maxLen * 2, dtype=self.__values.dtype)
+        lastValues = self.data()[-1*min(maxLen, len(self)):]
+        values[0:len(lastValues)] = lastValues
         self.__values = values
 
         self.__maxLen = maxLen
-        if self.__nextPos >= self.__maxLen:
-            self.__nextPos = self.__maxLen
+        self.__begin = 0
+        self.__end = len(lastValues)
 
     def __len__(self):
-        return self.__nextPos
+        return self.__end - self.__begin
 
     def __getitem__(self, key):
         return self.data()[key]
 
 
+# Returns values[begin:begin + length][key] without copying values.
+def _get_list_item(values, begin, length, key):
+    if begin == 0 and len(values) == length:
+        return values[key]
+    elif isinstance(key, slice):
+        start, stop, step = key.indices(length)
+        if step > 0:
+            return values[start + begin:stop + begin:step]
+        else:
+            return [values[i + begin] for i in xrange(start, stop, step)]
+    else:
+        if key < 0:
+            key += length
+        if key < 0 or key >= length:
+            raise IndexError("list index out of range")
+        return values[key + begin]
+
+
+# A read-only view of part of a list. Slices return lists.
+class ListView(object):
+    def __init__(self, values, begin, end):
+        self.__values = values
+        self.__begin = begin
+        self.__end = end
+
+    def __len__(self):
+        return self.__end - self.__begin
+
+    def __getitem__(self, key):
+        return _get_list_item(self.__values, self.__begin, len(self), key)
+
+    def __iter__(self):
+        for i in xrange(self.__begin, self.__end):
+            yield self.__values[i]
+
+    def __reversed__(self):
+        for i in xrange(self.__end - 1, self.__begin - 1, -1):
+            yield self.__values[i]
+
+    def __contains__(self, value):
+        return value in iter(self)
+
+    def __eq__(self, other):
+        if isinstance(other, ListView):
+            other = other[:]
+        return self[:] == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(self[:])
+
+    def index(self, value):
+        return self[:].index(value)
+
+    def count(self, value):
+        return self[:].count(value)
+
+
 # I'm not using collections.deque because:
 # 1: Random access is slower.
 # 2: Slicing is not supported.
+# Discarded values are not removed from the list right away since list.pop(0) is O(n). Instead, the position of the
+# first value is tracked and the list gets compacted once the number of discarded values reaches maxLen. This makes
+# append amortized O(1).
+# data() returns a ListView instead of a list, so getting the values doesn't compact nor copy the list. The list is
+# replaced, instead of modified, when compacting it, so views that were already returned don't change.
 class ListDeque(object):
     def __init__(self, maxLen):
         assert maxLen > 0, "Invalid maximum length"
 
         self.__values = []
+        self.__begin = 0
         self.__maxLen = maxLen
 
     def getMaxLen(self):
         return self.__maxLen
 
+    def __compact(self):
+        if self.__begin:
+            self.__values = self.__values[self.__begin:]
+            self.__begin = 0
+
     def append(self, value):
         self.__values.append(value)
         # Check bounds
-        if len(self.__values) > self.__maxLen:
-            self.__values.pop(0)
+        if len(self.__values) - self.__begin > self.__maxLen:
+            self.__begin += 1
+            if self.__begin >= self.__maxLen:
+                self.__compact()
 
     def data(self):
-        return self.__values
+        return ListView(self.__values, self.__begin, len(self.__values))
 
     def resize(self, maxLen):
         assert maxLen > 0, "Invalid maximum length"
 
+        self.__compact()
         self.__maxLen = maxLen
         self.__values = self.__values[-1*maxLen:]
 
     def __len__(self):
-        return len(self.__values)
+        return len(self.__values) - self.__begin
 
     def __getitem__(self, key):
-        return self.__values[key]
+        return _get_list_item(self.__values, self.__begin, len(self), key)
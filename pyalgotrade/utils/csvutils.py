@@ -53,6 +53,25 @@ class FastDictReader(object):
         return self.__dict
 
 
+# Reads the whole file in one pass and returns a dictionary that maps each field name to a tuple with the column values.
+def read_columns(f, fieldnames=None, dialect="excel", *args, **kwargs):
+    reader = csv.reader(f, dialect, *args, **kwargs)
+    if fieldnames is None:
+        fieldnames = reader.next()
+
+    # Skip empty rows.
+    rows = [row for row in reader if row != []]
+
+    # Check that all the rows have the right number of columns.
+    assert(len(set(len(row) for row in rows) - set([len(fieldnames)])) == 0)
+
+    if len(rows):
+        columns = zip(*rows)
+    else:
+        columns = [()] * len(fieldnames)
+    return dict(zip(fieldnames, columns))
+
+
 def download_csv(url, url_params=None, content_type="text/csv"):
     response = requests.get(url, params=url_params)
 
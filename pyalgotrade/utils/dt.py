@@ -66,6 +66,22 @@ def timestamp_to_datetime(timeStamp, localized=True):
     return ret
 
 
+def datetime_to_microseconds(dateTime):
+    """ Converts a datetime.datetime to the number of microseconds since the UTC epoch.
+    Naive datetimes are treated as UTC."""
+    diff = as_utc(dateTime) - epoch_utc
+    return (diff.days * 86400 + diff.seconds) * 1000000 + diff.microseconds
+
+
+def microseconds_to_datetime(microseconds, timeZone=None):
+    """ Converts the number of microseconds since the UTC epoch to a datetime.datetime.
+    If timeZone is None a naive datetime is returned."""
+    ret = epoch_naive + datetime.timedelta(microseconds=int(microseconds))
+    if timeZone is not None:
+        ret = localize(as_utc(ret), timeZone)
+    return ret
+
+
 def get_first_monday(year):
     ret = datetime.date(year, 1, 1)
     if ret.weekday() != 0:
@@ -82,4 +98,5 @@ def get_last_monday(year):
     return ret
 
 
-epoch_utc = as_utc(datetime.datetime(1970, 1, 1))
+epoch_naive = datetime.datetime(1970, 1, 1)
+epoch_utc = as_utc(epoch_naive)
@@ -20,6 +20,8 @@
 
 import numpy
 
+from pyalgotrade.utils import collections
+
 
 def mean(values):
     ret = None
@@ -33,3 +35,338 @@ def stddev(values, ddof=1):
     if len(values):
         ret = numpy.array(values).std(ddof=ddof)
     return ret
+
+
+# Rolling moments are updated with Welford's algorithm, adding the new value and removing the oldest one. Each update
+# adds a small rounding error, so every RECALC_PERIOD updates the moments are recalculated from the values in the window.
+# Values are taken relative to an anchor, a value close to the ones in the window, so large values like timestamps
+# don't lose precision. The anchor gets moved every time the moments are recalculated.
+# Once every value in the window is the same the moments are reset to exact values, so flat windows have a variance of
+# exactly 0 instead of the rounding errors left by the values that were removed.
+RECALC_PERIOD = 1000
+
+
+class RollingMoments(object):
+    """Mean and variance of the last windowSize values, updated in O(1) as values are added.
+
+    :param windowSize: The number of values to use.
+    :type windowSize: int.
+    :param recalcPeriod: The number of updates after which the moments are recalculated from the values.
+    :type recalcPeriod: int.
+
+    .. note::
+        Values match the ones calculated by numpy over the window within a relative error of about 1e-8. The error
+        grows as the standard deviation gets smaller compared to the mean.
+    """
+
+    def __init__(self, windowSize, recalcPeriod=RECALC_PERIOD):
+        assert(windowSize > 0)
+        assert(recalcPeriod > 0)
+        self.__values = collections.NumPyDeque(windowSize)
+        self.__windowSize = windowSize
+        self.__recalcPeriod = recalcPeriod
+        self.__updates = 0
+        self.__anchor = None
+        self.__mean = 0.0
+        self.__m2 = 0.0
+        # The number of consecutive values equal to the last one.
+        self.__lastValue = None
+        self.__repeated = 0
+
+    def __len__(self):
+        return len(self.__values)
+
+    def windowFull(self):
+        return len(self.__values) == self.__windowSize
+
+    def getValues(self):
+        """Returns a numpy.array with the values in the window."""
+        return self.__values.data()
+
+    def add(self, value):
+        """Adds a value, removing the oldest one if the window is full."""
+        if self.windowFull():
+            # Remove the oldest value.
+            oldValue = float(self.__values[0]) - self.__anchor
+            count = len(self.__values) - 1
+            if count:
+                delta = oldValue - self.__mean
+                self.__mean -= delta / count
+                self.__m2 -= delta * (oldValue - self.__mean)
+            else:
+                self.__mean = 0.0
+                self.__m2 = 0.0
+        self.__values.append(value)
+        if self.__anchor is None:
+            self.__anchor = float(value)
+        if value == self.__lastValue:
+            self.__repeated += 1
+        else:
+            self.__lastValue = value
+            self.__repeated = 1
+        value -= self.__anchor
+        count = len(self.__values)
+        delta = value - self.__mean
+        self.__mean += delta / count
+        self.__m2 += delta * (value - self.__mean)
+
+        self.__updates += 1
+        if self.__repeated >= self.__windowSize:
+            # Every value in the window is equal to the new anchor.
+            self.__updates = 0
+            self.__anchor = float(self.__lastValue)
+            self.__mean = 0.0
+            self.__m2 = 0.0
+        elif self.__updates == self.__recalcPeriod:
+            self.recalculate()
+
+    def recalculate(self):
+        """Recalculates the moments from the values in the window."""
+        values = self.__values.data()
+        self.__updates = 0
+        self.__anchor = float(values.mean())
+        deltas = values - self.__anchor
+        self.__mean = deltas.mean()
+        self.__m2 = ((deltas - self.__mean) ** 2).sum()
+
+    def getMean(self):
+        ret = None
+        if len(self.__values):
+            ret = self.__anchor + self.__mean
+        return ret
+
+    def getVariance(self, ddof=0):
+        ret = None
+        count = len(self.__values) - ddof
+        if count > 0:
+            # Rounding errors could make it slightly negative.
+            ret = max(self.__m2, 0.0) / count
+        return ret
+
+    def getStdDev(self, ddof=0):
+        ret = self.getVariance(ddof)
+        if ret is not None:
+            ret = ret ** 0.5
+        return ret
+
+
+class RollingCoMoments(object):
+    """Means, variances and covariance of the last windowSize pairs of values, updated in O(1) as pairs are added.
+
+    :param windowSize: The number of pairs to use.
+    :type windowSize: int.
+    :param recalcPeriod: The number of updates after which the moments are recalculated from the values.
+    :type recalcPeriod: int.
+
+    .. note::
+        Values match the ones calculated by numpy over the window within a relative error of about 1e-8. The error
+        grows as the standard deviation gets smaller compared to the mean.
+    """
+
+    def __init__(self, windowSize, recalcPeriod=RECALC_PERIOD):
+        assert(windowSize > 0)
+        assert(recalcPeriod > 0)
+        self.__xValues = collections.NumPyDeque(windowSize)
+        self.__yValues = collections.NumPyDeque(windowSize)
+        self.__windowSize = windowSize
+        self.__recalcPeriod = recalcPeriod
+        self.__updates = 0
+        self.__xAnchor = None
+        self.__yAnchor = None
+        self.__xMean = 0.0
+        self.__yMean = 0.0
+        self.__xM2 = 0.0
+        self.__yM2 = 0.0
+        self.__c = 0.0
+        # The number of consecutive x and y values equal to the last ones.
+        self.__lastX = None
+        self.__lastY = None
+        self.__repeatedX = 0
+        self.__repeatedY = 0
+
+    def __len__(self):
+        return len(self.__xValues)
+
+    def windowFull(self):
+        return len(self.__xValues) == self.__windowSize
+
+    def getXValues(self):
+        """Returns a numpy.array with the x values in the window."""
+        return self.__xValues.data()
+
+    def getYValues(self):
+        """Returns a numpy.array with the y values in the window."""
+        return self.__yValues.data()
+
+    def add(self, x, y):
+        """Adds a pair of values, removing the oldest one if the window is full."""
+        if self.windowFull():
+            # Remove the oldest pair.
+            oldX = float(self.__xValues[0]) - self.__xAnchor
+            oldY = float(self.__yValues[0]) - self.__yAnchor
+            count = len(self.__xValues) - 1
+            if count:
+                xDelta = oldX - self.__xMean
+                yDelta = oldY - self.__yMean
+                self.__xMean -= xDelta / count
+                self.__yMean -= yDelta / count
+                self.__xM2 -= xDelta * (oldX - self.__xMean)
+                self.__yM2 -= yDelta * (oldY - self.__yMean)
+                self.__c -= xDelta * (oldY - self.__yMean)
+            else:
+                self.__xMean = 0.0
+                self.__yMean = 0.0
+                self.__xM2 = 0.0
+                self.__yM2 = 0.0
+                self.__c = 0.0
+        self.__xValues.append(x)
+        self.__yValues.append(y)
+        if self.__xAnchor is None:
+            self.__xAnchor = float(x)
+            self.__yAnchor = float(y)
+        if x == self.__lastX:
+            self.__repeatedX += 1
+        else:
+            self.__lastX = x
+            self.__repeatedX = 1
+        if y == self.__lastY:
+            self.__repeatedY += 1
+        else:
+            self.__lastY = y
+            self.__repeatedY = 1
+        x -= self.__xAnchor
+        y -= self.__yAnchor
+        count = len(self.__xValues)
+        xDelta = x - self.__xMean
+        yDelta = y - self.__yMean
+        self.__xMean += xDelta / count
+        self.__yMean += yDelta / count
+        self.__xM2 += xDelta * (x - self.__xMean)
+        self.__yM2 += yDelta * (y - self.__yMean)
+        self.__c += xDelta * (y - self.__yMean)
+
+        # A constant has no variance nor covariance.
+        if self.__repeatedX >= self.__windowSize:
+            self.__xAnchor = float(self.__lastX)
+            self.__xMean = 0.0
+            self.__xM2 = 0.0
+            self.__c = 0.0
+        if self.__repeatedY >= self.__windowSize:
+            self.__yAnchor = float(self.__lastY)
+            self.__yMean = 0.0
+            self.__yM2 = 0.0
+            self.__c = 0.0
+
+        self.__updates += 1
+        if self.__updates == self.__recalcPeriod:
+            self.recalculate()
+
+    def recalculate(self):
+        """Recalculates the moments from the values in the window."""
+        xValues = self.__xValues.data()
+        yValues = self.__yValues.data()
+        self.__updates = 0
+        self.__xAnchor = float(xValues.mean())
+        self.__yAnchor = float(yValues.mean())
+        xValues = xValues - self.__xAnchor
+        yValues = yValues - self.__yAnchor
+        self.__xMean = xValues.mean()
+        self.__yMean = yValues.mean()
+        xDeltas = xValues - self.__xMean
+        yDeltas = yValues - self.__yMean
+        self.__xM2 = (xDeltas ** 2).sum()
+        self.__yM2 = (yDeltas ** 2).sum()
+        self.__c = (xDeltas * yDeltas).sum()
+
+    def getXMean(self):
+        ret = None
+        if len(self.__xValues):
+            ret = self.__xAnchor + self.__xMean
+        return ret
+
+    def getYMean(self):
+        ret = None
+        if len(self.__yValues):
+            ret = self.__yAnchor + self.__yMean
+        return ret
+
+    def getXVariance(self, ddof=0):
+        ret = None
+        count = len(self.__xValues) - ddof
+        if count > 0:
+            ret = max(self.__xM2, 0.0) / count
+        return ret
+
+    def getYVariance(self, ddof=0):
+        ret = None
+        count = len(self.__yValues) - ddof
+        if count > 0:
+            ret = max(self.__yM2, 0.0) / count
+        return ret
+
+    def getCovariance(self, ddof=0):
+        ret = None
+        count = len(self.__xValues) - ddof
+        if count > 0:
+            ret = self.__c / count
+        return ret
+
+
+class RollingExtremum(object):
+    """Highest or lowest of the last windowSize values, updated in amortized O(1) as values are added.
+
+    :param windowSize: The number of values to use.
+    :type windowSize: int.
+    :param useMin: True to keep the lowest value, False to keep the highest one.
+    :type useMin: boolean.
+    """
+
+    def __init__(self, windowSize, useMin):
+        assert(windowSize > 0)
+        self.__windowSize = windowSize
+        self.__useMin = useMin
+        # Positions and values of the candidates, oldest first. Values are monotonic, so the extremum is the first one.
+        # A value is dropped as soon as a newer one is at least as extreme since it can't be the extremum anymore.
+        # Candidates that leave the window are not removed from the lists right away. The lists get compacted once the
+        # number of discarded candidates reaches windowSize, like ListDeque does.
+        self.__positions = []
+        self.__values = []
+        self.__begin = 0
+        self.__count = 0
+
+    def __len__(self):
+        return min(self.__count, self.__windowSize)
+
+    def windowFull(self):
+        return self.__count >= self.__windowSize
+
+    def add(self, value):
+        """Adds a value, removing the oldest one if the window is full."""
+        values = self.__values
+        positions = self.__positions
+        begin = self.__begin
+        if self.__useMin:
+            while len(values) > begin and values[-1] >= value:
+                values.pop()
+                positions.pop()
+        else:
+            while len(values) > begin and values[-1] <= value:
+                values.pop()
+                positions.pop()
+        values.append(value)
+        positions.append(self.__count)
+        self.__count += 1
+
+        if positions[begin] <= self.__count - 1 - self.__windowSize:
+            begin += 1
+            if begin >= self.__windowSize:
+                del values[:begin]
+                del positions[:begin]
+                begin = 0
+            self.__begin = begin
+
+    def getValue(self):
+        ret = None
+        if self.__count:
+            ret = self.__values[self.__begin]
+        return ret
@@ -5,28 +5,26 @@ from pyalgotrade import plotter
 from pyalgotrade.tools import yahoofinance
 from pyalgotrade.stratanalyzer import sharpe
 
-import numpy as np
-import statsmodels.api as sm
-
-
-def get_beta(values1, values2):
-    # http://statsmodels.sourceforge.net/stable/regression.html
-    model = sm.OLS(values1, values2)
-    results = model.fit()
-    return results.params[0]
+from pyalgotrade.utils import stats
 
 
 class StatArbHelper:
     def __init__(self, ds1, ds2, windowSize):
         # We're going to use datetime aligned versions of the dataseries.
         self.__ds1, self.__ds2 = aligned.datetime_aligned(ds1, ds2)
-        self.__windowSize = windowSize
+        # Rolling moments over the last windowSize values, with values2 as x and values1 as y.
+        self.__moments = stats.RollingCoMoments(windowSize)
+        # The second aligned dataseries gets its values after the first one.
+        self.__ds2.getNewValueEvent().subscribe(self.__onNewValue)
         self.__hedgeRatio = None
         self.__spread = None
         self.__spreadMean = None
         self.__spreadStd = None
         self.__zScore = None
 
+    def __onNewValue(self, dataSeries, dateTime, value):
+        self.__moments.add(value, self.__ds1[-1])
+
     def getSpread(self):
         return self.__spread
 
@@ -42,30 +40,32 @@ class StatArbHelper:
     def getHedgeRatio(self):
         return self.__hedgeRatio
 
-    def __updateHedgeRatio(self, values1, values2):
-        self.__hedgeRatio = get_beta(values1, values2)
-
-    def __updateSpreadMeanAndStd(self, values1, values2):
-        if self.__hedgeRatio is not None:
-            spread = values1 - values2 * self.__hedgeRatio
-            self.__spreadMean = spread.mean()
-            self.__spreadStd = spread.std(ddof=1)
+    def __updateHedgeRatio(self):
+        # Least squares regression without intercept of values1 on values2: sum(values1 * values2) / sum(values2 ** 2).
+        mean1 = self.__moments.getYMean()
+        mean2 = self.__moments.getXMean()
+        sumProducts = self.__moments.getCovariance() + mean1 * mean2
+        sumSquares2 = self.__moments.getXVariance() + mean2 ** 2
+        self.__hedgeRatio = sumProducts / sumSquares2
+
+    def __updateSpreadMeanAndStd(self):
+        # The spread is values1 - values2 * hedgeRatio so its mean and variance can be calculated from the moments.
+        hedgeRatio = self.__hedgeRatio
+        self.__spreadMean = self.__moments.getYMean() - hedgeRatio * self.__moments.getXMean()
+        variance = self.__moments.getYVariance(1) + hedgeRatio ** 2 * self.__moments.getXVariance(1) - 2 * hedgeRatio * self.__moments.getCovariance(1)
+        self.__spreadStd = max(variance, 0) ** 0.5
 
     def __updateSpread(self):
-        if self.__hedgeRatio is not None:
-            self.__spread = self.__ds1[-1] - self.__hedgeRatio * self.__ds2[-1]
+        self.__spread = self.__ds1[-1] - self.__hedgeRatio * self.__ds2[-1]
 
     def __updateZScore(self):
-        if self.__spread is not None and self.__spreadMean is not None and self.__spreadStd is not None:
-            self.__zScore = (self.__spread - self.__spreadMean) / float(self.__spreadStd)
+        self.__zScore = (self.__spread - self.__spreadMean) / float(self.__spreadStd)
 
     def update(self):
-        if len(self.__ds1) >= self.__windowSize:
-            values1 = np.asarray(self.__ds1[-1*self.__windowSize:])
-            values2 = np.asarray(self.__ds2[-1*self.__windowSize:])
-            self.__updateHedgeRatio(values1, values2)
+        if self.__moments.windowFull():
+            self.__updateHedgeRatio()
             self.__updateSpread()
-            self.__updateSpreadMeanAndStd(values1, values2)
+            self.__updateSpreadMeanAndStd()
             self.__updateZScore()
 
 
@@ -69,6 +69,20 @@ class BasicBarTestCase(common.TestCase):
         self.assertEquals(b1.getLow(True), b2.getLow(True))
         self.assertEquals(b1.getClose(True), b2.getClose(True))
 
+    def testNoDict(self):
+        b = bar.BasicBar(datetime.datetime.now(), 2, 3, 1, 2.1, 10, 5, bar.Frequency.DAY)
+        self.assertFalse(hasattr(b, "__dict__"))
+        with self.assertRaises(AttributeError):
+            b.someAttribute = 1
+
+    def testExtraColumns(self):
+        b = bar.BasicBar(datetime.datetime.now(), 2, 3, 1, 2.1, 10, 5, bar.Frequency.DAY)
+        self.assertEquals(b.getExtraColumns(), {})
+        b = bar.BasicBar(datetime.datetime.now(), 2, 3, 1, 2.1, 10, 5, bar.Frequency.DAY, extra={"Bid": 2})
+        self.assertEquals(b.getExtraColumns(), {"Bid": 2})
+        b2 = cPickle.loads(cPickle.dumps(b))
+        self.assertEquals(b2.getExtraColumns(), {"Bid": 2})
+
     def testNoAdjClose(self):
         b = bar.BasicBar(datetime.datetime.now(), 2, 3, 1, 2.1, 10, None, bar.Frequency.DAY)
         with self.assertRaises(Exception):
@@ -24,6 +24,8 @@ import common
 
 from pyalgotrade import barfeed
 from pyalgotrade.barfeed import common as bfcommon
+from pyalgotrade.barfeed import membf
+from pyalgotrade.barfeed import columnar
 from pyalgotrade import bar
 from pyalgotrade import dispatcher
 
@@ -81,6 +83,82 @@ class OptimizerBarFeedTestCase(common.TestCase):
         self.assertEquals(barFeed.barsHaveAdjClose(), False)
 
 
+class MemBarFeed(membf.BarFeed):
+    def barsHaveAdjClose(self):
+        return True
+
+
+class MemBarFeedTestCase(common.TestCase):
+    def __buildBars(self, days):
+        return [bar.BasicBar(datetime.datetime(2001, 1, day), day, day, day, day, day, day, bar.Frequency.DAY) for day in days]
+
+    def testSparseInstruments(self):
+        barFeed = MemBarFeed(bar.Frequency.DAY)
+        barFeed.addBarsFromSequence("orcl", self.__buildBars([1, 2, 3, 4, 5]))
+        barFeed.addBarsFromSequence("ibm", self.__buildBars([2, 5]))
+        barFeed.addBarsFromSequence("aapl", self.__buildBars([6]))
+        barFeed.addBarsFromSequence("goog", [])
+
+        for i in range(2):
+            self.assertFalse(barFeed.eof())
+            self.assertEqual(barFeed.peekDateTime(), datetime.datetime(2001, 1, 1))
+            values = [(dateTime.day, sorted(bars.getInstruments())) for dateTime, bars in barFeed]
+            self.assertEqual(values, [
+                (1, ["orcl"]),
+                (2, ["ibm", "orcl"]),
+                (3, ["orcl"]),
+                (4, ["orcl"]),
+                (5, ["ibm", "orcl"]),
+                (6, ["aapl"]),
+            ])
+            self.assertTrue(barFeed.eof())
+            self.assertEqual(barFeed.peekDateTime(), None)
+            self.assertEqual(barFeed.getNextBars(), None)
+            barFeed.reset()
+
+    def testDuplicateBars(self):
+        barFeed = MemBarFeed(bar.Frequency.DAY)
+        barFeed.addBarsFromSequence("orcl", self.__buildBars([1, 2, 2, 3]))
+        barFeed.addBarsFromSequence("ibm", self.__buildBars([1, 2, 3]))
+        with self.assertRaisesRegexp(Exception, "Duplicate bars found for.*"):
+            barFeed.loadAll()
+
+    def testEmpty(self):
+        barFeed = MemBarFeed(bar.Frequency.DAY)
+        self.assertTrue(barFeed.eof())
+        self.assertEqual(barFeed.peekDateTime(), None)
+
+    def testAddChunks(self):
+        barFeed = MemBarFeed(bar.Frequency.DAY)
+        barFeed.addBarsFromSequence("orcl", self.__buildBars([5, 6]))
+        barFeed.addBarsFromSequence("orcl", self.__buildBars([9, 7]))
+        barFeed.addBarsFromSequence("orcl", self.__buildBars([1, 3, 8]))
+        barFeed.addBarsFromSequence("orcl", self.__buildBars([2, 4]))
+        barFeed.addBarsFromSequence("orcl", [])
+        values = [bars["orcl"].getClose() for dateTime, bars in barFeed]
+        self.assertEqual(values, range(1, 10))
+
+    def testAddColumnChunks(self):
+        barFeed = MemBarFeed(bar.Frequency.DAY)
+        barFeed.addBarsFromSequence("orcl", columnar.from_bars(self.__buildBars([5, 6])))
+        barFeed.addBarsFromSequence("orcl", columnar.from_bars(self.__buildBars([9, 7])))
+        barFeed.addBarsFromSequence("orcl", columnar.from_bars(self.__buildBars([1, 3, 8])))
+        # Adding a list of bars switches to a list.
+        barFeed.addBarsFromSequence("orcl", self.__buildBars([2, 4]))
+        values = [bars["orcl"].getClose() for dateTime, bars in barFeed]
+        self.assertEqual(values, range(1, 10))
+
+    def testAddBarsFromSequences(self):
+        barFeed = MemBarFeed(bar.Frequency.DAY)
+        barFeed.addBarsFromSequences({"orcl": self.__buildBars([1, 3]), "ibm": self.__buildBars([2, 3])})
+        barFeed.addBarsFromSequences({"orcl": self.__buildBars([2])})
+        self.assertEqual(sorted(barFeed.getRegisteredInstruments()), ["ibm", "orcl"])
+        values = [(dateTime.day, sorted(bars.getInstruments())) for dateTime, bars in barFeed]
+        self.assertEqual(values, [(1, ["orcl"]), (2, ["ibm", "orcl"]), (3, ["ibm", "orcl"])])
+        with self.assertRaisesRegexp(Exception, "Can't add more bars once you started consuming bars"):
+            barFeed.addBarsFromSequences({"orcl": self.__buildBars([4])})
+
+
 class CommonTestCase(common.TestCase):
     def testSanitize(self):
         self.assertEqual(bfcommon.sanitize_ohlc(10, 12, 9, 10), (10, 12, 9, 10))
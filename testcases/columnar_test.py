@@ -0,0 +1,258 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2015 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import datetime
+import os
+
+import common
+
+from pyalgotrade.barfeed import columnar
+from pyalgotrade.barfeed import csvfeed
+from pyalgotrade import bar
+from pyalgotrade import marketsession
+
+
+class ParseDateTimesTestCase(common.TestCase):
+    def __testParse(self, values, dateTimeFormat):
+        microseconds = columnar.parse_datetimes(values, dateTimeFormat)
+        self.assertEqual(len(microseconds), len(values))
+        for value, us in zip(values, microseconds):
+            self.assertEqual(columnar.microseconds_to_naive(us), datetime.datetime.strptime(value, dateTimeFormat))
+
+    def testFixedFormat(self):
+        self.__testParse(["2000-01-03", "1999-12-31", "2012-02-29", "1969-07-20"], "%Y-%m-%d")
+        self.__testParse(["2013-01-01 13:59:00", "2013-01-01 00:00:59"], "%Y-%m-%d %H:%M:%S")
+        self.__testParse(["20081231 230600", "20090101 000000"], "%Y%m%d %H%M%S")
+        self.__testParse(["12/31/2008"], "%m/%d/%Y")
+        self.__testParse(["13:59"], "%H:%M")
+
+    def testFallback(self):
+        # Not zero padded.
+        self.__testParse(["2000-1-3", "2000-01-03"], "%Y-%m-%d")
+        # Not a fixed width format.
+        self.__testParse(["03-Jan-2000"], "%d-%b-%Y")
+
+    def testInvalid(self):
+        with self.assertRaises(ValueError):
+            columnar.parse_datetimes(["2013-02-29"], "%Y-%m-%d")
+        with self.assertRaises(ValueError):
+            columnar.parse_datetimes(["2013-13-01"], "%Y-%m-%d")
+        with self.assertRaises(ValueError):
+            columnar.parse_datetimes(["2013/01/01"], "%Y-%m-%d")
+        with self.assertRaises(ValueError):
+            columnar.parse_datetimes(["2013-01-01 24:00:00"], "%Y-%m-%d %H:%M:%S")
+
+    def testEmpty(self):
+        self.assertEqual(len(columnar.parse_datetimes([], "%Y-%m-%d")), 0)
+
+    def testSetTime(self):
+        microseconds = columnar.parse_datetimes(["2000-01-03 10:15:00", "1969-07-20 20:17:40"], "%Y-%m-%d %H:%M:%S")
+        microseconds = columnar.set_time(microseconds, datetime.time(23, 59, 59))
+        self.assertEqual(columnar.microseconds_to_naive(microseconds[0]), datetime.datetime(2000, 1, 3, 23, 59, 59))
+        self.assertEqual(columnar.microseconds_to_naive(microseconds[1]), datetime.datetime(1969, 7, 20, 23, 59, 59))
+
+
+class BarColumnsTestCase(common.TestCase):
+    def __buildBarColumns(self, dateTimes, timezone=None):
+        dateTimes = columnar.parse_datetimes(dateTimes, "%Y-%m-%d")
+        values = range(len(dateTimes))
+        return columnar.BarColumns(dateTimes, values, values, values, values, values, None, bar.Frequency.DAY, timezone, {"Seq": values})
+
+    def testGetItem(self):
+        barColumns = self.__buildBarColumns(["2000-01-03", "2000-01-04"])
+        self.assertEqual(len(barColumns), 2)
+        self.assertEqual(barColumns[0].getDateTime(), datetime.datetime(2000, 1, 3))
+        self.assertEqual(barColumns[-1].getDateTime(), datetime.datetime(2000, 1, 4))
+        self.assertEqual(barColumns[1].getClose(), 1)
+        self.assertEqual(barColumns[1].getAdjClose(), None)
+        self.assertEqual(barColumns[1].getExtraColumns(), {"Seq": 1})
+        self.assertEqual(barColumns[1].getFrequency(), bar.Frequency.DAY)
+        # Consecutive accesses to the same position don't build the bar again.
+        self.assertTrue(barColumns[1] is barColumns[1])
+        with self.assertRaises(IndexError):
+            barColumns[2]
+
+    def testSort(self):
+        barColumns = self.__buildBarColumns(["2000-01-04", "2000-01-03", "2000-01-04"])
+        self.assertFalse(barColumns.isSorted())
+        barColumns = barColumns.sort()
+        self.assertTrue(barColumns.isSorted())
+        self.assertEqual([bar_.getExtraColumns()["Seq"] for bar_ in barColumns], [1, 0, 2])
+        self.assertTrue(barColumns.sort() is barColumns)
+
+    def testConcatenate(self):
+        timezone = marketsession.USEquities.getTimezone()
+        barColumns = self.__buildBarColumns(["2000-01-04"]).concatenate(self.__buildBarColumns(["2000-01-03"]))
+        self.assertEqual(len(barColumns), 2)
+        self.assertEqual(barColumns[1].getDateTime(), datetime.datetime(2000, 1, 3))
+        self.assertFalse(barColumns.isCompatible(self.__buildBarColumns(["2000-01-03"], timezone)))
+
+    def testMerge(self):
+        barColumns1 = self.__buildBarColumns(["2000-01-03", "2000-01-05", "2000-01-07"])
+        barColumns2 = self.__buildBarColumns(["2000-01-02", "2000-01-05", "2000-01-06", "2000-01-08"])
+        barColumns = barColumns1.merge(barColumns2)
+        self.assertTrue(barColumns.isSorted())
+        self.assertEqual([bar_.getDateTime().day for bar_ in barColumns], [2, 3, 5, 5, 6, 7, 8])
+        # Bars with the same datetime keep their relative order.
+        self.assertEqual([bar_.getExtraColumns()["Seq"] for bar_ in barColumns], [0, 0, 1, 1, 2, 2, 3])
+        self.assertEqual(barColumns[2].getClose(), 1)
+        self.assertEqual(barColumns[3].getClose(), 1)
+        self.assertEqual(len(barColumns1.merge(barColumns1.take(slice(0, 0)))), 3)
+
+    def testLocalized(self):
+        timezone = marketsession.USEquities.getTimezone()
+        barColumns = self.__buildBarColumns(["2000-01-03", "2000-07-03"], timezone)
+        self.assertEqual(barColumns[0].getDateTime(), timezone.localize(datetime.datetime(2000, 1, 3)))
+        self.assertEqual(barColumns[1].getDateTime(), timezone.localize(datetime.datetime(2000, 7, 3)))
+
+    def testFromBars(self):
+        timezone = marketsession.USEquities.getTimezone()
+        # 01:30 happens twice when daylight saving time ends.
+        dateTimes = [
+            timezone.localize(datetime.datetime(2011, 11, 6, 1, 30), is_dst=True),
+            timezone.localize(datetime.datetime(2011, 11, 6, 1, 30), is_dst=False),
+        ]
+        bars = [bar.BasicBar(dateTime, 1, 2, 0.5, 1.5, 10, None, bar.Frequency.MINUTE) for dateTime in dateTimes]
+        barColumns = columnar.from_bars(bars)
+        self.assertTrue(barColumns.isUTC())
+        self.assertEqual(barColumns.getTimezone(), timezone)
+        self.assertEqual(barColumns.getAdjCloseColumn(), None)
+        self.assertEqual([bar_.getDateTime() for bar_ in barColumns], dateTimes)
+        self.assertEqual(barColumns[0].getDateTime().utcoffset(), datetime.timedelta(hours=-4))
+        self.assertEqual(barColumns[1].getDateTime().utcoffset(), datetime.timedelta(hours=-5))
+
+    def testFromBarsWithDifferentTimezones(self):
+        bars = [
+            bar.BasicBar(datetime.datetime(2011, 11, 6), 1, 2, 0.5, 1.5, 10, None, bar.Frequency.DAY),
+            bar.BasicBar(marketsession.USEquities.getTimezone().localize(datetime.datetime(2011, 11, 7)), 1, 2, 0.5, 1.5, 10, None, bar.Frequency.DAY),
+        ]
+        self.assertEqual(columnar.from_bars(bars), None)
+        self.assertEqual(columnar.from_bars([]), None)
+
+
+class GenericBarFeedTestCase(common.TestCase):
+    Rows = [
+        "Date Time,Open,High,Low,Close,Volume,Adj Close,Notes",
+        "2013-01-01 13:59:00,13.51001,13.56,13.51,13.56,273.88014126,,first",
+        "2013-01-01 13:57:00,13.51001,13.56,13.51,13.56,273.88014126,,",
+        "",
+        "2013-01-01 13:58:00,13.5,13.6,13.4,13.55,273.1,13.45,1.5",
+    ]
+
+    def __loadBars(self, path, useBulkLoader, barFilter=None, timezone=None):
+        barFeed = csvfeed.GenericBarFeed(bar.Frequency.MINUTE, timezone)
+        barFeed.setUseBulkLoader(useBulkLoader)
+        barFeed.setBarFilter(barFilter)
+        barFeed.addBarsFromCSV("orcl", path)
+        self.assertTrue(barFeed.barsHaveAdjClose())
+        return [bars["orcl"] for dateTime, bars in barFeed]
+
+    def __testSameBars(self, barFilter=None, timezone=None):
+        with common.TmpDir() as tmpPath:
+            path = os.path.join(tmpPath, "bars.csv")
+            with open(path, "w") as f:
+                f.write("\n".join(GenericBarFeedTestCase.Rows))
+
+            bars = self.__loadBars(path, False, barFilter, timezone)
+            bulkBars = self.__loadBars(path, True, barFilter, timezone)
+
+        self.assertEqual(len(bars), len(bulkBars))
+        for bar_, bulkBar in zip(bars, bulkBars):
+            self.assertEqual(bar_.getDateTime(), bulkBar.getDateTime())
+            self.assertEqual(bar_.getOpen(), bulkBar.getOpen())
+            self.assertEqual(bar_.getHigh(), bulkBar.getHigh())
+            self.assertEqual(bar_.getLow(), bulkBar.getLow())
+            self.assertEqual(bar_.getClose(), bulkBar.getClose())
+            self.assertEqual(bar_.getVolume(), bulkBar.getVolume())
+            self.assertEqual(bar_.getAdjClose(), bulkBar.getAdjClose())
+            self.assertEqual(bar_.getExtraColumns(), bulkBar.getExtraColumns())
+        return bulkBars
+
+    def testSameBarsAsRowParser(self):
+        bars = self.__testSameBars()
+        self.assertEqual(len(bars), 3)
+        self.assertEqual(bars[0].getDateTime(), datetime.datetime(2013, 1, 1, 13, 57))
+        self.assertEqual(bars[0].getAdjClose(), None)
+        self.assertEqual(bars[1].getAdjClose(), 13.45)
+        self.assertEqual(bars[1].getExtraColumns(), {"Notes": 1.5})
+        self.assertEqual(bars[2].getExtraColumns(), {"Notes": "first"})
+
+    def testSameBarsAsRowParserWithFilter(self):
+        bars = self.__testSameBars(csvfeed.DateRangeFilter(datetime.datetime(2013, 1, 1, 13, 58)))
+        self.assertEqual(len(bars), 2)
+
+    def testSameBarsAsRowParserWithRTHFilter(self):
+        timezone = marketsession.USEquities.getTimezone()
+        bars = self.__testSameBars(csvfeed.USEquitiesRTH(), timezone)
+        self.assertEqual(len(bars), 3)
+
+
+class FilteringRowParser(csvfeed.GenericRowParser):
+    def parseBar(self, csvRowDict):
+        ret = super(FilteringRowParser, self).parseBar(csvRowDict)
+        if ret.getClose() < 30:
+            ret = None
+        return ret
+
+
+class ShiftingRowParser(csvfeed.GenericRowParser):
+    def _parseDate(self, dateString):
+        return super(ShiftingRowParser, self)._parseDate(dateString) + datetime.timedelta(hours=1)
+
+
+class RowParserBarFeed(csvfeed.BarFeed):
+    def barsHaveAdjClose(self):
+        return True
+
+
+class OverridingRowParserTestCase(common.TestCase):
+    ColumnNames = {
+        "datetime": "Date",
+        "open": "Open",
+        "high": "High",
+        "low": "Low",
+        "close": "Close",
+        "volume": "Volume",
+        "adj_close": "Adj Close",
+    }
+
+    def __loadBars(self, rowParserClass, useBulkLoader):
+        rowParser = rowParserClass(OverridingRowParserTestCase.ColumnNames, "%Y-%m-%d", None, bar.Frequency.DAY, None)
+        barFeed = RowParserBarFeed(bar.Frequency.DAY)
+        barFeed.setUseBulkLoader(useBulkLoader)
+        barFeed.setCacheDir(None)
+        barFeed.addBarsFromCSV("orcl", common.get_data_file_path("orcl-2000-yahoofinance.csv"), rowParser)
+        return [bars["orcl"] for dateTime, bars in barFeed]
+
+    def testGenericParserSupportsBulkParsing(self):
+        rowParser = csvfeed.GenericRowParser(OverridingRowParserTestCase.ColumnNames, "%Y-%m-%d", None, bar.Frequency.DAY, None)
+        self.assertTrue(rowParser.supportsBulkParsing())
+
+    def testParseBarOverride(self):
+        for useBulkLoader in [False, True]:
+            bars = self.__loadBars(FilteringRowParser, useBulkLoader)
+            self.assertEqual(len(bars), 224)
+            self.assertTrue(min(bar_.getClose() for bar_ in bars) >= 30)
+
+    def testParseDateOverride(self):
+        for useBulkLoader in [False, True]:
+            bars = self.__loadBars(ShiftingRowParser, useBulkLoader)
+            self.assertEqual(len(bars), 252)
+            self.assertEqual(bars[0].getDateTime(), datetime.datetime(2000, 1, 3, 1))
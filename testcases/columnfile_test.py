@@ -0,0 +1,205 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2015 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import datetime
+import os
+
+import numpy as np
+
+import common
+
+from pyalgotrade.barfeed import columnar
+from pyalgotrade.barfeed import columnfile
+from pyalgotrade.barfeed import csvfeed
+from pyalgotrade.barfeed import yahoofeed
+from pyalgotrade.barfeed import ninjatraderfeed
+from pyalgotrade import bar
+from pyalgotrade import marketsession
+
+
+def load_bars(barFeed, instrument):
+    return [bars[instrument] for dateTime, bars in barFeed]
+
+
+def assert_same_bars(testCase, bars1, bars2):
+    testCase.assertEqual(len(bars1), len(bars2))
+    for bar1, bar2 in zip(bars1, bars2):
+        testCase.assertEqual(bar1.getDateTime(), bar2.getDateTime())
+        testCase.assertEqual(bar1.getOpen(), bar2.getOpen())
+        testCase.assertEqual(bar1.getHigh(), bar2.getHigh())
+        testCase.assertEqual(bar1.getLow(), bar2.getLow())
+        testCase.assertEqual(bar1.getClose(), bar2.getClose())
+        testCase.assertEqual(bar1.getVolume(), bar2.getVolume())
+        testCase.assertEqual(bar1.getAdjClose(), bar2.getAdjClose())
+        testCase.assertEqual(bar1.getFrequency(), bar2.getFrequency())
+        testCase.assertEqual(bar1.getExtraColumns(), bar2.getExtraColumns())
+
+
+class RowParserBarFeed(csvfeed.BarFeed):
+    def barsHaveAdjClose(self):
+        return True
+
+
+class SubclassRowParser(csvfeed.GenericRowParser):
+    pass
+
+
+class FilteringRowParser(csvfeed.GenericRowParser):
+    def parseBar(self, csvRowDict):
+        ret = super(FilteringRowParser, self).parseBar(csvRowDict)
+        if ret.getClose() < 30:
+            ret = None
+        return ret
+
+
+class ColumnFileTestCase(common.TestCase):
+
+    def testWriteAndRead(self):
+        timezone = marketsession.USEquities.getTimezone()
+        dateTimes = columnar.parse_datetimes(["2000-01-03", "2000-01-04", "2000-01-05"], "%Y-%m-%d")
+        values = [1.5, 2.5, 3.5]
+        barColumns = columnar.BarColumns(
+            dateTimes, values, values, values, values, values, [np.nan, 1, 2], bar.Frequency.DAY, timezone, {"Notes": ["a", 1.5, "c"]}
+        )
+
+        with common.TmpDir() as tmpPath:
+            path = os.path.join(tmpPath, "orcl.bars")
+            columnfile.write(path, barColumns, ["some", "key"])
+            self.assertEqual(columnfile.read_key(path), ["some", "key"])
+            readColumns = columnfile.read(path)
+            # Columns are read only views of the memory-mapped file.
+            self.assertFalse(readColumns.getCloseColumn().flags.writeable)
+            self.assertEqual(readColumns.getTimezone(), timezone)
+            assert_same_bars(self, list(barColumns), list(readColumns))
+
+    def testWriteAndReadEmpty(self):
+        empty = np.zeros(0)
+        barColumns = columnar.BarColumns(empty, empty, empty, empty, empty, empty, None, bar.Frequency.MINUTE)
+
+        with common.TmpDir() as tmpPath:
+            path = os.path.join(tmpPath, "orcl.bars")
+            columnfile.write(path, barColumns)
+            readColumns = columnfile.read(path)
+            self.assertEqual(len(readColumns), 0)
+            self.assertEqual(readColumns.getAdjCloseColumn(), None)
+            self.assertEqual(readColumns.getFrequency(), bar.Frequency.MINUTE)
+
+    def testInvalidFile(self):
+        with self.assertRaisesRegexp(Exception, ".* is not a column file"):
+            columnfile.read(common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+
+
+class CacheTestCase(common.TestCase):
+    def __testSameBars(self, buildFeed, instrument, fileName):
+        with common.TmpDir() as tmpPath:
+            csvPath = os.path.join(tmpPath, fileName)
+            cacheDir = os.path.join(tmpPath, "cache")
+            with open(common.get_data_file_path(fileName)) as src, open(csvPath, "w") as dst:
+                dst.write(src.read())
+
+            barFeed = buildFeed()
+            barFeed.addBarsFromCSV(instrument, csvPath)
+            bars = load_bars(barFeed, instrument)
+
+            for i in range(2):
+                barFeed = buildFeed()
+                barFeed.setCacheDir(cacheDir)
+                barFeed.addBarsFromCSV(instrument, csvPath)
+                assert_same_bars(self, bars, load_bars(barFeed, instrument))
+                self.assertEqual(len(os.listdir(cacheDir)), 1)
+
+    def testYahoo(self):
+        self.__testSameBars(lambda: yahoofeed.Feed(timezone=marketsession.USEquities.getTimezone()), "orcl", "orcl-2000-yahoofinance.csv")
+
+    def testGeneric(self):
+        def buildFeed():
+            ret = csvfeed.GenericBarFeed(bar.Frequency.DAY)
+            ret.setDateTimeFormat("%Y-%m-%d")
+            ret.setColumnName("datetime", "Date")
+            return ret
+        self.__testSameBars(buildFeed, "orcl", "orcl-2000-yahoofinance.csv")
+
+    def testNinjaTrader(self):
+        self.__testSameBars(lambda: ninjatraderfeed.Feed(ninjatraderfeed.Frequency.MINUTE, marketsession.USEquities.getTimezone()), "spy", "nt-spy-minute-2011-03.csv")
+
+    def testCacheHitAndInvalidation(self):
+        with common.TmpDir() as tmpPath:
+            csvPath = os.path.join(tmpPath, "bars.csv")
+            cacheDir = os.path.join(tmpPath, "cache")
+
+            def load(close):
+                with open(csvPath, "w") as f:
+                    f.write("Date Time,Open,High,Low,Close,Volume,Adj Close\n")
+                    f.write("2013-01-01 13:59:00,13.51,13.6,13.51,%s,273.88,13.5\n" % (close))
+                os.utime(csvPath, (1000000000, 1000000000))
+                barFeed = csvfeed.GenericBarFeed(bar.Frequency.MINUTE)
+                barFeed.setCacheDir(cacheDir)
+                barFeed.addBarsFromCSV("orcl", csvPath)
+                self.assertTrue(barFeed.barsHaveAdjClose())
+                return load_bars(barFeed, "orcl")[0].getClose()
+
+            self.assertEqual(load("13.56"), 13.56)
+            # Same size and modification time, so the cache is used.
+            self.assertEqual(load("13.57"), 13.56)
+            # The size changed, so the file gets parsed again.
+            self.assertEqual(load("13.575"), 13.575)
+
+    def testFilterIsNotCached(self):
+        with common.TmpDir() as tmpPath:
+            for fromDate in [datetime.datetime(2000, 6, 1), datetime.datetime(2000, 3, 1), None]:
+                barFeed = yahoofeed.Feed()
+                barFeed.setCacheDir(tmpPath)
+                barFeed.setBarFilter(csvfeed.DateRangeFilter(fromDate))
+                barFeed.addBarsFromCSV("orcl", common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+                bars = load_bars(barFeed, "orcl")
+                if fromDate is None:
+                    self.assertEqual(len(bars), 252)
+                else:
+                    self.assertEqual(bars[0].getDateTime(), fromDate)
+
+    def __loadWithRowParser(self, cacheDir, rowParserClass):
+        columnNames = {
+            "datetime": "Date",
+            "open": "Open",
+            "high": "High",
+            "low": "Low",
+            "close": "Close",
+            "volume": "Volume",
+            "adj_close": "Adj Close",
+        }
+        rowParser = rowParserClass(columnNames, "%Y-%m-%d", None, bar.Frequency.DAY, None)
+        barFeed = RowParserBarFeed(bar.Frequency.DAY)
+        barFeed.setCacheDir(cacheDir)
+        barFeed.addBarsFromCSV("orcl", common.get_data_file_path("orcl-2000-yahoofinance.csv"), rowParser)
+        return load_bars(barFeed, "orcl")
+
+    def testParserSubclassesDontShareEntries(self):
+        with common.TmpDir() as tmpPath:
+            self.assertEqual(len(self.__loadWithRowParser(tmpPath, csvfeed.GenericRowParser)), 252)
+            self.assertEqual(len(self.__loadWithRowParser(tmpPath, SubclassRowParser)), 252)
+            self.assertEqual(len(os.listdir(tmpPath)), 2)
+
+    def testOverriddenParseBarIsNotCached(self):
+        with common.TmpDir() as tmpPath:
+            for i in range(2):
+                self.assertEqual(len(self.__loadWithRowParser(tmpPath, FilteringRowParser)), 224)
+                self.assertEqual(len(os.listdir(tmpPath)), 0)
+            # Loading with the base parser afterwards is not affected.
+            self.assertEqual(len(self.__loadWithRowParser(tmpPath, csvfeed.GenericRowParser)), 252)
@@ -26,6 +26,8 @@ from pyalgotrade import dataseries
 from pyalgotrade.dataseries import bards
 from pyalgotrade.dataseries import aligned
 from pyalgotrade import bar
+from pyalgotrade import marketsession
+from pyalgotrade.utils import dt
 
 
 class TestSequenceDataSeries(common.TestCase):
@@ -142,8 +144,11 @@ class TestSequenceDataSeries(common.TestCase):
 
 
 class TestBarDataSeries(common.TestCase):
+    def buildDataSeries(self, maxLen=None):
+        return bards.BarDataSeries(maxLen)
+
     def testEmpty(self):
-        ds = bards.BarDataSeries()
+        ds = self.buildDataSeries()
         with self.assertRaises(IndexError):
             ds[-1]
         with self.assertRaises(IndexError):
@@ -152,7 +157,7 @@ class TestBarDataSeries(common.TestCase):
             ds[1000]
 
     def testAppendInvalidDatetime(self):
-        ds = bards.BarDataSeries()
+        ds = self.buildDataSeries()
         for i in range(10):
             now = datetime.datetime.now() + datetime.timedelta(seconds=i)
             ds.append(bar.BasicBar(now, 0, 0, 0, 0, 0, 0, bar.Frequency.SECOND))
@@ -164,7 +169,7 @@ class TestBarDataSeries(common.TestCase):
                 ds.append(bar.BasicBar(now - datetime.timedelta(seconds=i), 0, 0, 0, 0, 0, 0, bar.Frequency.SECOND))
 
     def testNonEmpty(self):
-        ds = bards.BarDataSeries()
+        ds = self.buildDataSeries()
         for i in range(10):
             ds.append(bar.BasicBar(datetime.datetime.now() + datetime.timedelta(seconds=i), 0, 0, 0, 0, 0, 0, bar.Frequency.SECOND))
 
@@ -176,7 +181,7 @@ class TestBarDataSeries(common.TestCase):
             self.assertTrue(ds[i] == value)
 
     def testNestedDataSeries(self):
-        ds = bards.BarDataSeries()
+        ds = self.buildDataSeries()
         for i in range(10):
             ds.append(bar.BasicBar(datetime.datetime.now() + datetime.timedelta(seconds=i), 2, 4, 1, 3, 10, 3, bar.Frequency.SECOND))
 
@@ -190,7 +195,7 @@ class TestBarDataSeries(common.TestCase):
 
     def testSeqLikeOps(self):
         seq = []
-        ds = bards.BarDataSeries()
+        ds = self.buildDataSeries()
         for i in range(10):
             bar_ = bar.BasicBar(datetime.datetime.now() + datetime.timedelta(seconds=i), 2, 4, 1, 3, 10, 3, bar.Frequency.SECOND)
             ds.append(bar_)
@@ -203,7 +208,7 @@ class TestBarDataSeries(common.TestCase):
         self.assertEqual(ds[-2:][-1], seq[-2:][-1])
 
     def testDateTimes(self):
-        ds = bards.BarDataSeries()
+        ds = self.buildDataSeries()
         firstDt = datetime.datetime.now()
         for i in range(10):
             ds.append(bar.BasicBar(firstDt + datetime.timedelta(seconds=i), 2, 4, 1, 3, 10, 3, bar.Frequency.SECOND))
@@ -213,6 +218,56 @@ class TestBarDataSeries(common.TestCase):
             self.assertEqual(ds.getDateTimes()[i], firstDt + datetime.timedelta(seconds=i))
 
 
+class TestColumnarBarDataSeries(TestBarDataSeries):
+    def buildDataSeries(self, maxLen=None):
+        return bards.ColumnarBarDataSeries(maxLen)
+
+    def testSeqLikeOps(self):
+        # Bars are rebuilt when accessed so they are not the same instances that were appended.
+        seq = []
+        ds = self.buildDataSeries()
+        for i in range(10):
+            bar_ = bar.BasicBar(datetime.datetime.now() + datetime.timedelta(seconds=i), 2, 4, 1, 3, 10, 3, bar.Frequency.SECOND)
+            ds.append(bar_)
+            seq.append(bar_)
+
+        for i in [-1, -2, 0, 1]:
+            self.assertEqual(ds[i].getDateTime(), seq[i].getDateTime())
+            self.assertEqual(ds[i].getClose(), seq[i].getClose())
+        self.assertEqual(ds[-2:][-1].getDateTime(), seq[-2:][-1].getDateTime())
+
+    def testBounded(self):
+        ds = self.buildDataSeries(maxLen=3)
+        closeValues = []
+        ds.getCloseDataSeries().getNewValueEvent().subscribe(lambda ds_, dateTime, value: closeValues.append(value))
+        firstDt = datetime.datetime(2000, 1, 1)
+        for i in range(10):
+            ds.append(bar.BasicBar(firstDt + datetime.timedelta(days=i), i, i, i, i, i * 10, None, bar.Frequency.DAY))
+
+        self.assertEqual(len(ds), 3)
+        self.assertEqual(closeValues, range(10))
+        self.assertEqual(ds.getDateTimes(), [firstDt + datetime.timedelta(days=i) for i in range(7, 10)])
+        self.assertEqual(ds.getCloseDataSeries()[:], [7, 8, 9])
+        self.assertEqual(ds.getVolumeDataSeries().getNumPyArray().tolist(), [70, 80, 90])
+        self.assertEqual(ds.getAdjCloseDataSeries()[-1], None)
+        self.assertEqual(ds[-1].getAdjClose(), None)
+        self.assertEqual(ds[-1].getFrequency(), bar.Frequency.DAY)
+
+        ds.setMaxLen(2)
+        self.assertEqual(ds.getCloseDataSeries()[:], [8, 9])
+        self.assertEqual(ds.getCloseDataSeries().getDateTimes(), [firstDt + datetime.timedelta(days=i) for i in range(8, 10)])
+
+    def testLocalizedDateTimes(self):
+        ds = self.buildDataSeries()
+        firstDt = dt.localize(datetime.datetime(2000, 1, 1, 9, 30), marketsession.USEquities.timezone)
+        for i in range(3):
+            ds.append(bar.BasicBar(firstDt + datetime.timedelta(minutes=i), 2, 4, 1, 3, 10, 3, bar.Frequency.MINUTE))
+
+        for i in range(3):
+            self.assertEqual(ds[i].getDateTime(), firstDt + datetime.timedelta(minutes=i))
+            self.assertEqual(ds[i].getDateTime().tzinfo.zone, "US/Eastern")
+
+
 class TestDateAlignedDataSeries(common.TestCase):
     def testNotAligned(self):
         size = 20
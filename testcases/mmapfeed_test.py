@@ -0,0 +1,136 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2015 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import datetime
+import os
+
+import numpy as np
+
+import common
+import barfeed_test
+import columnfile_test
+import smacrossover_strategy_test
+
+from pyalgotrade.barfeed import mmapfeed
+from pyalgotrade.barfeed import columnar
+from pyalgotrade.barfeed import columnfile
+from pyalgotrade.barfeed import yahoofeed
+from pyalgotrade.utils import csvutils
+from pyalgotrade import bar
+from pyalgotrade import marketsession
+
+
+def write_column_file(csvFileName, path, timezone=None):
+    rowParser = yahoofeed.RowParser(datetime.time(0, 0), bar.Frequency.DAY, timezone)
+    columns = csvutils.read_columns(open(common.get_data_file_path(csvFileName), "r"))
+    columnfile.write(path, rowParser.parseBarColumns(columns).sort())
+
+
+class FeedTestCase(common.TestCase):
+    CSVFiles = {
+        "spy": "spy-2011-yahoofinance.csv",
+        "goog": "goog-2011-yahoofinance.csv",
+        "nikkei": "nikkei-2011-yahoofinance.csv",
+    }
+
+    def __buildFeeds(self, tmpPath, chunkSize, timezone=None):
+        memFeed = yahoofeed.Feed(timezone=timezone)
+        mmapFeed = mmapfeed.Feed(bar.Frequency.DAY, chunkSize=chunkSize)
+        for instrument, csvFileName in FeedTestCase.CSVFiles.iteritems():
+            path = os.path.join(tmpPath, "%s.bars" % instrument)
+            write_column_file(csvFileName, path, timezone)
+            memFeed.addBarsFromCSV(instrument, common.get_data_file_path(csvFileName))
+            mmapFeed.addBarsFromFile(instrument, path)
+        return memFeed, mmapFeed
+
+    def __testSameBars(self, chunkSize, timezone=None):
+        with common.TmpDir() as tmpPath:
+            memFeed, mmapFeed = self.__buildFeeds(tmpPath, chunkSize, timezone)
+            for i in range(2):
+                memBars = [bars for dateTime, bars in memFeed]
+                mmapBars = [bars for dateTime, bars in mmapFeed]
+                self.assertEqual(len(memBars), len(mmapBars))
+                for bars1, bars2 in zip(memBars, mmapBars):
+                    self.assertEqual(bars1.getDateTime(), bars2.getDateTime())
+                    self.assertEqual(sorted(bars1.getInstruments()), sorted(bars2.getInstruments()))
+                    for instrument in bars1.getInstruments():
+                        columnfile_test.assert_same_bars(self, [bars1[instrument]], [bars2[instrument]])
+                self.assertTrue(mmapFeed.eof())
+                self.assertEqual(mmapFeed.peekDateTime(), None)
+                memFeed.reset()
+                mmapFeed.reset()
+
+    def testSameBarsAsMemFeed(self):
+        self.__testSameBars(mmapfeed.DEFAULT_CHUNK_SIZE)
+
+    def testSameBarsAsMemFeedWithSmallChunks(self):
+        self.__testSameBars(7)
+
+    def testSameBarsAsMemFeedWithTimezone(self):
+        self.__testSameBars(1, marketsession.USEquities.getTimezone())
+
+    def testBaseBarFeed(self):
+        with common.TmpDir() as tmpPath:
+            path = os.path.join(tmpPath, "orcl.bars")
+            write_column_file("orcl-2000-yahoofinance.csv", path)
+            barFeed = mmapfeed.Feed(bar.Frequency.DAY)
+            barFeed.addBarsFromFile("orcl", path)
+            barfeed_test.check_base_barfeed(self, barFeed, True)
+
+    def testStrategy(self):
+        with common.TmpDir() as tmpPath:
+            path = os.path.join(tmpPath, "orcl.bars")
+            write_column_file("orcl-2001-yahoofinance.csv", path)
+            barFeed = mmapfeed.Feed(bar.Frequency.DAY, chunkSize=16)
+            barFeed.addBarsFromFile("orcl", path)
+            strat = smacrossover_strategy_test.MarketOrderStrategy(barFeed, 10, 25)
+            strat.run()
+            self.assertEqual(round(strat.getFinalValue(), 2), 1000 - 22.7)
+
+    def testUnsortedFile(self):
+        with common.TmpDir() as tmpPath:
+            path = os.path.join(tmpPath, "orcl.bars")
+            dateTimes = columnar.parse_datetimes(["2000-01-03", "2000-01-05", "2000-01-04"], "%Y-%m-%d")
+            values = np.ones(len(dateTimes))
+            columnfile.write(path, columnar.BarColumns(dateTimes, values, values, values, values, values, None, bar.Frequency.DAY))
+            barFeed = mmapfeed.Feed(bar.Frequency.DAY, chunkSize=2)
+            with self.assertRaisesRegexp(Exception, "Bars in .* are not sorted"):
+                barFeed.addBarsFromFile("orcl", path)
+
+    def testDuplicateBars(self):
+        with common.TmpDir() as tmpPath:
+            path = os.path.join(tmpPath, "orcl.bars")
+            dateTimes = columnar.parse_datetimes(["2000-01-03", "2000-01-04", "2000-01-04"], "%Y-%m-%d")
+            values = np.ones(len(dateTimes))
+            columnfile.write(path, columnar.BarColumns(dateTimes, values, values, values, values, values, None, bar.Frequency.DAY))
+            barFeed = mmapfeed.Feed(bar.Frequency.DAY)
+            barFeed.addBarsFromFile("orcl", path)
+            self.assertFalse(barFeed.barsHaveAdjClose())
+            with self.assertRaisesRegexp(Exception, "Duplicate bars found for.*"):
+                barFeed.loadAll()
+
+    def testAddTwice(self):
+        with common.TmpDir() as tmpPath:
+            path = os.path.join(tmpPath, "orcl.bars")
+            write_column_file("orcl-2000-yahoofinance.csv", path)
+            barFeed = mmapfeed.Feed(bar.Frequency.DAY)
+            barFeed.addBarsFromFile("orcl", path)
+            with self.assertRaisesRegexp(Exception, "Bars for orcl were already added"):
+                barFeed.addBarsFromFile("orcl", path)
@@ -0,0 +1,107 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2015 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import sys
+
+import common
+
+from pyalgotrade import strategy
+from pyalgotrade.strategy import multi
+from pyalgotrade.barfeed import yahoofeed
+from pyalgotrade.stratanalyzer import drawdown
+
+sys.path.append("samples")
+import sma_crossover
+
+
+# Stops after processing a number of bars.
+class StoppingStrategy(sma_crossover.SMACrossOver):
+    def __init__(self, feed, instrument, smaPeriod, stopAfter):
+        super(StoppingStrategy, self).__init__(feed, instrument, smaPeriod)
+        self.__stopAfter = stopAfter
+        self.__barCount = 0
+        self.finishCount = 0
+
+    def onBars(self, bars):
+        super(StoppingStrategy, self).onBars(bars)
+        self.__barCount += 1
+        if self.__barCount == self.__stopAfter:
+            self.stop()
+
+    def onFinish(self, bars):
+        self.finishCount += 1
+
+
+class FailingStrategy(strategy.BacktestingStrategy):
+    def onBars(self, bars):
+        raise Exception("oh no!")
+
+
+def build_feed():
+    ret = yahoofeed.Feed()
+    ret.addBarsFromCSV("orcl", common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+    return ret
+
+
+class MultiStrategyTestCase(common.TestCase):
+    def __runOnItsOwn(self, strategyClass, *args):
+        strat = strategyClass(build_feed(), *args)
+        drawDown = drawdown.DrawDown()
+        strat.attachAnalyzer(drawDown)
+        strat.run()
+        return strat.getResult(), drawDown.getMaxDrawDown()
+
+    def testSameResults(self):
+        barFeed = build_feed()
+        strategies = []
+        drawDowns = []
+        for smaPeriod in range(10, 40, 5):
+            strat = sma_crossover.SMACrossOver(barFeed, "orcl", smaPeriod)
+            drawDowns.append(drawdown.DrawDown())
+            strat.attachAnalyzer(drawDowns[-1])
+            strategies.append(strat)
+
+        results = multi.run(strategies)
+        for smaPeriod, result, drawDown in zip(range(10, 40, 5), results, drawDowns):
+            self.assertEqual((result, drawDown.getMaxDrawDown()), self.__runOnItsOwn(sma_crossover.SMACrossOver, "orcl", smaPeriod))
+        self.assertEqual(round(results[2], 2), 1295462.6)
+
+    def testStop(self):
+        barFeed = build_feed()
+        strategies = [StoppingStrategy(barFeed, "orcl", 20, stopAfter) for stopAfter in (100, 300, 200)]
+        results = multi.run(strategies)
+        for strat, result, stopAfter in zip(strategies, results, (100, 300, 200)):
+            self.assertEqual(strat.finishCount, 1)
+            self.assertEqual(result, self.__runOnItsOwn(StoppingStrategy, "orcl", 20, stopAfter)[0])
+        # There are only 252 bars, so the second one runs until the end.
+        self.assertEqual(results[1], self.__runOnItsOwn(sma_crossover.SMACrossOver, "orcl", 20)[0])
+        self.assertNotEqual(results[0], results[2])
+
+    def testError(self):
+        barFeed = build_feed()
+        with self.assertRaisesRegexp(Exception, "oh no!"):
+            multi.run([sma_crossover.SMACrossOver(barFeed, "orcl", 20), FailingStrategy(barFeed)])
+
+    def testDifferentFeeds(self):
+        with self.assertRaisesRegexp(Exception, "same bar feed"):
+            multi.run([sma_crossover.SMACrossOver(build_feed(), "orcl", 20), sma_crossover.SMACrossOver(build_feed(), "orcl", 30)])
+
+    def testEmpty(self):
+        self.assertEqual(multi.run([]), [])
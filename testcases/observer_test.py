@@ -96,6 +96,9 @@ class RealtimeFeed(observer.Subject):
 
 
 class DispatcherTestCase(common.TestCase):
+    def buildDispatcher(self):
+        return dispatcher.Dispatcher()
+
     def test1NrtFeed(self):
         values = []
         now = datetime.datetime.now()
@@ -103,7 +106,7 @@ class DispatcherTestCase(common.TestCase):
         nrtFeed = NonRealtimeFeed(copy.copy(datetimes))
         nrtFeed.getEvent().subscribe(lambda x: values.append(x))
 
-        disp = dispatcher.Dispatcher()
+        disp = self.buildDispatcher()
         disp.addSubject(nrtFeed)
         disp.run()
 
@@ -119,7 +122,7 @@ class DispatcherTestCase(common.TestCase):
         nrtFeed2 = NonRealtimeFeed(copy.copy(datetimes2))
         nrtFeed2.getEvent().subscribe(lambda x: values.append(x))
 
-        disp = dispatcher.Dispatcher()
+        disp = self.buildDispatcher()
         disp.addSubject(nrtFeed1)
         disp.addSubject(nrtFeed2)
         disp.run()
@@ -135,7 +138,7 @@ class DispatcherTestCase(common.TestCase):
         nrtFeed = RealtimeFeed(copy.copy(datetimes))
         nrtFeed.getEvent().subscribe(lambda x: values.append(x))
 
-        disp = dispatcher.Dispatcher()
+        disp = self.buildDispatcher()
         disp.addSubject(nrtFeed)
         disp.run()
 
@@ -151,7 +154,7 @@ class DispatcherTestCase(common.TestCase):
         nrtFeed2 = RealtimeFeed(copy.copy(datetimes2))
         nrtFeed2.getEvent().subscribe(lambda x: values.append(x))
 
-        disp = dispatcher.Dispatcher()
+        disp = self.buildDispatcher()
         disp.addSubject(nrtFeed1)
         disp.addSubject(nrtFeed2)
         disp.run()
@@ -171,7 +174,7 @@ class DispatcherTestCase(common.TestCase):
         nrtFeed2 = NonRealtimeFeed(copy.copy(datetimes2))
         nrtFeed2.getEvent().subscribe(lambda x: values.append(x))
 
-        disp = dispatcher.Dispatcher()
+        disp = self.buildDispatcher()
         disp.addSubject(nrtFeed1)
         disp.addSubject(nrtFeed2)
         disp.run()
@@ -187,19 +190,19 @@ class DispatcherTestCase(common.TestCase):
         feed2 = RealtimeFeed([], 3)
         feed1 = RealtimeFeed([], 0)
 
-        disp = dispatcher.Dispatcher()
+        disp = self.buildDispatcher()
         disp.addSubject(feed3)
         disp.addSubject(feed2)
         disp.addSubject(feed1)
         self.assertEqual(disp.getSubjects(), [feed1, feed2, feed3])
 
-        disp = dispatcher.Dispatcher()
+        disp = self.buildDispatcher()
         disp.addSubject(feed1)
         disp.addSubject(feed2)
         disp.addSubject(feed3)
         self.assertEqual(disp.getSubjects(), [feed1, feed2, feed3])
 
-        disp = dispatcher.Dispatcher()
+        disp = self.buildDispatcher()
         disp.addSubject(feed3)
         disp.addSubject(feed4)
         disp.addSubject(feed2)
@@ -214,7 +217,7 @@ class DispatcherTestCase(common.TestCase):
         feed1.getEvent().subscribe(lambda x: values.append(x))
         feed2.getEvent().subscribe(lambda x: values.append(x))
 
-        disp = dispatcher.Dispatcher()
+        disp = self.buildDispatcher()
         disp.addSubject(feed2)
         disp.addSubject(feed1)
         self.assertEqual(disp.getSubjects(), [feed1, feed2])
@@ -222,6 +225,111 @@ class DispatcherTestCase(common.TestCase):
         # Check that although feed2 is realtime, feed1 was dispatched before.
         self.assertTrue(values[0] < values[1])
 
+    def testInterleavedNrtFeeds(self):
+        values = []
+        now = datetime.datetime.now()
+        datetimes = [now + datetime.timedelta(seconds=i) for i in xrange(30)]
+        disp = self.buildDispatcher()
+        for i in xrange(3):
+            nrtFeed = NonRealtimeFeed(datetimes[i::3])
+            nrtFeed.getEvent().subscribe(lambda x: values.append(x))
+            disp.addSubject(nrtFeed)
+        disp.run()
+
+        self.assertEqual(values, datetimes)
+
+    def testSimultaneousNrtFeeds(self):
+        values = []
+        now = datetime.datetime.now()
+        datetimes = [now + datetime.timedelta(seconds=i) for i in xrange(10)]
+        feed1 = NonRealtimeFeed(copy.copy(datetimes), 1)
+        feed2 = NonRealtimeFeed(copy.copy(datetimes[5:]), 0)
+        feed1.getEvent().subscribe(lambda x: values.append((1, x)))
+        feed2.getEvent().subscribe(lambda x: values.append((2, x)))
+
+        disp = self.buildDispatcher()
+        disp.addSubject(feed1)
+        disp.addSubject(feed2)
+        disp.run()
+
+        expected = [(1, dateTime) for dateTime in datetimes[:5]]
+        for dateTime in datetimes[5:]:
+            # feed2 has a higher priority so it should get dispatched first.
+            expected.append((2, dateTime))
+            expected.append((1, dateTime))
+        self.assertEqual(values, expected)
+
+    def testNrtFeedWithoutNextDateTime(self):
+        # feed1 has no datetime to peek for a while, and gets dispatched like a realtime feed meanwhile.
+        values = []
+        now = datetime.datetime.now()
+        datetimes = [now + datetime.timedelta(seconds=i) for i in xrange(6)]
+        feed1 = NonRealtimeFeed([datetimes[0], None, datetimes[3], datetimes[5]])
+        feed2 = NonRealtimeFeed([datetimes[1], datetimes[2], datetimes[4]])
+        feed1.getEvent().subscribe(lambda x: values.append(x))
+        feed2.getEvent().subscribe(lambda x: values.append(x))
+
+        disp = self.buildDispatcher()
+        disp.addSubject(feed1)
+        disp.addSubject(feed2)
+        disp.run()
+
+        self.assertEqual(values, [datetimes[0], None] + datetimes[1:])
+
+
+class PriorityQueueDispatcherTestCase(DispatcherTestCase):
+    def buildDispatcher(self):
+        ret = dispatcher.Dispatcher()
+        ret.setUsePriorityQueue(True)
+        return ret
+
+    def testUsePriorityQueue(self):
+        disp = dispatcher.Dispatcher()
+        self.assertFalse(disp.getUsePriorityQueue())
+        disp.setUsePriorityQueue(True)
+        self.assertTrue(disp.getUsePriorityQueue())
+        disp.setUsePriorityQueue(False)
+        self.assertFalse(disp.getUsePriorityQueue())
+
+    def testRealtimeFeedFedByNrtFeed(self):
+        # The realtime feed starts at eof and gets values as the non-realtime feed dispatches, like resampled feeds do.
+        values = []
+        now = datetime.datetime.now()
+        datetimes = [now + datetime.timedelta(seconds=i) for i in xrange(10)]
+        nrtFeed = NonRealtimeFeed(copy.copy(datetimes), 0)
+        rtFeed = RealtimeFeed([], None)
+        nrtFeed.getEvent().subscribe(lambda x: rtFeed._RealtimeFeed__datetimes.append(x))
+        rtFeed.getEvent().subscribe(lambda x: values.append(x))
+
+        disp = self.buildDispatcher()
+        disp.addSubject(rtFeed)
+        disp.addSubject(nrtFeed)
+        disp.run()
+
+        self.assertEqual(values, datetimes)
+
+    def testEofSubjectsClassifiedOnce(self):
+        peekCount = [0]
+
+        class EmptyFeed(NonRealtimeFeed):
+            def peekDateTime(self):
+                peekCount[0] += 1
+                return None
+
+        values = []
+        now = datetime.datetime.now()
+        datetimes = [now + datetime.timedelta(seconds=i) for i in xrange(10)]
+        nrtFeed = NonRealtimeFeed(copy.copy(datetimes))
+        nrtFeed.getEvent().subscribe(lambda x: values.append(x))
+
+        disp = self.buildDispatcher()
+        disp.addSubject(EmptyFeed([]))
+        disp.addSubject(nrtFeed)
+        disp.run()
+
+        self.assertEqual(values, datetimes)
+        self.assertEqual(peekCount[0], 1)
+
 
 class EventTestCase(common.TestCase):
     def testEmitOrder(self):
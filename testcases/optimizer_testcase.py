@@ -19,12 +19,30 @@
 """
 
 import sys
+import datetime
+import threading
+import socket
+import os
+import csv
+import sqlite3
+import pickle
+import SimpleXMLRPCServer
 
 import common
 
 from pyalgotrade.optimizer import local
+from pyalgotrade.optimizer import sharedbars
+from pyalgotrade.optimizer import server
+from pyalgotrade.optimizer import binaryrpc
+from pyalgotrade.optimizer import resultsinks
+from pyalgotrade.optimizer import journal
+from pyalgotrade.optimizer import search
+from pyalgotrade.optimizer import pruning
+from pyalgotrade.optimizer import worker
 from pyalgotrade import strategy
+from pyalgotrade import bar
 from pyalgotrade.barfeed import yahoofeed
+from pyalgotrade.barfeed import membf
 
 sys.path.append("samples")
 import sma_crossover
@@ -43,12 +61,60 @@ class FailingStrategy(strategy.BacktestingStrategy):
         raise Exception("oh no!")
 
 
+# The first worker that runs the strategy with smaPeriod 10 dies.
+class DyingStrategy(strategy.BacktestingStrategy):
+    markerPath = None
+
+    def __init__(self, barFeed, instrument, smaPeriod):
+        super(DyingStrategy, self).__init__(barFeed)
+        self.__smaPeriod = smaPeriod
+        if smaPeriod == 10 and not os.path.exists(DyingStrategy.markerPath):
+            open(DyingStrategy.markerPath, "w").close()
+            os._exit(1)
+
+    def onBars(self, bars):
+        pass
+
+    def getResult(self):
+        return self.__smaPeriod
+
+
+class BarCountStrategy(strategy.BacktestingStrategy):
+    def __init__(self, barFeed, instrument, smaPeriod):
+        super(BarCountStrategy, self).__init__(barFeed)
+        self.__bars = 0
+
+    def onBars(self, bars):
+        self.__bars += 1
+
+    def getResult(self):
+        return self.__bars
+
+
+# Records the results for trials in the server process.
+class RecordingHalving(search.SuccessiveHalving):
+    def __init__(self, *args, **kwargs):
+        super(RecordingHalving, self).__init__(*args, **kwargs)
+        self.trialResults = []
+
+    def onResults(self, results):
+        for results_ in results:
+            if isinstance(results_.getParameters(), search.Trial):
+                self.trialResults.append((results_.getParameters().getBudget(), results_.getResult()))
+        super(RecordingHalving, self).onResults(results)
+
+
+class MemBarFeed(membf.BarFeed):
+    def barsHaveAdjClose(self):
+        return False
+
+
 class OptimizerTestCase(common.TestCase):
     def testLocal(self):
         barFeed = yahoofeed.Feed()
         instrument = "orcl"
         barFeed.addBarsFromCSV(instrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"))
-        res = local.run(sma_crossover.SMACrossOver, barFeed, parameters_generator(instrument, 5, 100))
+        res = local.run(sma_crossover.SMACrossOver, barFeed, parameters_generator(instrument, 5, 100), shareBars=True, transport=server.TRANSPORT_BINARY)
         self.assertEquals(round(res.getResult(), 2), 1295462.6)
         self.assertEquals(res.getParameters()[1], 20)
 
@@ -58,3 +124,619 @@ class OptimizerTestCase(common.TestCase):
         barFeed.addBarsFromCSV(instrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"))
         res = local.run(FailingStrategy, barFeed, parameters_generator(instrument, 5, 100))
         self.assertIsNone(res)
+
+    def testLocalWithoutSharedBars(self):
+        barFeed = yahoofeed.Feed()
+        instrument = "orcl"
+        barFeed.addBarsFromCSV(instrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+        res = local.run(sma_crossover.SMACrossOver, barFeed, parameters_generator(instrument, 5, 100), transport=server.TRANSPORT_BINARY)
+        self.assertEquals(round(res.getResult(), 2), 1295462.6)
+        self.assertEquals(res.getParameters()[1], 20)
+
+    def __testResults(self, transport):
+        barFeed = yahoofeed.Feed()
+        instrument = "orcl"
+        barFeed.addBarsFromCSV(instrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+        resultSink = resultsinks.MemorySink()
+        res = local.run(sma_crossover.SMACrossOver, barFeed, parameters_generator(instrument, 5, 100), transport=transport, resultSink=resultSink, leaderboardSize=3)
+        self.assertEquals(round(res.getResult(), 2), 1295462.6)
+        self.assertEquals(res.getParameters()[1], 20)
+
+        # Every set of parameters gets to the sink.
+        allResults = resultSink.getResults()
+        self.assertEquals(sorted(results.getParameters() for results in allResults), list(parameters_generator(instrument, 5, 100)))
+        self.assertEquals(max(results.getResult() for results in allResults), res.getResult())
+
+        leaderboard = res.getLeaderboard()
+        self.assertEquals(len(leaderboard), 3)
+        self.assertEquals(leaderboard[0].getParameters(), res.getParameters())
+        self.assertEquals(
+            [results.getResult() for results in leaderboard],
+            sorted([results.getResult() for results in allResults], reverse=True)[:3]
+        )
+
+    def testResultsWithXMLRPC(self):
+        self.__testResults(server.TRANSPORT_XMLRPC)
+
+    def testResultsWithBinaryTransport(self):
+        self.__testResults(server.TRANSPORT_BINARY)
+
+    def testWorkerDies(self):
+        barFeed = yahoofeed.Feed()
+        instrument = "orcl"
+        barFeed.addBarsFromCSV(instrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+        resultSink = resultsinks.MemorySink()
+        minJobLease = server.Server.minJobLease
+        server.Server.minJobLease = 1
+        try:
+            with common.TmpDir() as tmpPath:
+                DyingStrategy.markerPath = os.path.join(tmpPath, "died")
+                res = local.run(DyingStrategy, barFeed, parameters_generator(instrument, 5, 15), workerCount=2, resultSink=resultSink)
+                self.assertTrue(os.path.exists(DyingStrategy.markerPath))
+        finally:
+            server.Server.minJobLease = minJobLease
+        # The job that was running when the worker died was handed out again.
+        self.assertEquals(res.getResult(), 15)
+        self.assertEquals(sorted(results.getResult() for results in resultSink.getResults()), range(5, 16))
+
+    def testResume(self):
+        barFeed = yahoofeed.Feed()
+        instrument = "orcl"
+        barFeed.addBarsFromCSV(instrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+        with common.TmpDir() as tmpPath:
+            journalPath = os.path.join(tmpPath, "journal.sqlite")
+            res = local.run(sma_crossover.SMACrossOver, barFeed, parameters_generator(instrument, 15, 25), journalPath=journalPath)
+            self.assertEquals(res.getParameters()[1], 20)
+
+            # Parameters already in the journal are not evaluated again, so they don't fail.
+            barFeed = yahoofeed.Feed()
+            barFeed.addBarsFromCSV(instrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+            resultSink = resultsinks.MemorySink()
+            resumed = local.run(FailingStrategy, barFeed, parameters_generator(instrument, 10, 25), resultSink=resultSink, journalPath=journalPath)
+            self.assertEquals(resumed.getParameters(), res.getParameters())
+            self.assertEquals(resumed.getResult(), res.getResult())
+            self.assertEquals(len(resultSink.getResults()), 16)
+            self.assertEquals(
+                sorted(results.getParameters()[1] for results in resultSink.getResults() if results.getResult() is None),
+                range(10, 15)
+            )
+            self.assertEquals(len(journal.Journal(journalPath).getResults()), 16)
+
+    def __testSuccessiveHalving(self, shareBars):
+        barFeed = yahoofeed.Feed()
+        instrument = "orcl"
+        barFeed.addBarsFromCSV(instrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+        driver = RecordingHalving([instrument, search.IntRange(5, 100)], 9, 1 / 9.0, seed=1)
+        resultSink = resultsinks.MemorySink()
+        res = local.run(BarCountStrategy, barFeed, driver, shareBars=shareBars, resultSink=resultSink)
+        # Only the final round uses all the bars, and only its results get to the sink.
+        self.assertEquals(res.getResult(), 252)
+        self.assertEquals(len(resultSink.getResults()), 1)
+        budgets = sorted(set(budget for budget, result in driver.trialResults))
+        self.assertEquals(len(budgets), 2)
+        self.assertEquals(len(driver.trialResults), 12)
+        for budget, result in driver.trialResults:
+            self.assertTrue(0 < result < 252 * budget + 5)
+
+    def testSuccessiveHalving(self):
+        self.__testSuccessiveHalving(True)
+
+    def testSuccessiveHalvingWithoutSharedBars(self):
+        self.__testSuccessiveHalving(False)
+
+    def testTPESearch(self):
+        barFeed = yahoofeed.Feed()
+        instrument = "orcl"
+        barFeed.addBarsFromCSV(instrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+        resultSink = resultsinks.MemorySink()
+        driver = search.TPESearch([instrument, search.IntRange(5, 100)], 20, startupCount=5, seed=1)
+        res = local.run(sma_crossover.SMACrossOver, barFeed, driver, resultSink=resultSink)
+        self.assertEquals(len(resultSink.getResults()), 20)
+        self.assertEquals(res.getResult(), max(results.getResult() for results in resultSink.getResults()))
+
+    def testPruning(self):
+        barFeed = yahoofeed.Feed()
+        instrument = "orcl"
+        barFeed.addBarsFromCSV(instrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+        resultSink = resultsinks.MemorySink()
+        res = local.run(sma_crossover.SMACrossOver, barFeed, parameters_generator(instrument, 5, 100), resultSink=resultSink, pruningRule=pruning.MaxDrawDown(0.3))
+        # The best parameters have a 25% draw down so they run until the end.
+        self.assertEquals(round(res.getResult(), 2), 1295462.6)
+        self.assertEquals(res.getParameters()[1], 20)
+        self.assertFalse(res.isPruned())
+        self.assertFalse(any(results.isPruned() for results in res.getLeaderboard()))
+
+        allResults = resultSink.getResults()
+        self.assertEquals(len(allResults), 96)
+        pruned = [results.getParameters()[1] for results in allResults if results.isPruned()]
+        self.assertIn(5, pruned)
+        self.assertIn(50, pruned)
+        self.assertNotIn(20, pruned)
+        self.assertNotIn(100, pruned)
+
+    def testSinglePass(self):
+        barFeed = yahoofeed.Feed()
+        instrument = "orcl"
+        barFeed.addBarsFromCSV(instrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+        resultSink = resultsinks.MemorySink()
+        res = local.run(sma_crossover.SMACrossOver, barFeed, parameters_generator(instrument, 5, 100), resultSink=resultSink, pruningRule=pruning.MaxDrawDown(0.3), singlePass=True)
+        self.assertEquals(round(res.getResult(), 2), 1295462.6)
+        self.assertEquals(res.getParameters()[1], 20)
+        # Each strategy gets its own copy of the pruning rule.
+        pruned = sorted(results.getParameters()[1] for results in resultSink.getResults() if results.isPruned())
+        self.assertIn(5, pruned)
+        self.assertNotIn(20, pruned)
+        self.assertNotIn(100, pruned)
+
+    def testSinglePassWithFailingStrategy(self):
+        barFeed = yahoofeed.Feed()
+        instrument = "orcl"
+        barFeed.addBarsFromCSV(instrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+        res = local.run(FailingStrategy, barFeed, parameters_generator(instrument, 5, 10), singlePass=True)
+        self.assertIsNone(res)
+
+    def testSinglePassWithSuccessiveHalving(self):
+        barFeed = yahoofeed.Feed()
+        instrument = "orcl"
+        barFeed.addBarsFromCSV(instrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+        driver = RecordingHalving([instrument, search.IntRange(5, 100)], 9, 1 / 9.0, seed=1)
+        res = local.run(BarCountStrategy, barFeed, driver, singlePass=True)
+        self.assertEquals(res.getResult(), 252)
+        self.assertEquals(len(driver.trialResults), 12)
+
+    def testLocalWithDefaults(self):
+        # Sharing bars and the binary transport are opt-in.
+        barFeed = yahoofeed.Feed()
+        instrument = "orcl"
+        barFeed.addBarsFromCSV(instrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+        res = local.run(sma_crossover.SMACrossOver, barFeed, parameters_generator(instrument, 5, 100))
+        self.assertEquals(round(res.getResult(), 2), 1295462.6)
+        self.assertEquals(res.getParameters()[1], 20)
+
+    def testRPCServer(self):
+        for transport in [server.TRANSPORT_XMLRPC, server.TRANSPORT_BINARY]:
+            srv = server.Server("localhost", 0, False, transport)
+            rpcServer = srv.getRPCServer()
+            try:
+                self.assertEqual(rpcServer.server_address[0], "127.0.0.1")
+                self.assertNotEqual(rpcServer.server_address[1], 0)
+                # The SimpleXMLRPCServer interface is still available in the server itself.
+                self.assertEqual(srv.server_address, rpcServer.server_address)
+                srv.register_function(lambda: 1, "one")
+                thread = threading.Thread(target=srv.serve_forever)
+                thread.start()
+                srv.shutdown()
+                thread.join()
+            finally:
+                srv.server_close()
+        srv = server.Server("localhost", 0, False)
+        srv.register_introspection_functions()
+        srv.server_close()
+        with self.assertRaises(AttributeError):
+            srv.foo
+
+    def testWorkerWithOldServer(self):
+        # Servers before 0.18 don't take the allResults argument.
+        pushed = []
+
+        def pushJobResults(jobId, result, parameters, workerName):
+            pushed.append((pickle.loads(jobId), pickle.loads(result)))
+
+        rpcServer = SimpleXMLRPCServer.SimpleXMLRPCServer(("localhost", 0), requestHandler=server.RequestHandler, logRequests=False, allow_none=True)
+        rpcServer.register_function(pushJobResults, "pushJobResults")
+        thread = threading.Thread(target=rpcServer.serve_forever)
+        thread.start()
+        try:
+            w = worker.Worker("localhost", rpcServer.server_address[1], "worker")
+            w.pushJobResults(1, 10, ("orcl", 5), [(("orcl", 5), 10), (("orcl", 6), 8)])
+            w.pushJobResults(2, 20, ("orcl", 7), [(("orcl", 7), 20)])
+        finally:
+            rpcServer.shutdown()
+            thread.join()
+            rpcServer.server_close()
+        self.assertEqual(pushed, [(1, 10), (2, 20)])
+
+    def testLocalWithBarsThatCantBeShared(self):
+        barFeed = MemBarFeed(bar.Frequency.DAY)
+        barFeed.addBarsFromSequence("orcl", [
+            bar.BasicBar(datetime.datetime(2000, 1, 3), 10, 10, 10, 10, 10, None, bar.Frequency.DAY),
+            bar.BasicBar(datetime.datetime(2000, 1, 4), 10, 10, 10, 10, 10, None, bar.Frequency.DAY, {"Notes": "n/a"}),
+        ])
+        with common.TmpDir() as tmpPath:
+            self.assertFalse(sharedbars.write(barFeed, tmpPath))
+        barFeed.reset()
+        res = local.run(FailingStrategy, barFeed, parameters_generator("orcl", 5, 6), workerCount=1, shareBars=True)
+        self.assertIsNone(res)
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class SchedulerTestCase(common.TestCase):
+    def __buildScheduler(self, parameterCount, clock):
+        return server.Scheduler([(i,) for i in range(parameterCount)], 200, 10, 60, 3, clock)
+
+    def testBatchSize(self):
+        clock = Clock()
+        scheduler = self.__buildScheduler(1000, clock)
+        # Start with a single set of parameters until there is an estimate of the run time.
+        job = scheduler.getNextJob()
+        self.assertEquals(job.getNextParameters(), (0,))
+        self.assertEquals(job.getNextParameters(), None)
+        clock.now = 0.5
+        self.assertEquals(scheduler.completeJob(job.getId()), job)
+        # 10 seconds per job.
+        job = scheduler.getNextJob()
+        self.assertEquals(len(self.__getParameters(job)), 20)
+
+        # Capped to 200.
+        clock.now = 0
+        scheduler = self.__buildScheduler(1000, clock)
+        job = scheduler.getNextJob()
+        clock.now = 0.01
+        scheduler.completeJob(job.getId())
+        self.assertEquals(len(self.__getParameters(scheduler.getNextJob())), 200)
+
+    def testTail(self):
+        clock = Clock()
+        scheduler = self.__buildScheduler(40, clock)
+        job = scheduler.getNextJob()
+        clock.now = 0.1
+        scheduler.completeJob(job.getId())
+        # There are no other jobs in progress so the 39 parameters left go to a single job.
+        self.assertEquals(len(self.__getParameters(scheduler.getNextJob())), 39)
+
+        clock.now = 0
+        scheduler = self.__buildScheduler(40, clock)
+        job = scheduler.getNextJob()
+        scheduler.getNextJob()
+        clock.now = 0.1
+        scheduler.completeJob(job.getId())
+        # 38 left, split between two workers since there is one job in progress.
+        self.assertEquals(len(self.__getParameters(scheduler.getNextJob())), 19)
+        # 19 left, split among three workers.
+        self.assertEquals(len(self.__getParameters(scheduler.getNextJob())), 7)
+        self.assertTrue(scheduler.jobsPending())
+
+    def testReissue(self):
+        clock = Clock()
+        scheduler = self.__buildScheduler(1, clock)
+        job1 = scheduler.getNextJob()
+        self.assertEquals(scheduler.getNextJob(), None)
+        # The lease expires.
+        clock.now = 61
+        job2 = scheduler.getNextJob()
+        self.assertNotEquals(job2.getId(), job1.getId())
+        self.assertEquals(self.__getParameters(job2), [(0,)])
+        # Jobs are re-issued only once.
+        self.assertEquals(scheduler.getNextJob(), None)
+        # The first results that arrive are used.
+        self.assertEquals(scheduler.completeJob(job1.getId()), job1)
+        self.assertEquals(scheduler.completeJob(job2.getId()), None)
+        self.assertFalse(scheduler.jobsPending())
+
+    def testWait(self):
+        clock = Clock()
+        scheduler = self.__buildScheduler(1, clock)
+        job = scheduler.getNextJob()
+        thread = threading.Thread(target=lambda: scheduler.completeJob(job.getId()))
+        thread.start()
+        self.assertEquals(scheduler.getNextJob(True), None)
+        thread.join()
+        self.assertFalse(scheduler.jobsPending())
+
+    def testSearchDriver(self):
+        clock = Clock()
+        scheduler = server.Scheduler(search.SuccessiveHalving([search.IntRange(0, 100)], 3, 1 / 3.0, seed=1), 200, 10, 60, 3, clock)
+        job = scheduler.getNextJob()
+        trials = self.__getParameters(job)
+        self.assertEquals(len(trials), 1)
+        self.assertEquals(trials[0].getBudget(), 1 / 3.0)
+        jobs = [scheduler.getNextJob(), scheduler.getNextJob()]
+        # The driver waits for the results of the first round.
+        self.assertEquals(scheduler.getNextJob(), None)
+        self.assertTrue(scheduler.jobsPending())
+
+        scheduler.completeJob(job.getId(), [server.Results(trials[0], 1)])
+        for job in jobs:
+            trials.extend(self.__getParameters(job))
+            scheduler.completeJob(job.getId(), [server.Results(trial, 0) for trial in trials[-1:]])
+        # The best one is evaluated with all the bars.
+        self.assertEquals(self.__getParameters(scheduler.getNextJob()), [trials[0].getParameters()])
+
+    def testKnownResults(self):
+        clock = Clock()
+        driver = search.SuccessiveHalving([search.Choice([1, 2])], 2, 1, seed=1)
+        scheduler = server.Scheduler(driver, 200, 10, 60, 3, clock, {journal.get_key((1,)): 10})
+        self.assertEquals(self.__getParameters(scheduler.getNextJob()), [(2,)])
+        self.assertEquals(scheduler.getNextJob(), None)
+
+    def __getParameters(self, job):
+        ret = []
+        parameters = job.getNextParameters()
+        while parameters is not None:
+            ret.append(parameters)
+            parameters = job.getNextParameters()
+        return sorted(ret)
+
+
+# Evaluates everything a driver proposes, right away, with a function of the parameters and the budget.
+def run_driver(driver, function):
+    ret = []
+    while not driver.isFinished():
+        parameters = driver.getNextParameters()
+        # Drivers only run out of parameters while they wait for results, or once they're finished.
+        if parameters is None:
+            assert(driver.isFinished())
+            break
+        if isinstance(parameters, search.Trial):
+            budget = parameters.getBudget()
+            result = function(parameters.getParameters(), budget)
+        else:
+            budget = 1
+            result = function(parameters, budget)
+        ret.append((parameters, budget, result))
+        driver.onResults([server.Results(parameters, result)])
+    return ret
+
+
+class SearchTestCase(common.TestCase):
+    def testGridSearch(self):
+        self.assertEquals(run_driver(search.GridSearch([(1,), (2,)]), lambda parameters, budget: None), [((1,), 1, None), ((2,), 1, None)])
+
+    def testRandomSearch(self):
+        space = ["orcl", search.IntRange(10, 20, 5), search.FloatRange(0.01, 1, log=True), search.Choice(["a", "b"])]
+        evaluated = run_driver(search.RandomSearch(space, 50, seed=1), lambda parameters, budget: None)
+        self.assertEquals(len(evaluated), 50)
+        for parameters, budget, result in evaluated:
+            self.assertEquals(parameters[0], "orcl")
+            self.assertIn(parameters[1], [10, 15, 20])
+            self.assertTrue(0.01 <= parameters[2] <= 1)
+            self.assertIn(parameters[3], ["a", "b"])
+        # Results can be reproduced with the same seed.
+        self.assertEquals(evaluated, run_driver(search.RandomSearch(space, 50, seed=1), lambda parameters, budget: None))
+
+    def testSuccessiveHalving(self):
+        driver = search.SuccessiveHalving([search.IntRange(0, 1000)], 27, 1 / 9.0, seed=1)
+        evaluated = run_driver(driver, lambda parameters, budget: parameters[0])
+        self.assertEquals([budget for parameters, budget, result in evaluated], [1 / 9.0] * 27 + [1 / 3.0] * 9 + [1] * 3)
+        # The best ones make it to the next round.
+        firstRound = sorted([result for parameters, budget, result in evaluated[:27]], reverse=True)
+        self.assertEquals(sorted([result for parameters, budget, result in evaluated[36:]], reverse=True), firstRound[:3])
+        self.assertEquals(driver.getNextParameters(), None)
+
+    def testSuccessiveHalvingWaitsForResults(self):
+        driver = search.SuccessiveHalving([search.IntRange(0, 1000)], 3, 1 / 3.0, seed=1)
+        trials = [driver.getNextParameters() for i in range(3)]
+        self.assertEquals(driver.getNextParameters(), None)
+        self.assertFalse(driver.isFinished())
+        # Results for failed strategies rank last.
+        driver.onResults([server.Results(trials[0], None), server.Results(trials[1], 1)])
+        self.assertEquals(driver.getNextParameters(), None)
+        driver.onResults([server.Results(trials[2], 0)])
+        self.assertEquals(driver.getNextParameters(), trials[1].getParameters())
+        self.assertTrue(driver.isFinished())
+
+    def testHyperband(self):
+        evaluated = run_driver(search.Hyperband([search.IntRange(0, 1000)], 1 / 9.0, seed=1), lambda parameters, budget: parameters[0])
+        budgets = [budget for parameters, budget, result in evaluated]
+        # Brackets with 9, 5 and 3 sets of parameters.
+        self.assertEquals(budgets, [1 / 9.0] * 9 + [1 / 3.0] * 3 + [1] + [1 / 3.0] * 5 + [1] + [1] * 3)
+
+    def testTPESearch(self):
+        def function(parameters, budget):
+            return -(parameters[0] - 30) ** 2 - (parameters[1] - 0.7) ** 2 + (1 if parameters[2] == "b" else 0)
+
+        space = [search.IntRange(0, 100), search.FloatRange(0, 1), search.Choice(["a", "b", "c"])]
+        evaluated = run_driver(search.TPESearch(space, 60, startupCount=10, seed=1), function)
+        self.assertEquals(len(evaluated), 60)
+        # Parameters get closer to the best ones once the model kicks in.
+        distance = lambda evaluated: sum(abs(parameters[0] - 30) for parameters, budget, result in evaluated) / float(len(evaluated))
+        self.assertTrue(distance(evaluated[-20:]) < distance(evaluated[:10]) / 2)
+        best = max(evaluated, key=lambda entry: entry[2])[0]
+        self.assertTrue(abs(best[0] - 30) <= 5)
+        self.assertEquals(best[2], "b")
+
+
+class Broker(object):
+    def __init__(self):
+        self.equity = 0
+
+    def getEquity(self):
+        return self.equity
+
+
+class Strategy(object):
+    def __init__(self):
+        self.broker = Broker()
+
+    def getBroker(self):
+        return self.broker
+
+
+class PruningTestCase(common.TestCase):
+    def __testRule(self, rule, equities):
+        strat = Strategy()
+        ret = []
+        for equity in equities:
+            strat.broker.equity = equity
+            ret.append(rule.shouldPrune(strat, None))
+        return ret
+
+    def testMaxDrawDown(self):
+        rule = pruning.MaxDrawDown(0.25)
+        self.assertEquals(self.__testRule(rule, [100, 80, 200, 160, 151, 150]), [False, False, False, False, False, True])
+        rule.reset()
+        self.assertEquals(self.__testRule(rule, [100, 75]), [False, True])
+
+    def testMinEquity(self):
+        self.assertEquals(self.__testRule(pruning.MinEquity(100), [150, 100, 99.9]), [False, False, True])
+
+    def testPruner(self):
+        barFeed = yahoofeed.Feed()
+        barFeed.addBarsFromCSV("orcl", common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+        strat = sma_crossover.SMACrossOver(barFeed, "orcl", 20)
+        pruner = pruning.Pruner(strat, pruning.MinEquity(2000000))
+        strat.run()
+        # The strategy gets stopped after the first bar.
+        self.assertTrue(pruner.isPruned())
+        self.assertEquals(strat.getCurrentDateTime(), datetime.datetime(2000, 1, 3))
+
+
+class JournalTestCase(common.TestCase):
+    def testAddAndGetResults(self):
+        with common.TmpDir() as tmpPath:
+            path = os.path.join(tmpPath, "journal.sqlite")
+            j = journal.Journal(path)
+            j.addResults([server.Results(("orcl", 10), 1.5), server.Results(("orcl", [1, 2]), None)], "worker-1")
+            j.close()
+
+            j = journal.Journal(path)
+            j.addResults([server.Results(("orcl", 30), -1, pruned=True)], "worker-2")
+            self.assertEquals(j.getResults(), [
+                (("orcl", 10), 1.5, "worker-1", False),
+                (("orcl", [1, 2]), None, "worker-1", False),
+                (("orcl", 30), -1, "worker-2", True),
+            ])
+            j.close()
+
+    def testGetKey(self):
+        self.assertEquals(journal.get_key(("orcl", 10)), journal.get_key(("orcl", 10)))
+        self.assertEquals(journal.get_key(("orcl", [1, 2])), journal.get_key(("orcl", [1, 2])))
+        self.assertNotEquals(journal.get_key(("orcl", [1, 2])), journal.get_key(("orcl", [1, 3])))
+
+
+class LeaderboardTestCase(common.TestCase):
+    def testLeaderboard(self):
+        leaderboard = server.Leaderboard(3)
+        for parameters, result in [(1, 10), (2, None), (3, 30), (4, 20), (5, 30), (6, 5), (7, 40), (8, 30)]:
+            leaderboard.add(server.Results((parameters,), result))
+        # Results that tie keep the one that arrived first.
+        self.assertEquals([results.getParameters() for results in leaderboard.getResults()], [(7,), (3,), (5,)])
+
+    def testEmpty(self):
+        self.assertEquals(server.Leaderboard(3).getResults(), [])
+        leaderboard = server.Leaderboard(0)
+        leaderboard.add(server.Results((1,), 1))
+        self.assertEquals(leaderboard.getResults(), [])
+
+
+class ResultSinksTestCase(common.TestCase):
+    Results = [
+        server.Results(("orcl", 10, 1.5), 100.5),
+        server.Results(("orcl", 20, 2.5), None),
+        server.Results(("orcl", 30, 3.5), -10, pruned=True),
+    ]
+
+    def testCSVSink(self):
+        with common.TmpDir() as tmpPath:
+            path = os.path.join(tmpPath, "results.csv")
+            sink = resultsinks.CSVSink(path)
+            sink.addResults(ResultSinksTestCase.Results[:2])
+            sink.addResults(ResultSinksTestCase.Results[2:])
+            sink.close()
+            with open(path) as f:
+                rows = list(csv.reader(f))
+        self.assertEquals(rows, [
+            ["Parameter 1", "Parameter 2", "Parameter 3", "Result", "Pruned"],
+            ["orcl", "10", "1.5", "100.5", "0"],
+            ["orcl", "20", "2.5", "", "0"],
+            ["orcl", "30", "3.5", "-10", "1"],
+        ])
+
+    def testSQLiteSink(self):
+        with common.TmpDir() as tmpPath:
+            path = os.path.join(tmpPath, "results.sqlite")
+            # The table gets recreated.
+            for i in range(2):
+                sink = resultsinks.SQLiteSink(path)
+                sink.addResults(ResultSinksTestCase.Results)
+                sink.close()
+            connection = sqlite3.connect(path)
+            rows = connection.execute("select parameter_1, parameter_2, parameter_3, result, pruned from result order by result_id").fetchall()
+            connection.close()
+        self.assertEquals(rows, [("orcl", 10, 1.5, 100.5, 0), ("orcl", 20, 2.5, None, 0), ("orcl", 30, 3.5, -10, 1)])
+
+    def testSQLiteSinkWithDifferentParameters(self):
+        with common.TmpDir() as tmpPath:
+            sink = resultsinks.SQLiteSink(os.path.join(tmpPath, "results.sqlite"))
+            with self.assertRaisesRegexp(Exception, "Expected 3 parameters but got 1"):
+                sink.addResults(ResultSinksTestCase.Results + [server.Results((1,), 1)])
+            sink.close()
+
+
+class BinaryRPCTestCase(common.TestCase):
+    def setUp(self):
+        super(BinaryRPCTestCase, self).setUp()
+        self.__server = binaryrpc.Server("localhost", local.find_port())
+        self.__server.register_function(lambda value: value, "echo")
+        self.__server.register_function(lambda: 1 / 0, "fail")
+        self.__thread = threading.Thread(target=self.__server.serve_forever)
+        self.__thread.start()
+
+    def tearDown(self):
+        self.__server.shutdown()
+        self.__thread.join()
+        self.__server.server_close()
+        super(BinaryRPCTestCase, self).tearDown()
+
+    def __buildProxy(self):
+        return binaryrpc.ServerProxy("localhost", self.__server.server_address[1])
+
+    def testCall(self):
+        proxy = self.__buildProxy()
+        self.assertEqual(proxy.echo(None), None)
+        self.assertEqual(proxy.echo((1, "a", [2.5])), (1, "a", [2.5]))
+        # Large frames are compressed.
+        value = "x" * (binaryrpc.COMPRESSION_THRESHOLD * 10)
+        self.assertEqual(proxy.echo(value), value)
+        proxy.close()
+        # A new connection is opened after closing the proxy.
+        self.assertEqual(proxy.echo(1), 1)
+        proxy.close()
+
+    def testErrors(self):
+        proxy = self.__buildProxy()
+        with self.assertRaisesRegexp(Exception, "Error calling fail: ZeroDivisionError.*"):
+            proxy.fail()
+        with self.assertRaisesRegexp(Exception, "Error calling missing: KeyError.*"):
+            proxy.missing()
+        # The connection is still usable.
+        self.assertEqual(proxy.echo(1), 1)
+        proxy.close()
+
+    def testConnectionRefused(self):
+        proxy = binaryrpc.ServerProxy("localhost", local.find_port())
+        with self.assertRaises(socket.error):
+            proxy.echo(1)
+
+
+class SharedBarsTestCase(common.TestCase):
+    def __loadBars(self, barFeed):
+        return [(dateTime, bars["spy"].getClose(), bars["spy"].getAdjClose()) for dateTime, bars in barFeed]
+
+    def testSameBars(self):
+        barFeed = yahoofeed.Feed()
+        barFeed.addBarsFromCSV("spy", common.get_data_file_path("spy-2010-yahoofinance.csv"))
+        with common.TmpDir() as tmpPath:
+            self.assertTrue(sharedbars.write(barFeed, tmpPath))
+            sharedBars = sharedbars.SharedBars(tmpPath)
+            self.assertEqual(sharedBars.getFrequency(), bar.Frequency.DAY)
+            self.assertEqual(sharedBars.getInstruments(), ["spy"])
+
+            barFeed = yahoofeed.Feed()
+            barFeed.addBarsFromCSV("spy", common.get_data_file_path("spy-2010-yahoofinance.csv"))
+            expected = self.__loadBars(barFeed)
+            # Every feed dispatches all the bars.
+            for i in range(2):
+                feed = sharedBars.buildFeed()
+                self.assertTrue(feed.barsHaveAdjClose())
+                self.assertEqual(self.__loadBars(feed), expected)
+            # Budgets use the bars in the first part of the date range.
+            self.assertEqual(self.__loadBars(sharedBars.buildFeed(0.5)), [entry for entry in expected if entry[0] <= datetime.datetime(2010, 7, 2)])
+            self.assertEqual(self.__loadBars(sharedBars.buildFeed(1)), expected)
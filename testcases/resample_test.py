@@ -219,6 +219,8 @@ class DataSeriesTestCase(common.TestCase):
         self.assertEqual(feed["spy"][0].getClose(), 126.4)
         self.assertEqual(feed["spy"][0].getVolume(), 3397.0)
         self.assertEqual(feed["spy"][0].getAdjClose(), None)
+        # Known columns should not be reported as extra columns.
+        self.assertEqual(feed["spy"][0].getExtraColumns(), {})
 
         self.assertEqual(len(resampledBarDS), len(feed["spy"]))
         self.assertEqual(resampledBarDS[0].getDateTime(), dt.as_utc(datetime.datetime(2011, 1, 3, 9)))
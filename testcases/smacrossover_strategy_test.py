@@ -145,8 +145,9 @@ class LimitOrderStrategy(SMACrossOverStrategy):
 
 
 class TestSMACrossOver(common.TestCase):
-    def __test(self, strategyClass, finalValue):
+    def __test(self, strategyClass, finalValue, useColumnarDataSeries=False):
         feed = yahoofeed.Feed()
+        feed.setUseColumnarDataSeries(useColumnarDataSeries)
         feed.addBarsFromCSV("orcl", common.get_data_file_path("orcl-2001-yahoofinance.csv"))
         myStrategy = strategyClass(feed, 10, 25)
         myStrategy.run()
@@ -160,3 +161,9 @@ class TestSMACrossOver(common.TestCase):
     def testWithLimitOrder(self):
         # The result is different than the one we get using NinjaTrader. NinjaTrader processes Limit orders in a different way.
         self.__test(LimitOrderStrategy, 1000 + 32.7)
+
+    def testWithMarketOrderColumnar(self):
+        self.__test(MarketOrderStrategy, 1000 - 22.7, True)
+
+    def testWithLimitOrderColumnar(self):
+        self.__test(LimitOrderStrategy, 1000 + 32.7, True)
@@ -0,0 +1,233 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2015 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import datetime
+
+import numpy as np
+
+import common
+
+from pyalgotrade.technical import batch
+from pyalgotrade.technical import ma
+from pyalgotrade.technical import stats
+from pyalgotrade.technical import rsi
+from pyalgotrade.technical import atr
+from pyalgotrade.technical import roc
+from pyalgotrade.technical import bollinger
+from pyalgotrade.technical import macd
+from pyalgotrade.technical import highlow
+from pyalgotrade.technical import linreg
+from pyalgotrade.barfeed import yahoofeed
+from pyalgotrade.barfeed import columnar
+from pyalgotrade import dataseries
+
+
+class BatchTestCase(common.TestCase):
+    def setUp(self):
+        self.__feed = yahoofeed.Feed()
+        self.__feed.addBarsFromCSV("orcl", common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+        self.__bars = self.__feed.getBars("orcl")
+        self.__closes = [bar_.getClose() for bar_ in self.__bars]
+
+    def __assertSameValues(self, incremental, batchDS):
+        self.assertEqual(len(incremental), len(batchDS))
+        self.assertEqual(incremental.getDateTimes(), batchDS.getDateTimes())
+        for expected, value in zip(incremental, batchDS):
+            if expected is None:
+                self.assertEqual(value, None)
+            else:
+                self.assertAlmostEqual(value, expected, delta=abs(expected) * 1e-9 + 1e-12)
+
+    # Builds both versions over the close dataseries, runs the feed and checks that they hold the same values.
+    def __testCloses(self, incrementalBuilder, batchBuilder):
+        closeDS = self.__feed["orcl"].getCloseDataSeries()
+        incremental = incrementalBuilder(closeDS)
+        batchDS = batchBuilder(closeDS, self.__closes)
+        self.__feed.loadAll()
+        self.assertEqual(len(batchDS), len(self.__closes))
+        self.__assertSameValues(incremental, batchDS)
+        return incremental, batchDS
+
+    def testSMA(self):
+        for period in [1, 5, 20, 300]:
+            self.setUp()
+            self.__testCloses(lambda ds: ma.SMA(ds, period), lambda ds, values: batch.SMA(ds, values, period))
+
+    def testEMA(self):
+        for period in [2, 10, 50]:
+            self.setUp()
+            self.__testCloses(lambda ds: ma.EMA(ds, period), lambda ds, values: batch.EMA(ds, values, period))
+
+    def testWMA(self):
+        weights = [1, 2, 3, 4, 5]
+        self.__testCloses(lambda ds: ma.WMA(ds, weights), lambda ds, values: batch.WMA(ds, values, weights))
+
+    def testStdDev(self):
+        for ddof in [0, 1]:
+            self.setUp()
+            self.__testCloses(lambda ds: stats.StdDev(ds, 20, ddof), lambda ds, values: batch.StdDev(ds, values, 20, ddof))
+
+    def testZScore(self):
+        self.__testCloses(lambda ds: stats.ZScore(ds, 20), lambda ds, values: batch.ZScore(ds, values, 20))
+
+    def testRSI(self):
+        for period in [2, 14]:
+            self.setUp()
+            self.__testCloses(lambda ds: rsi.RSI(ds, period), lambda ds, values: batch.RSI(ds, values, period))
+
+    def testRSIWithoutLosses(self):
+        values = range(1, 20)
+        ds = dataseries.SequenceDataSeries()
+        incremental = rsi.RSI(ds, 5)
+        batchDS = batch.RSI(ds, values, 5)
+        for value in values:
+            ds.append(value)
+        self.__assertSameValues(incremental, batchDS)
+        self.assertEqual(batchDS[-1], 100)
+
+    def testATR(self):
+        for useAdjustedValues in [False, True]:
+            self.setUp()
+            barDS = self.__feed["orcl"]
+            incremental = atr.ATR(barDS, 14, useAdjustedValues)
+            batchDS = batch.ATR(barDS, self.__bars, 14, useAdjustedValues)
+            self.__feed.loadAll()
+            self.__assertSameValues(incremental, batchDS)
+
+    def testATRFromBarColumns(self):
+        barColumns = columnar.from_bars(self.__bars)
+        self.assertEqual(batch.atr(barColumns.getHighColumn(), barColumns.getLowColumn(), barColumns.getCloseColumn(), 14)[-1], batch.atr([bar_.getHigh() for bar_ in self.__bars], [bar_.getLow() for bar_ in self.__bars], self.__closes, 14)[-1])
+
+        barDS = self.__feed["orcl"]
+        incremental = atr.ATR(barDS, 14)
+        batchDS = batch.ATR(barDS, barColumns, 14)
+        self.__feed.loadAll()
+        self.__assertSameValues(incremental, batchDS)
+
+    def testROC(self):
+        for valuesAgo in [1, 12]:
+            self.setUp()
+            self.__testCloses(lambda ds: roc.RateOfChange(ds, valuesAgo), lambda ds, values: batch.RateOfChange(ds, values, valuesAgo))
+
+    def testROCWithZeros(self):
+        values = [0, 0, 1, 0, 2, 2]
+        ds = dataseries.SequenceDataSeries()
+        incremental = roc.RateOfChange(ds, 1)
+        batchDS = batch.RateOfChange(ds, values, 1)
+        for value in values:
+            ds.append(value)
+        self.__assertSameValues(incremental, batchDS)
+
+    def testBollingerBands(self):
+        closeDS = self.__feed["orcl"].getCloseDataSeries()
+        incremental = bollinger.BollingerBands(closeDS, 20, 2)
+        batchBands = batch.BollingerBands(closeDS, self.__closes, 20, 2)
+        self.__feed.loadAll()
+        self.__assertSameValues(incremental.getUpperBand(), batchBands.getUpperBand())
+        self.__assertSameValues(incremental.getMiddleBand(), batchBands.getMiddleBand())
+        self.__assertSameValues(incremental.getLowerBand(), batchBands.getLowerBand())
+
+    def testMACD(self):
+        incremental, batchDS = self.__testCloses(lambda ds: macd.MACD(ds, 12, 26, 9), lambda ds, values: batch.MACD(ds, values, 12, 26, 9))
+        self.__assertSameValues(incremental.getSignal(), batchDS.getSignal())
+        self.__assertSameValues(incremental.getHistogram(), batchDS.getHistogram())
+        self.assertEqual(batchDS[32], None)
+        self.assertNotEqual(batchDS[33], None)
+
+    def testHighLow(self):
+        self.__testCloses(lambda ds: highlow.High(ds, 10), lambda ds, values: batch.High(ds, values, 10))
+        self.setUp()
+        self.__testCloses(lambda ds: highlow.Low(ds, 10), lambda ds, values: batch.Low(ds, values, 10))
+
+    def testSlope(self):
+        for period in [2, 20]:
+            self.setUp()
+            self.__testCloses(lambda ds: linreg.Slope(ds, period), lambda ds, values: batch.Slope(ds, values, period))
+
+    def testSlopeFlat(self):
+        values = [1.5, 3.25] + [100.1] * 30
+        self.assertEqual(list(batch.slope(values, 20)[21:]), [0.0] * 11)
+        self.assertEqual(list(batch.slope([12.7] * 10, 5)[4:]), [0.0] * 6)
+
+    def testStdDevAndZScoreFlat(self):
+        values = np.random.RandomState(1).uniform(50, 150, size=37).tolist() + [101.37] * 20
+        self.assertEqual(batch.stddev(values, 20)[-1], 0.0)
+        self.assertTrue(np.isnan(batch.zscore(values, 20)[-1]))
+        ds = dataseries.SequenceDataSeries()
+        incremental = stats.StdDev(ds, 20)
+        batchDS = batch.StdDev(ds, values, 20)
+        for value in values:
+            ds.append(value)
+        self.__assertSameValues(incremental, batchDS)
+        self.assertEqual(incremental[-1], 0.0)
+        self.assertEqual(batchDS[-1], 0.0)
+
+    def testFewValues(self):
+        values = [1, 2, 3]
+        for builder in [
+            lambda ds: batch.SMA(ds, values, 5),
+            lambda ds: batch.EMA(ds, values, 5),
+            lambda ds: batch.RSI(ds, values, 5),
+            lambda ds: batch.MACD(ds, values, 2, 4, 2),
+            lambda ds: batch.Slope(ds, values, 5),
+        ]:
+            ds = dataseries.SequenceDataSeries()
+            batchDS = builder(ds)
+            for value in values:
+                ds.append(value)
+            self.assertEqual(list(batchDS), [None, None, None])
+
+    def testMaxLen(self):
+        closeDS = self.__feed["orcl"].getCloseDataSeries()
+        batchDS = batch.SMA(closeDS, self.__closes, 5, maxLen=10)
+        self.__feed.loadAll()
+        self.assertEqual(len(batchDS), 10)
+        self.assertEqual(batchDS[-1], batch.sma(self.__closes, 5)[-1])
+
+    def testOutOfSync(self):
+        ds = dataseries.SequenceDataSeries()
+        batchDS = batch.SMA(ds, [1, 2, 3], 2)
+        ds.append(1)
+        with self.assertRaisesRegexp(Exception, "out of sync"):
+            ds.append(3)
+
+    def testNoMoreValues(self):
+        ds = dataseries.SequenceDataSeries()
+        batch.SMA(ds, [1, 2], 2)
+        ds.append(1)
+        ds.append(2)
+        with self.assertRaisesRegexp(Exception, "no more values"):
+            ds.append(3)
+
+    def testMissingValues(self):
+        with self.assertRaisesRegexp(Exception, "Missing values"):
+            batch.sma([1, None, 3], 2)
+        with self.assertRaisesRegexp(Exception, "Missing values"):
+            batch.ema(np.array([1, np.nan, 3]), 2)
+
+    def testReplayDateTimes(self):
+        ds = dataseries.SequenceDataSeries()
+        replay = batch.Replay(ds, [np.nan, 2.5])
+        now = datetime.datetime(2000, 1, 1)
+        ds.appendWithDateTime(now, 1)
+        ds.appendWithDateTime(now + datetime.timedelta(days=1), 2)
+        self.assertEqual(list(replay), [None, 2.5])
+        self.assertEqual(replay.getDateTimes(), ds.getDateTimes())
+        self.assertTrue(replay.getDataSeries() is ds)
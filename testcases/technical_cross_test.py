@@ -18,6 +18,8 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import datetime
+
 import common
 
 from pyalgotrade.technical import cross
@@ -191,3 +193,108 @@ class TestCase(common.TestCase):
         self.assertEqual(cross.cross_above([0, 0, 0, 1, 2], [1, 1, 1], -3), 1)
         self.assertEqual(cross.cross_above([0, 0, 0, 1, 2], [1, 1], -3), 0)
         self.assertEqual(cross.cross_above([0, 0, 0, 0, 2], [1, 1], -3), 1)
+
+
+class FilterTestCase(common.TestCase):
+    def __appendAll(self, ds1, ds2, values1, values2):
+        for value1, value2 in zip(values1, values2):
+            ds1.append(value1)
+            ds2.append(value2)
+
+    def testCrossOnce(self):
+        ds1 = dataseries.SequenceDataSeries()
+        ds2 = dataseries.SequenceDataSeries()
+        crossAbove = cross.CrossAbove(ds1, ds2)
+        crossBelow = cross.CrossBelow(ds1, ds2)
+        self.__appendAll(ds1, ds2, [1, 1, 1, 10, 1, 1, 1], [2, 2, 2, 2, 2, 2, 2])
+        self.assertEqual(list(crossAbove), [0, 0, 0, 1, 0, 0, 0])
+        self.assertEqual(list(crossBelow), [0, 0, 0, 0, 1, 0, 0])
+
+    def testMatchesFunctions(self):
+        values1 = [(i * 7919) % 13 - 6 for i in xrange(200)]
+        values2 = [(i * 104729) % 11 - 5.5 for i in xrange(200)]
+        ds1 = dataseries.SequenceDataSeries()
+        ds2 = dataseries.SequenceDataSeries()
+        crossAbove = cross.CrossAbove(ds1, ds2)
+        crossBelow = cross.CrossBelow(ds1, ds2)
+        for value1, value2 in zip(values1, values2):
+            ds1.append(value1)
+            ds2.append(value2)
+            self.assertEqual(crossAbove[-1], cross.cross_above(ds1, ds2))
+            self.assertEqual(crossBelow[-1], cross.cross_below(ds1, ds2))
+
+    def testEqualValues(self):
+        # Going through equal values is not a cross, just like with cross_above and cross_below.
+        ds1 = dataseries.SequenceDataSeries()
+        ds2 = dataseries.SequenceDataSeries()
+        crossAbove = cross.CrossAbove(ds1, ds2)
+        crossBelow = cross.CrossBelow(ds1, ds2)
+        for value1 in [-1, 0, 0, 1, 0, 1, -1, 1, 0, -1]:
+            ds1.append(value1)
+            ds2.append(0)
+            self.assertEqual(crossAbove[-1], cross.cross_above(ds1, ds2))
+            self.assertEqual(crossBelow[-1], cross.cross_below(ds1, ds2))
+        self.assertEqual(list(crossAbove), [0, 0, 0, 0, 0, 0, 0, 1, 0, 0])
+        self.assertEqual(list(crossBelow), [0, 0, 0, 0, 0, 0, 1, 0, 0, 0])
+
+    def testDifferentFrequencies(self):
+        ds1 = dataseries.SequenceDataSeries()
+        ds2 = dataseries.SequenceDataSeries()
+        crossAbove = cross.CrossAbove(ds1, ds2)
+        dateTime = datetime.datetime(2000, 1, 1)
+        for i in xrange(100):
+            # ds1 gets a value every day, but misses the 8th day, and ds2 gets a value every 4th day.
+            if i != 8:
+                ds1.appendWithDateTime(dateTime + datetime.timedelta(days=i), i % 5)
+            if i % 4 == 0:
+                ds2.appendWithDateTime(dateTime + datetime.timedelta(days=i), 2.5)
+            # Values that will never get paired are not kept around.
+            self.assertLessEqual(len(crossAbove._CrossFilter__values1) + len(crossAbove._CrossFilter__values2), 4)
+        self.assertEqual(crossAbove.getDateTimes(), [dateTime + datetime.timedelta(days=i) for i in xrange(0, 100, 4) if i != 8])
+        # i % 5 for i in 0, 4, 12, 16, 20, 24, 28 is 0, 4, 2, 1, 0, 4, 3.
+        self.assertEqual(list(crossAbove)[:7], [0, 1, 0, 0, 0, 1, 0])
+
+    def testWithSMA(self):
+        ds1 = dataseries.SequenceDataSeries()
+        ds2 = dataseries.SequenceDataSeries()
+        sma1 = ma.SMA(ds1, 15)
+        sma2 = ma.SMA(ds2, 25)
+        crossAbove = cross.CrossAbove(sma1, sma2)
+        for i in range(100):
+            ds1.append(i)
+            ds2.append(50)
+            self.assertEqual(crossAbove[-1], cross.cross_above(sma1[:], sma2[:], -2, None))
+        self.assertEqual(sum(crossAbove), 1)
+        self.assertEqual(crossAbove[58], 1)
+
+    def testNonSimultaneousUpdates(self):
+        ds1 = dataseries.SequenceDataSeries()
+        ds2 = dataseries.SequenceDataSeries()
+        crossAbove = cross.CrossAbove(ds1, ds2, maxLen=2)
+        dateTime = datetime.datetime(2000, 1, 1)
+        days = [dateTime + datetime.timedelta(days=i) for i in xrange(5)]
+
+        ds1.appendWithDateTime(days[0], 1)
+        ds1.appendWithDateTime(days[1], 1)
+        self.assertEqual(len(crossAbove), 0)
+        # There is no value for days[0] in ds2.
+        ds2.appendWithDateTime(days[1], 2)
+        self.assertEqual(crossAbove.getDateTimes(), [days[1]])
+        ds2.appendWithDateTime(days[2], 2)
+        ds2.appendWithDateTime(days[3], 2)
+        ds1.appendWithDateTime(days[3], 3)
+        self.assertEqual(crossAbove.getDateTimes(), [days[1], days[3]])
+        self.assertEqual(list(crossAbove), [0, 1])
+        ds1.appendWithDateTime(days[4], 1)
+        ds2.appendWithDateTime(days[4], 0)
+        self.assertEqual(crossAbove.getDateTimes(), [days[3], days[4]])
+        self.assertEqual(list(crossAbove), [1, 0])
+
+    def testNoneValues(self):
+        ds1 = dataseries.SequenceDataSeries()
+        ds2 = dataseries.SequenceDataSeries()
+        crossAbove = cross.CrossAbove(ds1, ds2)
+        self.__appendAll(ds1, ds2, [None, 1, None, 3], [2, 2, 2, None])
+        ds1.append(3)
+        ds2.append(2)
+        self.assertEqual(list(crossAbove), [0, 0, 0, 0, 1])
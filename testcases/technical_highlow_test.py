@@ -33,3 +33,27 @@ class HighLowTestCase(common.TestCase):
             values.append(value)
         self.assertEqual(high[-1], 5)
         self.assertEqual(low[-1], 3)
+
+    def testMatchesWindowScan(self):
+        # Values repeat often so ties are covered.
+        source = [(i * 7919) % 23 for i in xrange(1000)]
+        for period in [1, 2, 5, 252]:
+            values = dataseries.SequenceDataSeries()
+            high = highlow.High(values, period)
+            low = highlow.Low(values, period)
+            for value in source:
+                values.append(value)
+            for i in xrange(len(source)):
+                if i < period - 1:
+                    self.assertEqual(high[i], None)
+                    self.assertEqual(low[i], None)
+                else:
+                    self.assertEqual(high[i], max(source[i-period+1:i+1]))
+                    self.assertEqual(low[i], min(source[i-period+1:i+1]))
+
+    def testSkipNone(self):
+        values = dataseries.SequenceDataSeries()
+        high = highlow.High(values, 2)
+        for value in [1, None, 3, None, 2]:
+            values.append(value)
+        self.assertEqual(list(high), [None, None, 3, 3, 3])
@@ -24,6 +24,7 @@ import common
 
 from pyalgotrade.technical import linreg
 from pyalgotrade import dataseries
+from pyalgotrade.utils import dt
 
 
 class LeastSquaresRegressionTestCase(common.TestCase):
@@ -79,3 +80,40 @@ class LeastSquaresRegressionTestCase(common.TestCase):
         nextDateTime = nextDateTime + datetime.timedelta(milliseconds=50)
         seqDS.appendWithDateTime(nextDateTime, 5)
         self.assertEqual(round(lsReg[-1], 2), 5)
+
+    def testMatchesLsreg(self):
+        # More values than the number of updates after which the moments get recalculated.
+        values = [100 + (i * 7919 % 101) / 10.0 + i * 0.01 for i in xrange(2500)]
+        seqDS = dataseries.SequenceDataSeries()
+        lsReg = linreg.LeastSquaresRegression(seqDS, 20)
+        dateTime = datetime.datetime(2012, 1, 1)
+        timestamps = []
+        for i, value in enumerate(values):
+            dateTime = dateTime + datetime.timedelta(minutes=1 + i % 3)
+            timestamps.append(dt.datetime_to_timestamp(dateTime))
+            seqDS.appendWithDateTime(dateTime, value)
+            if i >= 19:
+                a, b = linreg.lsreg(timestamps[-20:], values[i-19:i+1])
+                self.assertAlmostEqual(lsReg[-1], a * timestamps[-1] + b, places=6)
+        futureDateTime = dateTime + datetime.timedelta(hours=1)
+        self.assertAlmostEqual(lsReg.getValueAt(futureDateTime), a * dt.datetime_to_timestamp(futureDateTime) + b, places=6)
+
+
+class SlopeTestCase(common.TestCase):
+    def testMatchesLsreg(self):
+        values = [100 + (i * 7919 % 101) / 10.0 + i * 0.01 for i in xrange(2500)]
+        seqDS = dataseries.SequenceDataSeries()
+        slope = linreg.Slope(seqDS, 30)
+        for i, value in enumerate(values):
+            seqDS.append(value)
+            if i < 29:
+                self.assertEqual(slope[-1], None)
+            else:
+                self.assertAlmostEqual(slope[-1], linreg.lsreg(range(30), values[i-29:i+1])[0], places=9)
+
+    def testSkipNone(self):
+        seqDS = dataseries.SequenceDataSeries()
+        slope = linreg.Slope(seqDS, 3)
+        for value in [1, None, 2, 3, None, 5]:
+            seqDS.append(value)
+        self.assertEqual(list(slope), [None, None, None, 1, 1, 1.5])
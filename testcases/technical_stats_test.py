@@ -70,3 +70,31 @@ class TestCase(common.TestCase):
             if i >= 4:
                 self.assertEqual(round(zscore[-1], 4), round(expected[i], 4))
             i += 1
+
+    def testFlatAfterVaried(self):
+        for seed in xrange(20):
+            values = numpy.random.RandomState(seed).uniform(50, 150, size=37).tolist() + [101.37] * 20
+            seqDS = dataseries.SequenceDataSeries()
+            stdDev = stats.StdDev(seqDS, 20)
+            zscore = stats.ZScore(seqDS, 20)
+            with numpy.errstate(invalid="ignore"):
+                for value in values:
+                    seqDS.append(value)
+            self.assertEqual(stdDev[-1], 0.0)
+            self.assertTrue(numpy.isnan(zscore[-1]))
+            self.assertNotEqual(stdDev[-2], 0.0)
+
+    def testStdDevAndZScoreMatchNumPy(self):
+        values = (1000 + numpy.cumsum(numpy.random.RandomState(1).normal(size=5000))).tolist()
+        seqDS = dataseries.SequenceDataSeries()
+        stdDev = stats.StdDev(seqDS, 200, ddof=1)
+        zscore = stats.ZScore(seqDS, 200)
+        for i, value in enumerate(values):
+            seqDS.append(value)
+            if i < 199:
+                self.assertEqual(stdDev[-1], None)
+                self.assertEqual(zscore[-1], None)
+            else:
+                window = numpy.array(values[i-199:i+1])
+                self.assertAlmostEqual(stdDev[-1], window.std(ddof=1), places=8)
+                self.assertAlmostEqual(zscore[-1], (window[-1] - window.mean()) / window.std(), places=8)
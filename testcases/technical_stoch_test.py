@@ -123,3 +123,21 @@ class TestCase(common.TestCase):
         stochFilter = stoch.StochasticOscillator(barDS, 2, 2)
         self.__fillBarDataSeries(barDS, closePrices, highPrices, lowPrices)
         self.assertEqual(stochFilter[-1], 0)
+
+    def testMatchesWindowScan(self):
+        # Random walk prices so the lowest low and highest high leave the window at different times.
+        prices = [100]
+        for i in xrange(1, 500):
+            prices.append(prices[-1] + (i * 7919 % 13) - 6)
+        highPrices = [price + i % 3 for i, price in enumerate(prices)]
+        lowPrices = [price - i % 4 for i, price in enumerate(prices)]
+
+        barDS = bards.BarDataSeries()
+        stochFilter = stoch.StochasticOscillator(barDS, 20)
+        self.__fillBarDataSeries(barDS, prices, highPrices, lowPrices)
+        for i in xrange(19, len(prices)):
+            lowestLow, highestHigh = stoch.get_low_high_values(False, barDS[i-19:i+1])
+            expected = 0.0
+            if prices[i] != lowestLow:
+                expected = (prices[i] - lowestLow) / float(highestHigh - lowestLow) * 100
+            self.assertEqual(stochFilter[i], expected)
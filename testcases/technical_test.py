@@ -18,10 +18,15 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import gc
+import weakref
+
 import common
 
 from pyalgotrade import technical
 from pyalgotrade import dataseries
+from pyalgotrade.technical import ma
+from pyalgotrade.technical import macd
 
 
 class TestEventWindow(technical.EventWindow):
@@ -56,3 +61,51 @@ class DataSeriesFilterTest(common.TestCase):
             testFilter[20]
         ds.append(10)
         self.assertEqual(testFilter[20], 10)
+
+
+class SharedIndicatorTest(common.TestCase):
+    def testSameKey(self):
+        ds = dataseries.SequenceDataSeries()
+        sma = technical.get_shared(ma.SMA, ds, 2)
+        self.assertTrue(technical.get_shared(ma.SMA, ds, 2) is sma)
+        self.assertFalse(technical.get_shared(ma.SMA, ds, 3) is sma)
+        self.assertFalse(technical.get_shared(ma.EMA, ds, 2) is sma)
+        self.assertFalse(technical.get_shared(ma.SMA, dataseries.SequenceDataSeries(), 2) is sma)
+        for value in [1, 2, 3]:
+            ds.append(value)
+        self.assertEqual(sma[:], [None, 1.5, 2.5])
+        self.assertEqual(technical.get_shared(ma.SMA, ds, 2)[:], [None, 1.5, 2.5])
+
+    def testMaxLenGrows(self):
+        ds = dataseries.SequenceDataSeries()
+        sma = technical.get_shared(ma.SMA, ds, 2, maxLen=5)
+        self.assertEqual(sma.getMaxLen(), 5)
+        self.assertTrue(technical.get_shared(ma.SMA, ds, 2, maxLen=10) is sma)
+        self.assertEqual(sma.getMaxLen(), 10)
+        technical.get_shared(ma.SMA, ds, 2, maxLen=3)
+        self.assertEqual(sma.getMaxLen(), 10)
+        technical.get_shared(ma.SMA, ds, 2)
+        self.assertEqual(sma.getMaxLen(), dataseries.DEFAULT_MAX_LEN)
+
+    def testMaxLenGrowsForCompoundIndicators(self):
+        ds = dataseries.SequenceDataSeries()
+        indicator = technical.get_shared(macd.MACD, ds, 2, 3, 2, maxLen=5)
+        technical.get_shared(macd.MACD, ds, 2, 3, 2, maxLen=10)
+        self.assertEqual(indicator.getMaxLen(), 10)
+        self.assertEqual(indicator.getSignal().getMaxLen(), 10)
+        self.assertEqual(indicator.getHistogram().getMaxLen(), 10)
+
+    def testUnhashableArguments(self):
+        ds = dataseries.SequenceDataSeries()
+        self.assertFalse(technical.get_shared(ma.WMA, ds, [1, 2]) is technical.get_shared(ma.WMA, ds, [1, 2]))
+        self.assertTrue(technical.get_shared(ma.WMA, ds, (1, 2)) is technical.get_shared(ma.WMA, ds, (1, 2)))
+
+    def testNotKeptAlive(self):
+        ds = dataseries.SequenceDataSeries()
+        sma = weakref.ref(technical.get_shared(ma.SMA, ds, 2))
+        # The source dataseries keeps the indicator alive.
+        gc.collect()
+        self.assertFalse(sma() is None)
+        del ds
+        gc.collect()
+        self.assertTrue(sma() is None)
@@ -45,6 +45,15 @@ class SlopeTest(common.TestCase):
         self.assertEqual(slope[0], 0.0)
         self.assertEqual(slope[1], -1.0)
 
+    def testSlopeFlat(self):
+        slope = self.__buildSlope([1.5, 3.25] + [100.1] * 30, 20)
+        for i in range(21, len(slope)):
+            self.assertEqual(slope[i], 0.0)
+
+    def testInvalidPeriod(self):
+        with self.assertRaises(AssertionError):
+            linreg.Slope(dataseries.SequenceDataSeries(), 1)
+
 
 class TrendTest(common.TestCase):
     def __buildTrend(self, values, trendDays, positiveThreshold, negativeThreshold, trendMaxLen=None):
@@ -84,6 +93,11 @@ class TrendTest(common.TestCase):
         self.assertEqual(trend[1], False)
         self.assertEqual(len(trend), 2)
 
+    def testTrendFlat(self):
+        for value, trendDays in [(100.1, 20), (12.7, 5), (33.33, 30)]:
+            trend = self.__buildTrend([value] * 40, trendDays, 0, 0)
+            self.assertEqual(list(trend), [None] * 40)
+
     def testInvalidThreshold(self):
         seqDS = dataseries.SequenceDataSeries()
         with self.assertRaisesRegexp(Exception, "Invalid thresholds"):
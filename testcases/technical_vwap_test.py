@@ -18,10 +18,17 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import datetime
+
+import pytz
+
 import common
 
 from pyalgotrade.technical import vwap
 from pyalgotrade.barfeed import yahoofeed
+from pyalgotrade.dataseries import bards
+from pyalgotrade import bar
+from pyalgotrade import marketsession
 
 
 class VWAPTestCase(common.TestCase):
@@ -96,3 +103,78 @@ class VWAPTestCase(common.TestCase):
         outputValues = [14.605005665747331, 14.605416923506045]
         for i in xrange(2):
             self.assertEqual(round(vwap_[i], 4), round(outputValues[i], 4))
+
+    def __vwap(self, bars, useTypicalPrice):
+        total = 0
+        volume = 0
+        for bar_ in bars:
+            if useTypicalPrice:
+                total += bar_.getTypicalPrice() * bar_.getVolume()
+            else:
+                total += bar_.getPrice() * bar_.getVolume()
+            volume += bar_.getVolume()
+        return total / float(volume)
+
+    def testMatchesWindowScan(self):
+        for useTypicalPrice in [False, True]:
+            barFeed = self.__getFeed()
+            bars = barFeed[VWAPTestCase.Instrument]
+            vwap_ = vwap.VWAP(bars, 20, useTypicalPrice)
+            barFeed.loadAll()
+            for i in xrange(19, len(bars)):
+                self.assertAlmostEqual(vwap_[i], self.__vwap(bars[i-19:i+1], useTypicalPrice), places=9)
+
+    def testLongSeries(self):
+        # More bars than the number of updates after which the sums get recalculated.
+        bars = bards.BarDataSeries()
+        vwap_ = vwap.VWAP(bars, 30)
+        dateTime = datetime.datetime(2000, 1, 1)
+        for i in xrange(2500):
+            price = 10 + (i * 7919 % 101) / 10.0
+            bars.append(bar.BasicBar(dateTime + datetime.timedelta(minutes=i), price, price, price, price, 1000 + i % 7, None, bar.Frequency.MINUTE))
+            if i >= 29:
+                self.assertAlmostEqual(vwap_[-1], self.__vwap(bars[-30:], False), places=9)
+
+    def __buildBar(self, dateTime, price, volume):
+        return bar.BasicBar(dateTime, price, price, price, price, volume, None, bar.Frequency.MINUTE)
+
+    def testSessionVWAP(self):
+        bars = bards.BarDataSeries()
+        vwap_ = vwap.SessionVWAP(bars)
+        bars.append(self.__buildBar(datetime.datetime(2013, 1, 2, 9, 30), 10, 100))
+        bars.append(self.__buildBar(datetime.datetime(2013, 1, 2, 9, 31), 20, 300))
+        bars.append(self.__buildBar(datetime.datetime(2013, 1, 3, 9, 30), 30, 100))
+        bars.append(self.__buildBar(datetime.datetime(2013, 1, 3, 9, 31), 40, 100))
+        self.assertEqual(list(vwap_), [10, 17.5, 30, 35])
+        self.assertEqual(vwap_.getEventWindow().getSessionDate(), datetime.date(2013, 1, 3))
+
+    def testSessionVWAPWithMarketSession(self):
+        # 04:00 and 04:59 UTC are still January 1st in New York, while 05:00 UTC is already January 2nd.
+        bars = bards.BarDataSeries()
+        vwap_ = vwap.SessionVWAP(bars, marketsession.USEquities, True)
+        bars.append(self.__buildBar(datetime.datetime(2013, 1, 2, 4, 0, tzinfo=pytz.utc), 10, 100))
+        bars.append(self.__buildBar(datetime.datetime(2013, 1, 2, 4, 59, tzinfo=pytz.utc), 20, 100))
+        bars.append(self.__buildBar(datetime.datetime(2013, 1, 2, 5, 0, tzinfo=pytz.utc), 40, 100))
+        self.assertEqual(list(vwap_), [10, 15, 40])
+
+    def testSessionVWAPCrossingMidnight(self):
+        # Sessions open at 18:00 New York time and close the next day.
+        timezone = marketsession.USEquities.getTimezone()
+        bars = bards.BarDataSeries()
+        vwap_ = vwap.SessionVWAP(bars, marketsession.USEquities, sessionOpen=datetime.time(18))
+        bars.append(self.__buildBar(timezone.localize(datetime.datetime(2013, 1, 2, 16, 59)), 10, 100))
+        bars.append(self.__buildBar(timezone.localize(datetime.datetime(2013, 1, 2, 18, 0)), 20, 100))
+        bars.append(self.__buildBar(timezone.localize(datetime.datetime(2013, 1, 2, 23, 59)), 40, 100))
+        bars.append(self.__buildBar(timezone.localize(datetime.datetime(2013, 1, 3, 0, 1)), 60, 200))
+        bars.append(self.__buildBar(timezone.localize(datetime.datetime(2013, 1, 3, 16, 59)), 30, 100))
+        bars.append(self.__buildBar(timezone.localize(datetime.datetime(2013, 1, 3, 18, 0)), 50, 100))
+        self.assertEqual(list(vwap_), [10, 20, 30, 45, 42, 50])
+        self.assertEqual(vwap_.getEventWindow().getSessionDate(), datetime.date(2013, 1, 3))
+
+    def testSessionVWAPCrossingMidnightWithoutSessionOpen(self):
+        # Without the session open the calculation starts over at midnight, in the middle of the session.
+        bars = bards.BarDataSeries()
+        vwap_ = vwap.SessionVWAP(bars)
+        bars.append(self.__buildBar(datetime.datetime(2013, 1, 2, 18, 0), 20, 100))
+        bars.append(self.__buildBar(datetime.datetime(2013, 1, 3, 0, 1), 60, 100))
+        self.assertEqual(list(vwap_), [20, 60])
@@ -20,11 +20,14 @@
 
 import datetime
 
+import numpy as np
+
 import common
 
 from pyalgotrade import utils
 from pyalgotrade.utils import collections
 from pyalgotrade.utils import dt
+from pyalgotrade.utils import stats
 
 
 class UtilsTestCase(common.TestCase):
@@ -299,6 +302,25 @@ class NumPyDequeTestCase(CollectionTestCaseBase):
             d.append(i)
         self.assertEqual(d[0:3].sum(), 3)
 
+    def testWrapAround(self):
+        d = collections.NumPyDeque(3)
+
+        for i in range(100):
+            d.append(i)
+            expected = range(max(0, i - 2), i + 1)
+            self.assertEqual(len(d), len(expected))
+            self.assertEqual(d.data().tolist(), expected)
+            self.assertEqual(d[-1], i)
+
+    def testObjectDType(self):
+        d = collections.NumPyDeque(2, dtype=object)
+
+        for value in ["a", None, "b", "c"]:
+            d.append(value)
+        self.assertEqual(d.data().tolist(), ["b", "c"])
+        d.resize(1)
+        self.assertEqual(d.data().tolist(), ["c"])
+
 
 class ListDequeTestCase(CollectionTestCaseBase):
     def buildCollection(self, maxLen):
@@ -313,6 +335,153 @@ class ListDequeTestCase(CollectionTestCaseBase):
     def testResizeEmpty(self):
         CollectionTestCaseBase._testResizeEmptyImpl(self)
 
+    def testAppendAndAccess(self):
+        d = collections.ListDeque(4)
+
+        for i in range(50):
+            d.append(i)
+            expected = range(max(0, i - 3), i + 1)
+            self.assertEqual(len(d), len(expected))
+            self.assertEqual(d[:], expected)
+            self.assertEqual(d[1:3], expected[1:3])
+            self.assertEqual(d[-2:], expected[-2:])
+            self.assertEqual(d[::-1], expected[::-1])
+            self.assertEqual(d[::2], expected[::2])
+            self.assertEqual(d[0], expected[0])
+            self.assertEqual(d[-1], expected[-1])
+            with self.assertRaises(IndexError):
+                d[len(expected)]
+            with self.assertRaises(IndexError):
+                d[-1 * len(expected) - 1]
+        self.assertEqual(d.data(), [46, 47, 48, 49])
+
+    def testDataDoesntCompact(self):
+        d = collections.ListDeque(4)
+        for i in range(6):
+            d.append(i)
+        values = d.data()
+        self.assertEqual(values, [2, 3, 4, 5])
+        # Getting the data doesn't change the deque, and appending doesn't change the data returned before.
+        d.append(6)
+        self.assertEqual(values, [2, 3, 4, 5])
+        self.assertEqual(d.data(), [3, 4, 5, 6])
+        self.assertEqual(d[:], [3, 4, 5, 6])
+        # Views stay the same after the list gets compacted.
+        for i in range(7, 20):
+            d.append(i)
+        self.assertEqual(values, [2, 3, 4, 5])
+        self.assertEqual(d.data(), [16, 17, 18, 19])
+
+    def testDataView(self):
+        d = collections.ListDeque(3)
+        for i in range(5):
+            d.append(i)
+        values = d.data()
+        self.assertEqual(len(values), 3)
+        self.assertEqual(list(values), [2, 3, 4])
+        self.assertEqual(list(reversed(values)), [4, 3, 2])
+        self.assertEqual(values[-1], 4)
+        self.assertEqual(values[1:], [3, 4])
+        self.assertTrue(3 in values)
+        self.assertFalse(1 in values)
+        self.assertEqual(values.index(3), 1)
+        self.assertEqual(values, d.data())
+        self.assertNotEqual(values, [2, 3])
+        self.assertEqual(repr(values), "[2, 3, 4]")
+        with self.assertRaises(IndexError):
+            values[3]
+
+
+class RollingMomentsTestCase(common.TestCase):
+    def __getValues(self, count):
+        return (100 + np.cumsum(np.random.RandomState(1).normal(size=count))).tolist()
+
+    def testMoments(self):
+        values = self.__getValues(3000)
+        for recalcPeriod in [1, 7, stats.RECALC_PERIOD]:
+            moments = stats.RollingMoments(50, recalcPeriod)
+            self.assertEqual(moments.getMean(), None)
+            self.assertEqual(moments.getVariance(), None)
+            for i, value in enumerate(values):
+                moments.add(value)
+                window = np.array(values[max(0, i - 49):i + 1])
+                self.assertEqual(len(moments), len(window))
+                self.assertEqual(moments.windowFull(), len(window) == 50)
+                self.assertAlmostEqual(moments.getMean(), window.mean(), places=9)
+                self.assertAlmostEqual(moments.getStdDev(), window.std(), places=9)
+                if len(window) > 1:
+                    self.assertAlmostEqual(moments.getVariance(1), window.var(ddof=1), places=9)
+                else:
+                    self.assertEqual(moments.getVariance(1), None)
+
+    def testWindowSizeOne(self):
+        moments = stats.RollingMoments(1)
+        for value in [1, 5, 2]:
+            moments.add(value)
+            self.assertEqual(moments.getMean(), value)
+            self.assertEqual(moments.getVariance(), 0)
+
+    def testCoMoments(self):
+        xValues = self.__getValues(3000)
+        yValues = [value * 0.5 + i % 3 for i, value in enumerate(xValues)]
+        moments = stats.RollingCoMoments(20, 100)
+        self.assertEqual(moments.getCovariance(), None)
+        for i in xrange(len(xValues)):
+            moments.add(xValues[i], yValues[i])
+            begin = max(0, i - 19)
+            x = np.array(xValues[begin:i + 1])
+            y = np.array(yValues[begin:i + 1])
+            self.assertAlmostEqual(moments.getXMean(), x.mean(), places=9)
+            self.assertAlmostEqual(moments.getYMean(), y.mean(), places=9)
+            self.assertAlmostEqual(moments.getXVariance(), x.var(), places=9)
+            self.assertAlmostEqual(moments.getYVariance(), y.var(), places=9)
+            self.assertAlmostEqual(moments.getCovariance(), ((x - x.mean()) * (y - y.mean())).mean(), places=9)
+        self.assertEqual(moments.getXValues().tolist(), xValues[-20:])
+        self.assertEqual(moments.getYValues().tolist(), yValues[-20:])
+
+    def testFlatAfterVaried(self):
+        values = np.random.RandomState(1).uniform(50, 150, size=37).tolist() + [101.37] * 20
+        moments = stats.RollingMoments(20)
+        coMoments = stats.RollingCoMoments(20)
+        for i, value in enumerate(values):
+            moments.add(value)
+            coMoments.add(i, value)
+        self.assertEqual(moments.getMean(), 101.37)
+        self.assertEqual(moments.getVariance(), 0.0)
+        self.assertEqual(coMoments.getYMean(), 101.37)
+        self.assertEqual(coMoments.getYVariance(), 0.0)
+        self.assertEqual(coMoments.getCovariance(), 0.0)
+        self.assertAlmostEqual(coMoments.getXVariance(), np.arange(20).var(), places=9)
+
+    def testLargeValues(self):
+        # Timestamps a few seconds apart, after a few hours apart.
+        xValues = [1.3e9 + i * 3600 for i in xrange(10)] + [1.3e9 + 36000 + i * 0.05 for i in xrange(5)]
+        moments = stats.RollingCoMoments(3)
+        for x in xValues:
+            moments.add(x, x * 2)
+        x = np.array(xValues[-3:])
+        self.assertAlmostEqual(moments.getXMean(), x.mean(), places=6)
+        self.assertAlmostEqual(moments.getXVariance() / x.var(), 1, places=6)
+        self.assertAlmostEqual(moments.getCovariance() / moments.getXVariance(), 2, places=6)
+
+
+class RollingExtremumTestCase(common.TestCase):
+    def testExtremum(self):
+        values = np.random.RandomState(1).randint(0, 10, size=2000).tolist()
+        for windowSize in [1, 3, 50]:
+            for useMin in [True, False]:
+                extremum = stats.RollingExtremum(windowSize, useMin)
+                self.assertEqual(extremum.getValue(), None)
+                for i, value in enumerate(values):
+                    extremum.add(value)
+                    window = values[max(0, i - windowSize + 1):i + 1]
+                    self.assertEqual(len(extremum), len(window))
+                    self.assertEqual(extremum.windowFull(), len(window) == windowSize)
+                    if useMin:
+                        self.assertEqual(extremum.getValue(), min(window))
+                    else:
+                        self.assertEqual(extremum.getValue(), max(window))
+
 
 class DateTimeTestCase(common.TestCase):
     def testTimeStampConversions(self):
@@ -78,6 +78,9 @@ class BarFeedEventHandler_TestFilterRange:
 class FeedTestCase(common.TestCase):
     TestInstrument = "orcl"
 
+    def buildFeed(self, *args, **kwargs):
+        return yahoofeed.Feed(*args, **kwargs)
+
     def __parseDate(self, date):
         parser = yahoofeed.RowParser(datetime.time(23, 59), bar.Frequency.DAY)
         row = {
@@ -92,33 +95,33 @@ class FeedTestCase(common.TestCase):
 
     def testInvalidConstruction(self):
         with self.assertRaises(Exception):
-            yahoofeed.Feed(maxLen=0)
+            self.buildFeed(maxLen=0)
 
     def testDefaultInstrument(self):
-        barFeed = yahoofeed.Feed()
+        barFeed = self.buildFeed()
         self.assertEquals(barFeed.getDefaultInstrument(), None)
         barFeed.addBarsFromCSV(FeedTestCase.TestInstrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"))
         self.assertEquals(barFeed.getDefaultInstrument(), FeedTestCase.TestInstrument)
 
     def testDuplicateBars(self):
-        barFeed = yahoofeed.Feed()
+        barFeed = self.buildFeed()
         barFeed.addBarsFromCSV(FeedTestCase.TestInstrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"))
         barFeed.addBarsFromCSV(FeedTestCase.TestInstrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"))
         with self.assertRaisesRegexp(Exception, "Duplicate bars found for.*"):
             barFeed.loadAll()
 
     def testBaseBarFeed(self):
-        barFeed = yahoofeed.Feed()
+        barFeed = self.buildFeed()
         barFeed.sanitizeBars(True)
         barFeed.addBarsFromCSV(FeedTestCase.TestInstrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"))
         barfeed_test.check_base_barfeed(self, barFeed, True)
 
     def testInvalidFrequency(self):
         with self.assertRaisesRegexp(Exception, "Invalid frequency.*"):
-            yahoofeed.Feed(frequency=bar.Frequency.MINUTE)
+            self.buildFeed(frequency=bar.Frequency.MINUTE)
 
     def testBaseFeedInterface(self):
-        barFeed = yahoofeed.Feed()
+        barFeed = self.buildFeed()
         barFeed.addBarsFromCSV(FeedTestCase.TestInstrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"))
         feed_test.tstBaseFeedInterface(self, barFeed)
 
@@ -141,7 +144,7 @@ class FeedTestCase(common.TestCase):
         self.assertTrue(self.__parseDate("2011-01-01") > self.__parseDate("2001-02-02"))
 
     def testCSVFeedLoadOrder(self):
-        barFeed = yahoofeed.Feed()
+        barFeed = self.buildFeed()
         barFeed.addBarsFromCSV(FeedTestCase.TestInstrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"))
         barFeed.addBarsFromCSV(FeedTestCase.TestInstrument, common.get_data_file_path("orcl-2001-yahoofinance.csv"))
 
@@ -153,7 +156,7 @@ class FeedTestCase(common.TestCase):
         self.assertTrue(handler.getEventCount() > 0)
 
     def __testFilteredRangeImpl(self, fromDate, toDate):
-        barFeed = yahoofeed.Feed()
+        barFeed = self.buildFeed()
         barFeed.setBarFilter(csvfeed.DateRangeFilter(fromDate, toDate))
         barFeed.addBarsFromCSV(FeedTestCase.TestInstrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"))
         barFeed.addBarsFromCSV(FeedTestCase.TestInstrument, common.get_data_file_path("orcl-2001-yahoofinance.csv"))
@@ -178,7 +181,7 @@ class FeedTestCase(common.TestCase):
         self.__testFilteredRangeImpl(datetime.datetime(2000, 1, 1, 00, 00), datetime.datetime(2000, 12, 31, 23, 55))
 
     def testWithoutTimezone(self):
-        barFeed = yahoofeed.Feed()
+        barFeed = self.buildFeed()
         barFeed.addBarsFromCSV(FeedTestCase.TestInstrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"))
         barFeed.addBarsFromCSV(FeedTestCase.TestInstrument, common.get_data_file_path("orcl-2001-yahoofinance.csv"))
         for dateTime, bars in barFeed:
@@ -186,7 +189,7 @@ class FeedTestCase(common.TestCase):
             self.assertTrue(dt.datetime_is_naive(bar.getDateTime()))
 
     def testWithDefaultTimezone(self):
-        barFeed = yahoofeed.Feed(timezone=marketsession.USEquities.getTimezone())
+        barFeed = self.buildFeed(timezone=marketsession.USEquities.getTimezone())
         barFeed.addBarsFromCSV(FeedTestCase.TestInstrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"))
         barFeed.addBarsFromCSV(FeedTestCase.TestInstrument, common.get_data_file_path("orcl-2001-yahoofinance.csv"))
         for dateTime, bars in barFeed:
@@ -194,7 +197,7 @@ class FeedTestCase(common.TestCase):
             self.assertFalse(dt.datetime_is_naive(bar.getDateTime()))
 
     def testWithPerFileTimezone(self):
-        barFeed = yahoofeed.Feed()
+        barFeed = self.buildFeed()
         barFeed.addBarsFromCSV(FeedTestCase.TestInstrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"), marketsession.USEquities.getTimezone())
         barFeed.addBarsFromCSV(FeedTestCase.TestInstrument, common.get_data_file_path("orcl-2001-yahoofinance.csv"), marketsession.USEquities.getTimezone())
         for dateTime, bars in barFeed:
@@ -203,20 +206,20 @@ class FeedTestCase(common.TestCase):
 
     def testWithIntegerTimezone(self):
         try:
-            barFeed = yahoofeed.Feed(timezone=-5)
+            barFeed = self.buildFeed(timezone=-5)
             self.assertTrue(False, "Exception expected")
         except Exception, e:
             self.assertTrue(str(e).find("timezone as an int parameter is not supported anymore") == 0)
 
         try:
-            barFeed = yahoofeed.Feed()
+            barFeed = self.buildFeed()
             barFeed.addBarsFromCSV(FeedTestCase.TestInstrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"), -3)
             self.assertTrue(False, "Exception expected")
         except Exception, e:
             self.assertTrue(str(e).find("timezone as an int parameter is not supported anymore") == 0)
 
     def testMapTypeOperations(self):
-        barFeed = yahoofeed.Feed()
+        barFeed = self.buildFeed()
         barFeed.addBarsFromCSV(FeedTestCase.TestInstrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"), marketsession.USEquities.getTimezone())
         for dateTime, bars in barFeed:
             self.assertTrue(FeedTestCase.TestInstrument in bars)
@@ -226,7 +229,7 @@ class FeedTestCase(common.TestCase):
                 bars["pirulo"]
 
     def testBounded(self):
-        barFeed = yahoofeed.Feed(maxLen=2)
+        barFeed = self.buildFeed(maxLen=2)
         barFeed.addBarsFromCSV(FeedTestCase.TestInstrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"), marketsession.USEquities.getTimezone())
         for dateTime, bars in barFeed:
             pass
@@ -242,7 +245,7 @@ class FeedTestCase(common.TestCase):
         self.assertEqual(len(barDS.getAdjCloseDataSeries()), 2)
 
     def testReset(self):
-        barFeed = yahoofeed.Feed()
+        barFeed = self.buildFeed()
         barFeed.addBarsFromCSV(FeedTestCase.TestInstrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"), marketsession.USEquities.getTimezone())
         barFeed.loadAll()
         instruments = barFeed.getRegisteredInstruments()
@@ -258,3 +261,52 @@ class FeedTestCase(common.TestCase):
         for i in range(len(ds)):
             self.assertEqual(ds[i].getDateTime(), reloadedDs[i].getDateTime())
             self.assertEqual(ds[i].getClose(), reloadedDs[i].getClose())
+
+
+class BulkLoaderFeedTestCase(FeedTestCase):
+    def buildFeed(self, *args, **kwargs):
+        ret = yahoofeed.Feed(*args, **kwargs)
+        ret.setUseBulkLoader(True)
+        return ret
+
+    def __loadBars(self, useBulkLoader, barFilter=None, timezone=None):
+        barFeed = yahoofeed.Feed(timezone=timezone)
+        barFeed.sanitizeBars(True)
+        barFeed.setUseBulkLoader(useBulkLoader)
+        barFeed.setBarFilter(barFilter)
+        barFeed.addBarsFromCSV(FeedTestCase.TestInstrument, common.get_data_file_path("orcl-2001-yahoofinance.csv"))
+        barFeed.addBarsFromCSV(FeedTestCase.TestInstrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+        return [bars[FeedTestCase.TestInstrument] for dateTime, bars in barFeed]
+
+    def __testSameBars(self, barFilter=None, timezone=None):
+        bars = self.__loadBars(False, barFilter, timezone)
+        bulkBars = self.__loadBars(True, barFilter, timezone)
+        self.assertTrue(len(bars) > 0)
+        self.assertEqual(len(bars), len(bulkBars))
+        for bar_, bulkBar in zip(bars, bulkBars):
+            self.assertEqual(bar_.getDateTime(), bulkBar.getDateTime())
+            self.assertEqual(bar_.getOpen(), bulkBar.getOpen())
+            self.assertEqual(bar_.getHigh(), bulkBar.getHigh())
+            self.assertEqual(bar_.getLow(), bulkBar.getLow())
+            self.assertEqual(bar_.getClose(), bulkBar.getClose())
+            self.assertEqual(bar_.getVolume(), bulkBar.getVolume())
+            self.assertEqual(bar_.getAdjClose(), bulkBar.getAdjClose())
+            self.assertEqual(bar_.getFrequency(), bulkBar.getFrequency())
+
+    def testSameBarsAsRowParser(self):
+        self.__testSameBars()
+
+    def testSameBarsAsRowParserWithTimezone(self):
+        self.__testSameBars(timezone=marketsession.USEquities.getTimezone())
+
+    def testSameBarsAsRowParserWithFilter(self):
+        fromDate = datetime.datetime(2000, 6, 1)
+        toDate = datetime.datetime(2001, 2, 1)
+        self.__testSameBars(csvfeed.DateRangeFilter(fromDate, toDate))
+
+    def testSameBarsAsRowParserWithLocalizedFilter(self):
+        timezone = marketsession.USEquities.getTimezone()
+        fromDate = dt.localize(datetime.datetime(2000, 6, 1), timezone)
+        toDate = dt.as_utc(datetime.datetime(2001, 2, 1))
+        self.__testSameBars(csvfeed.DateRangeFilter(fromDate, toDate), timezone)
+
@@ -0,0 +1,81 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2015 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+# Measures the time it takes to load a minute bars CSV file with GenericBarFeed one row at a time, in bulk and from the
+# bar cache, and the time it takes to dispatch all the bars afterwards.
+
+import sys
+import os
+import time
+import datetime
+import shutil
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))  # For pyalgotrade
+
+from pyalgotrade.barfeed import csvfeed
+from pyalgotrade import bar
+
+
+rowCounts = [10000, 100000, 500000]
+
+
+def write_csv(path, rowCount):
+    dateTime = datetime.datetime(2005, 1, 3, 9, 30)
+    with open(path, "w") as f:
+        f.write("Date Time,Open,High,Low,Close,Volume,Adj Close\n")
+        for i in xrange(rowCount):
+            price = 100 + (i % 100) / 10.0
+            f.write("%s,%s,%s,%s,%s,%s,\n" % (dateTime.strftime("%Y-%m-%d %H:%M:%S"), price, price + 1, price - 1, price, 1000 + i))
+            dateTime += datetime.timedelta(minutes=1)
+
+
+def benchmark(path, useBulkLoader, cacheDir=None):
+    barFeed = csvfeed.GenericBarFeed(bar.Frequency.MINUTE)
+    barFeed.setUseBulkLoader(useBulkLoader)
+    barFeed.setCacheDir(cacheDir)
+    barFeed.setBarFilter(csvfeed.DateRangeFilter(datetime.datetime(2005, 1, 10)))
+    begin = time.time()
+    barFeed.addBarsFromCSV("spy", path)
+    loaded = time.time()
+    barFeed.loadAll()
+    return loaded - begin, time.time() - loaded
+
+
+def main():
+    tmpDir = tempfile.mkdtemp()
+    try:
+        cacheDir = os.path.join(tmpDir, "cache")
+        print "%10s %14s %14s %14s %14s" % ("rows", "row load (s)", "bulk load (s)", "cached load (s)", "dispatch (s)")
+        for rowCount in rowCounts:
+            path = os.path.join(tmpDir, "bars-%d.csv" % rowCount)
+            write_csv(path, rowCount)
+            rowLoad, rowDispatch = benchmark(path, False)
+            bulkLoad, bulkDispatch = benchmark(path, True)
+            # The first run populates the cache.
+            benchmark(path, False, cacheDir)
+            cachedLoad, cachedDispatch = benchmark(path, False, cacheDir)
+            print "%10d %14.2f %14.2f %14.2f %14.2f" % (rowCount, rowLoad, bulkLoad, cachedLoad, rowDispatch)
+    finally:
+        shutil.rmtree(tmpDir)
+
+
+if __name__ == "__main__":
+    main()
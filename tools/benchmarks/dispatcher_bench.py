@@ -0,0 +1,70 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2015 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+# Measures dispatcher event throughput as the number of subjects grows.
+# Each subject is a non-realtime feed and events are spread round-robin across subjects, so every step dispatches a
+# single subject.
+
+import sys
+import os
+import datetime
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))  # For pyalgotrade
+
+from pyalgotrade import dispatcher
+from pyalgotrade.feed import memfeed
+
+
+eventCount = 20000
+subjectCounts = [1, 10, 100, 500, 1000]
+
+
+def build_dispatcher(subjectCount, usePriorityQueue):
+    ret = dispatcher.Dispatcher()
+    ret.setUsePriorityQueue(usePriorityQueue)
+    begin = datetime.datetime(2000, 1, 1)
+    values = [[] for i in xrange(subjectCount)]
+    for i in xrange(eventCount):
+        values[i % subjectCount].append((begin + datetime.timedelta(seconds=i), {"value": i}))
+    for subjectValues in values:
+        feed = memfeed.MemFeed()
+        feed.addValues(subjectValues)
+        ret.addSubject(feed)
+    return ret
+
+
+def benchmark(subjectCount, usePriorityQueue):
+    disp = build_dispatcher(subjectCount, usePriorityQueue)
+    begin = time.time()
+    disp.run()
+    return eventCount / (time.time() - begin)
+
+
+def main():
+    print "%10s %20s %20s" % ("subjects", "scan (events/s)", "heap (events/s)")
+    for subjectCount in subjectCounts:
+        scan = benchmark(subjectCount, False)
+        heap = benchmark(subjectCount, True)
+        print "%10d %20.0f %20.0f" % (subjectCount, scan, heap)
+
+
+if __name__ == "__main__":
+    main()
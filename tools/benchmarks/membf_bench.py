@@ -0,0 +1,154 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2015 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+# Measures how long it takes membf.BarFeed to:
+# - Merge sparse intraday bars from many instruments, against the previous implementation that scanned every
+#   instrument twice on each tick.
+# - Load an instrument from yearly chunks, against the previous implementation that sorted every bar with a cmp
+#   function each time a chunk was added.
+
+import sys
+import os
+import time
+import random
+import datetime
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))  # For pyalgotrade
+
+from pyalgotrade.barfeed import membf
+from pyalgotrade import bar
+from pyalgotrade import utils
+
+
+tickCount = 2000
+barsPerInstrument = 20
+instrumentCounts = [10, 100, 1000, 3000]
+yearCounts = [5, 10, 20]
+barsPerYear = 252 * 390
+
+
+class BarFeed(membf.BarFeed):
+    def barsHaveAdjClose(self):
+        return False
+
+
+# The membf.BarFeed implementation up to version 0.17.
+class ScanningBarFeed(BarFeed):
+    def __init__(self, frequency):
+        super(ScanningBarFeed, self).__init__(frequency)
+        self.__bars = {}
+        self.__nextPos = {}
+
+    def addBarsFromSequence(self, instrument, bars):
+        currentBars = self.__bars.setdefault(instrument, [])
+        self.__nextPos[instrument] = 0
+        currentBars.extend(bars)
+        barCmp = lambda x, y: cmp(x.getDateTime(), y.getDateTime())
+        currentBars.sort(barCmp)
+
+    def eof(self):
+        ret = True
+        for instrument, bars in self.__bars.iteritems():
+            if self.__nextPos[instrument] < len(bars):
+                ret = False
+                break
+        return ret
+
+    def peekDateTime(self):
+        ret = None
+        for instrument, bars in self.__bars.iteritems():
+            nextPos = self.__nextPos[instrument]
+            if nextPos < len(bars):
+                ret = utils.safe_min(ret, bars[nextPos].getDateTime())
+        return ret
+
+    def getNextBars(self):
+        smallestDateTime = self.peekDateTime()
+        if smallestDateTime is None:
+            return None
+        ret = {}
+        for instrument, bars in self.__bars.iteritems():
+            nextPos = self.__nextPos[instrument]
+            if nextPos < len(bars) and bars[nextPos].getDateTime() == smallestDateTime:
+                ret[instrument] = bars[nextPos]
+                self.__nextPos[instrument] += 1
+        return bar.Bars(ret)
+
+
+def build_bars(instrumentCount):
+    ret = {}
+    begin = datetime.datetime(2015, 1, 2, 9, 30)
+    for i in xrange(instrumentCount):
+        ticks = sorted(random.sample(xrange(tickCount), barsPerInstrument))
+        ret["inst%d" % i] = [
+            bar.BasicBar(begin + datetime.timedelta(minutes=tick), 10, 10, 10, 10, 10, None, bar.Frequency.MINUTE) for tick in ticks
+        ]
+    return ret
+
+
+def benchmark(barFeedClass, bars):
+    barFeed = barFeedClass(bar.Frequency.MINUTE)
+    for instrument, instrumentBars in bars.iteritems():
+        barFeed.addBarsFromSequence(instrument, instrumentBars)
+    begin = time.time()
+    ticks = 0
+    while not barFeed.eof():
+        barFeed.getNextBars()
+        ticks += 1
+    return ticks / (time.time() - begin)
+
+
+def build_yearly_bars(yearCount):
+    ret = []
+    begin = datetime.datetime(2000, 1, 3, 9, 30)
+    for year in xrange(yearCount):
+        ret.append([
+            bar.BasicBar(begin + datetime.timedelta(minutes=year * barsPerYear + i), 10, 10, 10, 10, 10, None, bar.Frequency.MINUTE) for i in xrange(barsPerYear)
+        ])
+    return ret
+
+
+def benchmark_load(barFeedClass, yearlyBars):
+    barFeed = barFeedClass(bar.Frequency.MINUTE)
+    begin = time.time()
+    for bars in yearlyBars:
+        barFeed.addBarsFromSequence("spy", bars)
+    return time.time() - begin
+
+
+def main():
+    print "%10s %20s %20s" % ("instruments", "scanning (ticks/s)", "heap (ticks/s)")
+    for instrumentCount in instrumentCounts:
+        bars = build_bars(instrumentCount)
+        scanning = benchmark(ScanningBarFeed, bars)
+        heap = benchmark(BarFeed, bars)
+        print "%10d %20.0f %20.0f" % (instrumentCount, scanning, heap)
+
+    print
+    print "%10s %20s %20s" % ("years", "cmp sort (secs)", "merge (secs)")
+    for yearCount in yearCounts:
+        yearlyBars = build_yearly_bars(yearCount)
+        cmpSort = benchmark_load(ScanningBarFeed, yearlyBars)
+        merge = benchmark_load(BarFeed, yearlyBars)
+        print "%10d %20.2f %20.2f" % (yearCount, cmpSort, merge)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2015 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+# Compares peak memory usage and time when dispatching minute bars for many instruments with the in-memory bar feed
+# and with the memory-mapped bar feed. Each run takes place in its own process.
+
+import sys
+import os
+import time
+import shutil
+import tempfile
+import resource
+import multiprocessing
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))  # For pyalgotrade
+
+from pyalgotrade.barfeed import columnar
+from pyalgotrade.barfeed import columnfile
+from pyalgotrade.barfeed import membf
+from pyalgotrade.barfeed import mmapfeed
+from pyalgotrade import bar
+
+
+instrumentCount = 100
+barCount = 5000
+maxLen = 100
+
+
+class MemBarFeed(membf.BarFeed):
+    def barsHaveAdjClose(self):
+        return False
+
+
+def write_files(tmpDir):
+    ret = {}
+    begin = 1420070400 * columnar.MICROSECONDS_PER_SECOND
+    dateTimes = begin + np.arange(barCount, dtype=np.int64) * 60 * columnar.MICROSECONDS_PER_SECOND
+    for i in xrange(instrumentCount):
+        prices = 100 + np.random.random(barCount)
+        path = os.path.join(tmpDir, "inst%d.bars" % i)
+        columnfile.write(path, columnar.BarColumns(dateTimes, prices, prices + 1, prices - 1, prices, prices, None, bar.Frequency.MINUTE))
+        ret["inst%d" % i] = path
+    return ret
+
+
+def run(paths, useMMap, queue):
+    begin = time.time()
+    if useMMap:
+        barFeed = mmapfeed.Feed(bar.Frequency.MINUTE, maxLen)
+        for instrument, path in paths.iteritems():
+            barFeed.addBarsFromFile(instrument, path)
+    else:
+        barFeed = MemBarFeed(bar.Frequency.MINUTE, maxLen)
+        for instrument, path in paths.iteritems():
+            barFeed.addBarsFromSequence(instrument, list(columnfile.read(path)))
+    barFeed.loadAll()
+    queue.put((time.time() - begin, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0))
+
+
+def benchmark(paths, useMMap):
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=run, args=(paths, useMMap, queue))
+    process.start()
+    ret = queue.get()
+    process.join()
+    return ret
+
+
+def main():
+    tmpDir = tempfile.mkdtemp()
+    try:
+        paths = write_files(tmpDir)
+        print "%d instruments, %d minute bars each" % (instrumentCount, barCount)
+        print "%10s %14s %18s" % ("feed", "time (s)", "peak memory (MB)")
+        for name, useMMap in [("membf", False), ("mmapfeed", True)]:
+            elapsed, memory = benchmark(paths, useMMap)
+            print "%10s %14.2f %18.1f" % (name, elapsed, memory)
+    finally:
+        shutil.rmtree(tmpDir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2015 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+# Compares running strategies that only differ in a threshold one at a time, with a new feed for each one like the
+# optimizer does, against running them all with a single pass over the bars, with and without sharing the SMA.
+
+import sys
+import os
+import time
+import datetime
+import random
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))  # For pyalgotrade
+
+from pyalgotrade import barfeed
+from pyalgotrade import strategy
+from pyalgotrade import bar
+from pyalgotrade import technical
+from pyalgotrade.strategy import multi
+from pyalgotrade.technical import ma
+
+
+barCount = 2520
+
+
+class ThresholdStrategy(strategy.BacktestingStrategy):
+    def __init__(self, barFeed, threshold, shareSMA=False):
+        super(ThresholdStrategy, self).__init__(barFeed)
+        self.setDebugMode(False)
+        self.__prices = barFeed["inst"].getCloseDataSeries()
+        if shareSMA:
+            self.__sma = technical.get_shared(ma.SMA, self.__prices, 20)
+        else:
+            self.__sma = ma.SMA(self.__prices, 20)
+        self.__threshold = threshold
+        self.__position = None
+
+    def onBars(self, bars):
+        sma = self.__sma[-1]
+        if sma is None:
+            return
+        price = self.__prices[-1]
+        if self.__position is None:
+            if price > sma * (1 + self.__threshold):
+                self.__position = self.enterLong("inst", 100, True)
+        elif not self.__position.exitActive() and price < sma:
+            self.__position.exitMarket()
+
+    def onExitOk(self, position):
+        self.__position = None
+
+
+def build_bars():
+    ret = []
+    price = 100
+    dateTime = datetime.datetime(2000, 1, 3)
+    for i in xrange(barCount):
+        price = max(1, price + random.gauss(0, 1))
+        ret.append(bar.Bars({"inst": bar.BasicBar(dateTime, price, price + 1, price - 1, price, 1000, price, bar.Frequency.DAY)}))
+        dateTime += datetime.timedelta(days=1)
+    return ret
+
+
+def build_feed(bars):
+    return barfeed.OptimizerBarFeed(bar.Frequency.DAY, ["inst"], bars)
+
+
+def run_one_at_a_time(bars, thresholds):
+    ret = []
+    for threshold in thresholds:
+        strat = ThresholdStrategy(build_feed(bars), threshold)
+        strat.run()
+        ret.append(strat.getResult())
+    return ret
+
+
+def run_single_pass(bars, thresholds, shareSMA):
+    barFeed = build_feed(bars)
+    return multi.run([ThresholdStrategy(barFeed, threshold, shareSMA) for threshold in thresholds])
+
+
+def main():
+    random.seed(0)
+    bars = build_bars()
+    results = []
+    for strategyCount in [10, 50, 200]:
+        thresholds = [i * 0.001 for i in xrange(strategyCount)]
+        begin = time.time()
+        expected = run_one_at_a_time(bars, thresholds)
+        oneAtATime = time.time() - begin
+        begin = time.time()
+        assert(run_single_pass(bars, thresholds, False) == expected)
+        singlePass = time.time() - begin
+        begin = time.time()
+        assert(run_single_pass(bars, thresholds, True) == expected)
+        sharedSMA = time.time() - begin
+        results.append((strategyCount, oneAtATime, singlePass, sharedSMA))
+
+    print "%d bars" % (barCount)
+    print "%12s %20s %20s %30s" % ("strategies", "one at a time (secs)", "single pass (secs)", "single pass, shared SMA (secs)")
+    for strategyCount, oneAtATime, singlePass, sharedSMA in results:
+        print "%12d %20.2f %20.2f %30.2f" % (strategyCount, oneAtATime, singlePass, sharedSMA)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2015 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+# Measures NumPyDeque append throughput against the previous implementation, which shifted the whole array once
+# full, for different window sizes.
+
+import sys
+import os
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))  # For pyalgotrade
+
+from pyalgotrade.utils import collections
+
+
+appendCount = 100000
+windowSizes = [10, 100, 1000, 10000]
+
+
+# The NumPyDeque implementation up to version 0.17.
+class ShiftingNumPyDeque(object):
+    def __init__(self, maxLen, dtype=float):
+        self.__values = np.empty(maxLen, dtype=dtype)
+        self.__maxLen = maxLen
+        self.__nextPos = 0
+
+    def append(self, value):
+        if self.__nextPos < self.__maxLen:
+            self.__values[self.__nextPos] = value
+            self.__nextPos += 1
+        else:
+            self.__values[0:-1] = self.__values[1:]
+            self.__values[self.__nextPos - 1] = value
+
+    def data(self):
+        if self.__nextPos < self.__maxLen:
+            ret = self.__values[0:self.__nextPos]
+        else:
+            ret = self.__values
+        return ret
+
+
+def benchmark(dequeClass, windowSize):
+    d = dequeClass(windowSize)
+    begin = time.time()
+    for i in xrange(appendCount):
+        d.append(i)
+        d.data()
+    return appendCount / (time.time() - begin)
+
+
+def main():
+    print "%10s %22s %22s" % ("window", "shifting (appends/s)", "ring (appends/s)")
+    for windowSize in windowSizes:
+        shifting = benchmark(ShiftingNumPyDeque, windowSize)
+        ring = benchmark(collections.NumPyDeque, windowSize)
+        print "%10d %22.0f %22.0f" % (windowSize, shifting, ring)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2015 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+# Measures the memory used by each optimizer.local worker, and the time it takes to run, when bars are shared and when
+# each worker gets its own copy of the bars from the server.
+
+import sys
+import os
+import time
+import datetime
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))  # For pyalgotrade
+
+from pyalgotrade.barfeed import membf
+from pyalgotrade.optimizer import local
+from pyalgotrade import strategy
+from pyalgotrade import bar
+
+
+instrumentCount = 50
+barCount = 2520
+workerCount = 4
+parameterCount = 4
+
+
+class BarFeed(membf.BarFeed):
+    def barsHaveAdjClose(self):
+        return True
+
+
+# Returns the private memory of the worker process, in MB, as the result.
+class MemoryUsage(strategy.BacktestingStrategy):
+    def __init__(self, barFeed, param):
+        super(MemoryUsage, self).__init__(barFeed)
+
+    def onBars(self, bars):
+        pass
+
+    def getResult(self):
+        ret = 0
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Private_"):
+                    ret += int(line.split()[1])
+        return ret / 1024.0
+
+
+def build_feed():
+    ret = BarFeed(bar.Frequency.DAY)
+    begin = datetime.datetime(2000, 1, 3)
+    for i in xrange(instrumentCount):
+        ret.addBarsFromSequence("inst%d" % i, [
+            bar.BasicBar(begin + datetime.timedelta(days=day), 10, 11, 9, 10, 1000, 10, bar.Frequency.DAY) for day in xrange(barCount)
+        ])
+    return ret
+
+
+def main():
+    print "%d instruments, %d bars each, %d workers" % (instrumentCount, barCount, workerCount)
+    print "%12s %25s %15s" % ("shared bars", "worker private mem (MB)", "time (secs)")
+    for shareBars in [False, True]:
+        begin = time.time()
+        res = local.run(MemoryUsage, build_feed(), [(i,) for i in xrange(parameterCount)], workerCount, shareBars)
+        print "%12s %25.0f %15.2f" % (shareBars, res.getResult(), time.time() - begin)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2015 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+# Compares the XML-RPC and the binary transports used by the optimizer server and workers:
+# - How long it takes a worker to download the bars.
+# - How many jobs per second a local worker fleet gets through when strategies take no time to run. A small feed is
+#   used here so the time spent downloading the bars doesn't count.
+
+import sys
+import os
+import time
+import datetime
+import threading
+import multiprocessing
+import logging
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))  # For pyalgotrade
+
+from pyalgotrade.barfeed import membf
+from pyalgotrade.optimizer import local
+from pyalgotrade.optimizer import server
+from pyalgotrade.optimizer import worker
+from pyalgotrade.optimizer import resultsinks
+from pyalgotrade import bar
+
+
+instrumentCount = 20
+barCount = 2520
+workerCount = 4
+parameterCount = 20000
+batchSize = 10
+
+
+class BarFeed(membf.BarFeed):
+    def barsHaveAdjClose(self):
+        return True
+
+
+# Counts the jobs, since the server sends the results of each job at once.
+class JobCounter(resultsinks.ResultSink):
+    def __init__(self):
+        self.count = 0
+
+    def addResults(self, results):
+        self.count += 1
+
+
+class Worker(worker.Worker):
+    def runStrategy(self, barFeed, param):
+        return param
+
+
+def build_feed(instrumentCount, barCount):
+    ret = BarFeed(bar.Frequency.DAY)
+    begin = datetime.datetime(2000, 1, 3)
+    for i in xrange(instrumentCount):
+        ret.addBarsFromSequence("inst%d" % i, [
+            bar.BasicBar(begin + datetime.timedelta(days=day), 10, 11, 9, 10, 1000, 10, bar.Frequency.DAY) for day in xrange(barCount)
+        ])
+    return ret
+
+
+def worker_process(port, transport):
+    w = Worker("localhost", port, "worker-%d" % os.getpid(), transport)
+    w.getLogger().setLevel(logging.ERROR)
+    w.run()
+
+
+def run_server(transport, barFeed, parameters, benchmarkFunc, resultSink=None):
+    port = local.find_port()
+    srv = server.Server("localhost", port, False, transport, resultSink)
+    srv.getLogger().setLevel(logging.CRITICAL)
+    serverThread = threading.Thread(target=srv.serve, args=(barFeed, parameters))
+    serverThread.start()
+    try:
+        return benchmarkFunc(port)
+    finally:
+        srv.stop()
+        serverThread.join()
+
+
+def benchmark_download(transport):
+    def download(port):
+        w = Worker("localhost", port, "bench", transport)
+        begin = time.time()
+        w.getInstrumentsAndBars()
+        return time.time() - begin
+    return run_server(transport, build_feed(instrumentCount, barCount), [], download)
+
+
+def benchmark_jobs(transport):
+    jobCounter = JobCounter()
+
+    def runJobs(port):
+        begin = time.time()
+        workers = [multiprocessing.Process(target=worker_process, args=(port, transport)) for i in xrange(workerCount)]
+        for process in workers:
+            process.start()
+        for process in workers:
+            process.join()
+        return jobCounter.count / (time.time() - begin)
+    return run_server(transport, build_feed(1, 10), [(i,) for i in xrange(parameterCount)], runJobs, jobCounter)
+
+
+def main():
+    server.Server.defaultBatchSize = batchSize
+    print "%d instruments, %d bars each, %d workers, up to %d parameters per job" % (instrumentCount, barCount, workerCount, batchSize)
+    print "%10s %25s %10s" % ("transport", "bars download (secs)", "jobs/s")
+    for transport in [server.TRANSPORT_XMLRPC, server.TRANSPORT_BINARY]:
+        downloadTime = benchmark_download(transport)
+        jobsPerSecond = benchmark_jobs(transport)
+        print "%10s %25.2f %10.0f" % (transport, downloadTime, jobsPerSecond)
+
+
+if __name__ == "__main__":
+    main()